@@ -1,5 +1,8 @@
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -8,6 +11,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import hashlib
 
+from backend.worker_pool import BoundedPool, PoolBusy
+
 # CONFIGURATION
 SECRET_KEY = "jarvis_secret_key_change_this"  # Change this in production!
 ALGORITHM = "HS256"
@@ -17,22 +22,55 @@ USERS_FILE = "users.json"
 pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# bcrypt runs here instead of on the event loop; extra logins past the queue
+# limit get PoolBusy (HTTP 503) rather than stalling chat traffic
+password_pool = BoundedPool(
+    "bcrypt",
+    workers=int(os.getenv("JARVIS_PASSWORD_WORKERS", "2")),
+    queue_limit=int(os.getenv("JARVIS_PASSWORD_QUEUE_LIMIT", "32")),
+)
+
 # DATABASE HELPERS
 
-def _read_users_db():
-    """Reads the JSON file containing users."""
-    if not os.path.exists(USERS_FILE):
-        return {}
+# In-memory copy of users.json; reloaded only when the file's mtime changes
+_users_cache = None
+_users_mtime = None
+_users_lock = threading.RLock()
+
+def _users_file_mtime():
     try:
-        with open(USERS_FILE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return {}
+        return os.stat(USERS_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+def _read_users_db():
+    """Returns the user table, parsing users.json only when it changed on disk."""
+    global _users_cache, _users_mtime
+    mtime = _users_file_mtime()
+    if _users_cache is not None and mtime == _users_mtime:
+        return _users_cache
+
+    with _users_lock:
+        if mtime is None:
+            data = {}
+        else:
+            try:
+                with open(USERS_FILE, "r") as f:
+                    data = json.load(f)
+            except Exception:
+                data = {}
+        _users_cache, _users_mtime = data, mtime
+        return data
 
 def _write_users_db(data):
-    """Writes data to the JSON user file."""
-    with open(USERS_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    """Atomically writes the JSON user file (temp file + rename) and refreshes the cache."""
+    global _users_cache, _users_mtime
+    with _users_lock:
+        tmp_path = f"{USERS_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, USERS_FILE)
+        _users_cache, _users_mtime = data, _users_file_mtime()
 
 def get_user(username: str):
     """Retrieves a user dictionary by username."""
@@ -47,23 +85,91 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+async def aget_password_hash(password: str) -> str:
+    """get_password_hash on the password pool. Raises PoolBusy when it is full."""
+    return await password_pool.run(get_password_hash, password)
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password pool. Raises PoolBusy when it is full."""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+# TOKEN CACHE
+# The frontend sends the same bearer token on every request. Validated tokens
+# are kept (LRU) until they expire, so repeat requests skip jwt.decode. An
+# entry only counts while the user record it was checked against is still the
+# current one; any rewrite of users.json drops it.
+TOKEN_CACHE_SIZE = int(os.getenv("JARVIS_TOKEN_CACHE_SIZE", "1024"))
+
+class TokenCache:
+    def __init__(self, max_items: int = TOKEN_CACHE_SIZE):
+        self.max_items = max_items
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str):
+        """The cached user for `token`, or None if unknown, expired or revoked."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                username, user, expires_at = entry
+                if time.time() < expires_at and get_user(username) is user:
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return user
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, payload: dict, user: dict):
+        expires_at = payload.get("exp")
+        if expires_at is None:
+            return
+        with self._lock:
+            self._entries[token] = (payload["sub"], user, float(expires_at))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+token_cache = TokenCache()
+
 
 # USER CREATION (This is where your error was) 
 
-def create_user_in_db(username, password):
-    """Creates a new user and initializes their storage."""
+def create_user_in_db(username, password, hashed_pw=None):
+    """Creates a new user and initializes their storage.
+    Pass `hashed_pw` when the password was already hashed (e.g. on the password pool)."""
     # Check if user exists (Uses the function defined above)
     if get_user(username):
         return False
     
     # Hash password and save
-    hashed_pw = get_password_hash(password)
-    db = _read_users_db()
-    db[username] = {
-        "username": username,
-        "hashed_password": hashed_pw
-    }
-    _write_users_db(db)
+    if hashed_pw is None:
+        hashed_pw = get_password_hash(password)
+    with _users_lock:
+        db = dict(_read_users_db())
+        if username in db:
+            return False
+        db[username] = {
+            "username": username,
+            "hashed_password": hashed_pw
+        }
+        _write_users_db(db)
     
     # Initialize Memory/Storage Folders for this user
     try:
@@ -92,6 +198,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Validates the token and returns the current user."""
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -109,4 +219,5 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     user = get_user(username)
     if user is None:
         raise credentials_exception
+    token_cache.put(token, payload, user)
     return user
\ No newline at end of file
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+
+# CHAT METADATA INDEX
+# A compact per-user list of {chat_id, name, timestamp, updated_at, message_count}
+# kept sorted by recency (newest first), so the sidebar never touches messages.
+# Lives next to the chat data as data/users/<id>/chat_index.json.
+
+INDEX_FILE = "chat_index.json"
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(user_dir: str) -> threading.Lock:
+    with _locks_guard:
+        lock = _locks.get(user_dir)
+        if lock is None:
+            lock = _locks[user_dir] = threading.Lock()
+        return lock
+
+def _index_path(user_dir: str) -> str:
+    return os.path.join(user_dir, INDEX_FILE)
+
+def _sort_key(entry: dict):
+    return (entry.get("updated_at", ""), entry["chat_id"])
+
+def _load(user_dir: str):
+    with open(_index_path(user_dir), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _save(user_dir: str, entries):
+    path = _index_path(user_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    os.replace(tmp_path, path)
+
+def _pop(entries, chat_id: str):
+    for i, entry in enumerate(entries):
+        if entry["chat_id"] == chat_id:
+            return entries.pop(i)
+    return None
+
+def _insert_sorted(entries, entry: dict):
+    key = _sort_key(entry)
+    for i, other in enumerate(entries):
+        if _sort_key(other) < key:
+            entries.insert(i, entry)
+            return
+    entries.append(entry)
+
+
+def make_entry(chat_id: str, name: str, created_at: str, updated_at: str = None, message_count: int = 0) -> dict:
+    return {
+        "chat_id": chat_id,
+        "name": name,
+        "timestamp": created_at,
+        "updated_at": updated_at or created_at,
+        "message_count": message_count
+    }
+
+def exists(user_dir: str) -> bool:
+    return os.path.exists(_index_path(user_dir))
+
+def rebuild(user_dir: str, entries):
+    """Writes a fresh index from full chat metadata (used when it is missing)."""
+    entries = sorted(entries, key=_sort_key, reverse=True)
+    with _lock_for(user_dir):
+        _save(user_dir, entries)
+
+def read_page(user_dir: str, limit: int = None, cursor: str = None):
+    """Returns (entries, next_cursor). The cursor is opaque to clients."""
+    entries = _load(user_dir)
+
+    if cursor:
+        updated_at, _, chat_id = cursor.partition("|")
+        after = (updated_at, chat_id)
+        entries = [e for e in entries if _sort_key(e) < after]
+
+    if limit is None or len(entries) <= limit:
+        return entries, None
+
+    page = entries[:limit]
+    last = page[-1]
+    return page, f"{last.get('updated_at', '')}|{last['chat_id']}"
+
+def get(user_dir: str, chat_id: str):
+    for entry in _load(user_dir):
+        if entry["chat_id"] == chat_id:
+            return entry
+    return None
+
+def add(user_dir: str, entry: dict):
+    with _lock_for(user_dir):
+        entries = _load(user_dir)
+        _pop(entries, entry["chat_id"])
+        _insert_sorted(entries, entry)
+        _save(user_dir, entries)
+
+def rename(user_dir: str, chat_id: str, new_name: str):
+    with _lock_for(user_dir):
+        entries = _load(user_dir)
+        for entry in entries:
+            if entry["chat_id"] == chat_id:
+                entry["name"] = new_name
+                _save(user_dir, entries)
+                return
+
+def remove(user_dir: str, chat_id: str):
+    with _lock_for(user_dir):
+        entries = _load(user_dir)
+        if _pop(entries, chat_id) is not None:
+            _save(user_dir, entries)
+
+def touch(user_dir: str, chat_id: str, updated_at: str):
+    """Records a new message: bumps the chat to the front and counts it."""
+    with _lock_for(user_dir):
+        entries = _load(user_dir)
+        entry = _pop(entries, chat_id)
+        if entry is None:
+            return
+        entry["updated_at"] = updated_at
+        entry["message_count"] = entry.get("message_count", 0) + 1
+        _insert_sorted(entries, entry)
+        _save(user_dir, entries)
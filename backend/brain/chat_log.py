@@ -0,0 +1,269 @@
+import json
+import os
+import sys
+import threading
+
+# APPEND-ONLY CHAT SEGMENTS
+# Each chat lives in data/users/<id>/chats/<chat_id>.jsonl
+#   line 1   -> header  {"type": "header", "chat_id", "title", "created_at"}
+#   line 2.. -> message {"type": "message", "role", "content", "timestamp"}
+#            -> meta    {"type": "meta", "title"}   (renames, folded by compaction)
+# Appending a message is a single line write, so a turn costs O(1) no matter
+# how long the conversation already is.
+
+SEGMENTS_DIR = "chats"
+SEGMENT_EXT = ".jsonl"
+LEGACY_CHATS_FILE = "chats.json"
+LEGACY_BACKUP_SUFFIX = ".migrated"
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+# INTERNAL HELPERS
+def _lock_for(path: str) -> threading.Lock:
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            lock = _locks[path] = threading.Lock()
+        return lock
+
+def _segments_dir(user_dir: str) -> str:
+    path = os.path.join(user_dir, SEGMENTS_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _segment_path(user_dir: str, chat_id: str) -> str:
+    safe_id = "".join(c for c in chat_id if c.isalnum() or c in ("-", "_"))
+    return os.path.join(_segments_dir(user_dir), safe_id + SEGMENT_EXT)
+
+def _dump(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class CorruptSegment(ValueError):
+    """A segment has an unreadable line before its last one."""
+
+
+def _read_records(path: str, strict: bool = False):
+    """Yields records in file order. A torn (half-written, unterminated) last line
+    is skipped; a bad line anywhere else is reported, or raised when `strict`."""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if not line.endswith("\n"):
+                    continue
+                if strict:
+                    raise CorruptSegment(f"{path}: unreadable line {number}")
+                print(f"⚠️ Skipping unreadable line {number} in {path}")
+
+def _cut_torn_tail(f, end: int):
+    """Truncates an unterminated last line (a crashed write) off an open binary file."""
+    pos = end
+    cut = 0
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        newline = f.read(step).rfind(b"\n")
+        if newline != -1:
+            cut = pos + newline + 1
+            break
+    print(f"⚠️ Dropping torn line at the end of {f.name}")
+    f.truncate(cut)
+
+def _append_line(path: str, line: str):
+    """Appends one record. Caller holds the segment lock. A torn tail left by an
+    earlier crash is cut off first, so the new record never lands on a partial line."""
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end:
+            f.seek(end - 1)
+            if f.read(1) != b"\n":
+                _cut_torn_tail(f, end)
+        f.seek(0, os.SEEK_END)
+        f.write(line.encode("utf-8"))
+
+def _write_segment(path: str, header: dict, messages):
+    """Atomically replaces a segment with a header and the given messages."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(_dump(header))
+        for msg in messages:
+            f.write(_dump({"type": "message", **msg}))
+    os.replace(tmp_path, path)
+
+def _message(record: dict) -> dict:
+    return {
+        "role": record.get("role"),
+        "content": record.get("content"),
+        "timestamp": record.get("timestamp", "")
+    }
+
+
+# MIGRATION
+def migrate_user(user_dir: str) -> int:
+    """Converts a legacy chats.json into per-chat segments. Returns chats migrated."""
+    legacy_path = os.path.join(user_dir, LEGACY_CHATS_FILE)
+    if not os.path.exists(legacy_path):
+        return 0
+
+    try:
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        data = {}
+
+    migrated = 0
+    for chat_id, chat in data.items():
+        path = _segment_path(user_dir, chat_id)
+        if os.path.exists(path):
+            continue
+        header = {
+            "type": "header",
+            "chat_id": chat_id,
+            "title": chat.get("title", "New Conversation"),
+            "created_at": chat.get("created_at", "")
+        }
+        _write_segment(path, header, (_message(m) for m in chat.get("messages", [])))
+        migrated += 1
+
+    # Keep the original around instead of deleting user data
+    os.replace(legacy_path, legacy_path + LEGACY_BACKUP_SUFFIX)
+    return migrated
+
+def ensure_user(user_dir: str):
+    """Creates the segment directory and migrates legacy chats on first use."""
+    _segments_dir(user_dir)
+    legacy_path = os.path.join(user_dir, LEGACY_CHATS_FILE)
+    if os.path.exists(legacy_path):
+        with _lock_for(legacy_path):
+            migrate_user(user_dir)
+
+
+# CHAT FUNCTIONS
+def read_header(user_dir: str, chat_id: str):
+    """Returns the chat header with any later renames applied, or None."""
+    path = _segment_path(user_dir, chat_id)
+    if not os.path.exists(path):
+        return None
+
+    header = None
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            # Only header and meta records matter here; skip parsing messages
+            if i > 0 and not line.startswith('{"type": "meta"'):
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("type") == "header":
+                header = record
+            elif record.get("type") == "meta" and header is not None:
+                header.update({k: v for k, v in record.items() if k != "type"})
+    if header is not None:
+        header["type"] = "header"
+    return header
+
+def list_chat_ids(user_dir: str):
+    return [
+        name[:-len(SEGMENT_EXT)]
+        for name in os.listdir(_segments_dir(user_dir))
+        if name.endswith(SEGMENT_EXT)
+    ]
+
+def create_chat(user_dir: str, chat_id: str, title: str, created_at: str):
+    path = _segment_path(user_dir, chat_id)
+    header = {"type": "header", "chat_id": chat_id, "title": title, "created_at": created_at}
+    with _lock_for(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(_dump(header))
+
+def rename_chat(user_dir: str, chat_id: str, new_name: str) -> bool:
+    path = _segment_path(user_dir, chat_id)
+    if not os.path.exists(path):
+        return False
+    with _lock_for(path):
+        _append_line(path, _dump({"type": "meta", "title": new_name}))
+    return True
+
+def delete_chat(user_dir: str, chat_id: str) -> bool:
+    path = _segment_path(user_dir, chat_id)
+    with _lock_for(path):
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+    return True
+
+def iter_messages(user_dir: str, chat_id: str):
+    """Streams the messages of a chat without loading the whole segment."""
+    path = _segment_path(user_dir, chat_id)
+    if not os.path.exists(path):
+        return
+    for record in _read_records(path):
+        if record.get("type") == "message":
+            yield _message(record)
+
+def append_message(user_dir: str, chat_id: str, message: dict) -> bool:
+    path = _segment_path(user_dir, chat_id)
+    if not os.path.exists(path):
+        return False
+    line = _dump({"type": "message", **message})
+    with _lock_for(path):
+        _append_line(path, line)
+    return True
+
+
+# COMPACTION (offline)
+def compact_chat(user_dir: str, chat_id: str) -> bool:
+    """Folds meta records into the header and drops a torn last line.
+    Segments with damage elsewhere are left untouched for manual repair."""
+    path = _segment_path(user_dir, chat_id)
+    if not os.path.exists(path):
+        return False
+    with _lock_for(path):
+        header = None
+        messages = []
+        try:
+            for record in _read_records(path, strict=True):
+                kind = record.get("type")
+                if kind == "header":
+                    header = record
+                elif kind == "meta" and header is not None:
+                    header.update({k: v for k, v in record.items() if k != "type"})
+                elif kind == "message":
+                    messages.append(_message(record))
+        except CorruptSegment as e:
+            print(f"⚠️ Not compacting {chat_id}: {e}")
+            return False
+        if header is None:
+            return False
+        header["type"] = "header"
+        _write_segment(path, header, messages)
+    return True
+
+def compact_user(user_dir: str) -> int:
+    return sum(1 for chat_id in list_chat_ids(user_dir) if compact_chat(user_dir, chat_id))
+
+
+if __name__ == "__main__":
+    # Usage: python -m backend.brain.chat_log [migrate|compact] [data/users]
+    command = sys.argv[1] if len(sys.argv) > 1 else "compact"
+    users_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join("data", "users")
+
+    for name in sorted(os.listdir(users_dir)):
+        user_dir = os.path.join(users_dir, name)
+        if not os.path.isdir(user_dir):
+            continue
+        if command == "migrate":
+            print(f"📦 {name}: migrated {migrate_user(user_dir)} chats")
+        elif command == "compact":
+            print(f"🧹 {name}: compacted {compact_user(user_dir)} chats")
+        else:
+            print(f"Unknown command: {command}")
+            sys.exit(1)
@@ -0,0 +1,119 @@
+import os
+import re
+from functools import lru_cache
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+# TOKEN-BUDGETED CONTEXT WINDOW
+# Decides how much chat history and long-term memory goes into a prompt.
+# Newest turns win; anything older than the budget allows is dropped. Turns that
+# were already folded into a rolling summary (summarizer.py) arrive as `summary`.
+
+TOKEN_BUDGET = int(os.getenv("JARVIS_CONTEXT_TOKEN_BUDGET", "6000"))
+# Share of the budget long-term memory may use before history gets the rest
+MEMORY_SHARE = float(os.getenv("JARVIS_CONTEXT_MEMORY_SHARE", "0.25"))
+# Role/formatting tokens the chat template adds around every message
+MESSAGE_OVERHEAD = 4
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_encoder = None
+_encoder_loaded = False
+
+
+def _get_encoder():
+    """tiktoken's cl100k encoding if tiktoken is installed and the encoding loads, else None.
+    The first load downloads the encoding into tiktoken's cache, so call load_encoder()
+    at startup rather than on a request."""
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = None
+    return _encoder
+
+def load_encoder() -> bool:
+    """Loads (and if needed downloads) the tokenizer now; True if tiktoken is in use."""
+    return _get_encoder() is not None
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    # Offline fallback: words and punctuation, padded for sub-word splits
+    return int(len(_WORD_RE.findall(text)) * 1.3) + 1
+
+def count_message_tokens(message) -> int:
+    content = message.content if hasattr(message, "content") else message.get("content", "")
+    return count_tokens(str(content)) + MESSAGE_OVERHEAD
+
+
+class ContextWindow:
+    """What actually goes to the LLM for one request, plus its token cost."""
+
+    def __init__(self, history, memories, tokens, dropped_messages, dropped_memories):
+        self.history = history
+        self.memories = memories
+        self.tokens = tokens
+        self.dropped_messages = dropped_messages
+        self.dropped_memories = dropped_memories
+
+    def __repr__(self):
+        return (
+            f"ContextWindow(tokens={self.tokens}, messages={len(self.history)}, "
+            f"memories={len(self.memories)}, dropped={self.dropped_messages})"
+        )
+
+
+def build_context(user_text: str, history: list, memories: list, system_prompt: str = "",
+                  budget: int = TOKEN_BUDGET, summary: str = "") -> ContextWindow:
+    """
+    Fits the system prompt, the current user turn, the conversation summary,
+    long-term memories and the most recent chat turns into `budget` tokens.
+    `memories` must be ordered most important first.
+    """
+    used = count_tokens(system_prompt) + count_message_tokens(HumanMessage(content=user_text))
+
+    summary_message = None
+    if summary:
+        summary_message = SystemMessage(content=f"Summary of the earlier conversation: {summary}")
+        used += count_message_tokens(summary_message)
+
+    # Long-term memory: most important first, capped at its share of the budget
+    memory_budget = int(max(budget - used, 0) * MEMORY_SHARE)
+    kept_memories = []
+    memory_tokens = MESSAGE_OVERHEAD if memories else 0
+    for memory in memories:
+        cost = count_tokens(f"- {memory}") + 1
+        if memory_tokens + cost > memory_budget:
+            break
+        kept_memories.append(memory)
+        memory_tokens += cost
+    if kept_memories:
+        used += memory_tokens
+
+    # History: walk back from the newest turn until the budget runs out
+    kept_history = []
+    for message in reversed(history):
+        cost = count_message_tokens(message)
+        if used + cost > budget:
+            break
+        kept_history.append(message)
+        used += cost
+    kept_history.reverse()
+    dropped = len(history) - len(kept_history)
+    if summary_message is not None:
+        kept_history.insert(0, summary_message)
+
+    return ContextWindow(
+        history=kept_history,
+        memories=kept_memories,
+        tokens=used,
+        dropped_messages=dropped,
+        dropped_memories=len(memories) - len(kept_memories),
+    )
@@ -0,0 +1,149 @@
+import os
+import re
+import difflib
+import importlib.util
+
+# FAST PATH FOR DEVICE COMMANDS
+# "open notepad", "set volume to 40", "close chrome": short imperative commands
+# are matched against compiled patterns and the local agent's app table, and
+# turned straight into the agent's JSON command, skipping the LLM round trip.
+# Anything ambiguous returns None and goes to the LLM as before.
+
+# The agent's allowed applications (local_agent/apps.py), read without importing the agent
+APPS_FILE = os.getenv(
+    "JARVIS_AGENT_APPS",
+    os.path.join(os.path.dirname(__file__), "..", "..", "local_agent", "apps.py"),
+)
+MIN_CONFIDENCE = float(os.getenv("JARVIS_INTENT_MIN_CONFIDENCE", "0.85"))
+
+# Everyday names for entries in the apps table
+ALIASES = {
+    "calc": "calculator",
+    "command prompt": "cmd",
+    "terminal": "cmd",
+    "explorer": "file_explorer",
+    "files": "file_explorer",
+    "visual studio code": "vscode",
+    "vs code": "vscode",
+    "code": "vscode",
+    "google chrome": "chrome",
+    "microsoft edge": "edge",
+    "mozilla firefox": "firefox",
+    "ms word": "word",
+    "microsoft word": "word",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+    "microsoft teams": "teams",
+    "media player": "windows_media_player",
+    "docker": "docker_desktop",
+    "keyboard": "on_screen_keyboard",
+    "snip": "snipping_tool",
+}
+
+_PREFIX_RE = re.compile(r"^(?:(?:hey\s+)?jarvis\b[\s,]*)?(?:(?:please|can you|could you|would you)\s+)*")
+_SUFFIX_RE = re.compile(r"(?:\s+(?:please|for me|now))+$")
+_OPEN_RE = re.compile(r"^(?:open|launch|start|run)\s+(?:up\s+)?(?:the\s+|my\s+)?(?P<target>.+?)(?:\s+app(?:lication)?)?$")
+_CLOSE_RE = re.compile(r"^(?:close|quit|exit|kill)\s+(?:the\s+|my\s+)?(?P<target>.+?)(?:\s+app(?:lication)?)?$")
+_VISIT_RE = re.compile(
+    r"^(?P<verb>go to|visit|browse to|open)\s+"
+    r"(?P<url>(?P<scheme>https?://)?(?P<host>[\w-]+(?:\.[\w-]+)+)(?:/\S*)?)$"
+)
+# "open x.y" may just as well be a file ("open notes.txt"), so it only counts
+# as a website with a scheme, a www. host or one of these TLDs
+WEB_TLDS = {
+    "com", "org", "net", "edu", "gov", "io", "dev", "ai", "app", "co", "in", "uk",
+    "us", "ca", "au", "de", "fr", "jp", "me", "tv", "gg", "info", "biz", "xyz", "tech",
+}
+_VOLUME_RE = re.compile(
+    r"^(?:(?:set|change|turn|put)\s+(?:the\s+)?)?volume\s+(?:to\s+|at\s+)?(?P<level>\d{1,3})\s*(?:%|percent)?$"
+)
+_MUTE_RE = re.compile(r"^mute(?:\s+(?:the\s+)?(?:volume|sound|audio))?$")
+# Compound requests ("open word and write a letter") need the LLM
+_COMPOUND_RE = re.compile(r"\b(?:and|then|after|but)\b|[,;]")
+
+_BROWSERS = {"chrome", "edge", "firefox"}
+_apps = None
+
+
+def _looks_like_website(m) -> bool:
+    host = m.group("host")
+    return bool(m.group("scheme")) or host.startswith("www.") or host.rsplit(".", 1)[-1] in WEB_TLDS
+
+
+def _load_apps() -> dict:
+    global _apps
+    if _apps is None:
+        try:
+            spec = importlib.util.spec_from_file_location("_agent_apps", APPS_FILE)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _apps = dict(module.APPS)
+        except Exception as e:
+            print(f"⚠️ Intent router could not load the agent app table: {e}")
+            _apps = {}
+    return _apps
+
+def _normalize(text: str) -> str:
+    text = text.strip().lower().rstrip(".!?")
+    text = _PREFIX_RE.sub("", text)
+    return _SUFFIX_RE.sub("", text).strip()
+
+def lookup_app(name: str):
+    """(apps-table key, confidence) for a spoken app name, or (None, 0.0)."""
+    apps = _load_apps()
+    name = name.strip().lower()
+    candidates = {key.replace("_", " "): key for key in apps}
+    candidates.update({alias: key for alias, key in ALIASES.items() if key in apps})
+
+    if name in apps:
+        return name, 1.0
+    if name in candidates:
+        return candidates[name], 1.0
+    matches = difflib.get_close_matches(name, list(candidates), n=1, cutoff=MIN_CONFIDENCE)
+    if not matches:
+        return None, 0.0
+    return candidates[matches[0]], difflib.SequenceMatcher(None, name, matches[0]).ratio()
+
+
+def match(text: str):
+    """The agent command for `text` when it is a plain device command, else None."""
+    command = _normalize(text)
+    if not command or len(command) > 80 or _COMPOUND_RE.search(command):
+        return None
+
+    if _MUTE_RE.match(command):
+        return {"action": "set_volume", "level": 0}
+
+    m = _VOLUME_RE.match(command)
+    if m:
+        level = int(m.group("level"))
+        return {"action": "set_volume", "level": level} if level <= 100 else None
+
+    m = _VISIT_RE.match(command)
+    if m and m.group("verb") == "open" and not _looks_like_website(m):
+        return None
+    if m:
+        url = m.group("url")
+        return {"action": "open_website", "url": url if url.startswith("http") else f"https://{url}"}
+
+    m = _OPEN_RE.match(command)
+    if m:
+        key, confidence = lookup_app(m.group("target"))
+        if key and confidence >= MIN_CONFIDENCE:
+            return {"action": "open_app", "app": key}
+        return None
+
+    m = _CLOSE_RE.match(command)
+    if m:
+        key, confidence = lookup_app(m.group("target"))
+        if not key or confidence < MIN_CONFIDENCE:
+            return None
+        if key in _BROWSERS:
+            return {"action": "close_website", "browser": key}
+        exe = _load_apps()[key]
+        if not exe.lower().endswith(".exe"):
+            return None
+        # The agent kills "<app>.exe", so send the process name rather than the table key
+        return {"action": "close_app", "app": exe[:-4]}
+
+    return None
@@ -0,0 +1,323 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+
+# MULTI-PROVIDER LLM ROUTING
+# LLMRouter stands in for a single chat model (invoke / ainvoke / astream) and
+# spreads calls over an ordered list of providers:
+#  - providers are tried in priority order, skipping any whose circuit is open
+#  - async calls are hedged: if the current provider hasn't answered by its own
+#    p95 latency, the next provider gets the same request and the first answer wins
+#  - a provider that keeps failing is taken out of rotation for a cool-down
+
+# Comma-separated, highest priority first. Known names: groq, groq-instant, ollama, stub
+PROVIDERS = os.getenv("JARVIS_LLM_PROVIDERS", "")
+HEDGE_ENABLED = os.getenv("JARVIS_LLM_HEDGE", "1") != "0"
+# Hedge delay used until a provider has enough latency samples for a p95
+DEFAULT_HEDGE_SECONDS = float(os.getenv("JARVIS_LLM_HEDGE_AFTER", "3.0"))
+MIN_HEDGE_SECONDS = 0.25
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+BREAKER_FAILURES = int(os.getenv("JARVIS_LLM_BREAKER_FAILURES", "3"))
+BREAKER_RESET_SECONDS = float(os.getenv("JARVIS_LLM_BREAKER_RESET", "30"))
+
+GROQ_MODEL = "llama-3.3-70b-versatile"
+GROQ_INSTANT_MODEL = os.getenv("JARVIS_GROQ_FALLBACK_MODEL", "llama-3.1-8b-instant")
+OLLAMA_MODEL = os.getenv("JARVIS_OLLAMA_MODEL", "llama3.1")
+
+
+class NoHealthyProvider(RuntimeError):
+    """Every provider failed or has its circuit open."""
+
+
+class LatencyTracker:
+    """Sliding window of call latencies (seconds)."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float):
+        if len(self._samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class CircuitBreaker:
+    """closed -> open after `failures` consecutive errors; after `reset_after`
+    seconds one trial call is let through (half-open) to decide which way to go."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_after: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failures
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_after:
+                self.state = "half_open"
+                self._trial_running = False
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release(self):
+        """A half-open trial ended without a verdict (e.g. it was cancelled)."""
+        with self._lock:
+            self._trial_running = False
+
+
+class Provider:
+    def __init__(self, name: str, llm):
+        self.name = name
+        self.llm = llm
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()      # full replies (invoke / ainvoke)
+        self.first_token = LatencyTracker()  # time to first chunk (astream)
+        self.calls = 0
+        self.failures = 0
+        self.wins = 0
+
+    def hedge_delay(self, tracker: LatencyTracker) -> float:
+        p95 = tracker.percentile(95)
+        return DEFAULT_HEDGE_SECONDS if p95 is None else max(p95, MIN_HEDGE_SECONDS)
+
+    def stats(self) -> dict:
+        p50, p95 = self.latency.percentile(50), self.latency.percentile(95)
+        return {
+            "circuit": self.breaker.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "wins": self.wins,
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+        }
+
+
+def create_provider(name: str) -> Provider:
+    """Builds a named provider; raises if it can't be configured here."""
+    if name == "stub":
+        from .stub_llm import StubChatModel
+        return Provider(name, StubChatModel())
+    if name in ("groq", "groq-instant"):
+        from langchain_groq import ChatGroq
+        groq_key = os.getenv("GROQ_API_KEY")
+        if not groq_key:
+            raise ValueError("GROQ_API_KEY not set")
+        model = GROQ_MODEL if name == "groq" else GROQ_INSTANT_MODEL
+        return Provider(name, ChatGroq(groq_api_key=groq_key, model_name=model, temperature=0.3))
+    if name == "ollama":
+        from langchain_ollama import ChatOllama
+        return Provider(name, ChatOllama(model=OLLAMA_MODEL, temperature=0.3))
+    raise ValueError(f"unknown LLM provider '{name}'")
+
+
+class LLMRouter:
+    """Chat-model facade over several providers (see module comment)."""
+
+    def __init__(self, providers: list, hedge: bool = HEDGE_ENABLED):
+        self.providers = providers
+        self.hedge = hedge
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def _next_allowed(self, queue: list):
+        """Pops providers off `queue` until one whose circuit lets a call through."""
+        while queue:
+            provider = queue.pop(0)
+            if provider.breaker.allow():
+                return provider
+        return None
+
+    # Sync path: plain failover (used by background jobs such as summaries)
+    def invoke(self, messages, **kwargs):
+        errors = []
+        queue = list(self.providers)
+        while True:
+            provider = self._next_allowed(queue)
+            if provider is None:
+                break
+            provider.calls += 1
+            started = time.perf_counter()
+            try:
+                result = provider.llm.invoke(messages, **kwargs)
+            except Exception as e:
+                provider.failures += 1
+                provider.breaker.record_failure()
+                errors.append(f"{provider.name}: {e}")
+                self.failovers += 1
+                continue
+            provider.latency.record(time.perf_counter() - started)
+            provider.breaker.record_success()
+            provider.wins += 1
+            return result
+        raise NoHealthyProvider("; ".join(errors) or "all LLM providers have their circuit open")
+
+    async def _attempt(self, provider: Provider, tracker: LatencyTracker, call):
+        provider.calls += 1
+        started = time.perf_counter()
+        try:
+            result = await call(provider)
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            raise
+        except Exception:
+            provider.failures += 1
+            provider.breaker.record_failure()
+            raise
+        tracker.record(time.perf_counter() - started)
+        provider.breaker.record_success()
+        return result
+
+    async def _hedged(self, call, tracker_of, discard=None):
+        """Runs `call(provider)` on the first available provider, hedging to the next
+        one after the current provider's p95, and failing over on errors.
+        Returns (provider, result) of the first success; `discard(result)` cleans up
+        results that lost the race."""
+        queue = list(self.providers)
+        running = {}
+        errors = []
+        hedged = False
+
+        def launch():
+            provider = self._next_allowed(queue)
+            if provider is not None:
+                task = asyncio.ensure_future(self._attempt(provider, tracker_of(provider), call))
+                running[task] = provider
+            return provider
+
+        current = launch()
+        if current is None:
+            raise NoHealthyProvider("all LLM providers have their circuit open")
+        try:
+            while running:
+                wait_for = None
+                if self.hedge and not hedged and queue:
+                    wait_for = current.hedge_delay(tracker_of(current))
+                done, _ = await asyncio.wait(running, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedged = True
+                    backup = launch()
+                    if backup is not None:
+                        self.hedged_requests += 1
+                        current = backup
+                    continue
+
+                winner = None
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is not None:
+                        errors.append(f"{provider.name}: {task.exception()}")
+                    elif winner is None:
+                        winner = (provider, task.result())
+                    elif discard is not None:
+                        await discard(task.result())
+                if winner is not None:
+                    provider, result = winner
+                    provider.wins += 1
+                    if hedged and provider is current:
+                        self.hedge_wins += 1
+                    return provider, result
+                if not running and queue:
+                    backup = launch()
+                    if backup is not None:
+                        self.failovers += 1
+                        current = backup
+            raise NoHealthyProvider("; ".join(errors) or "no provider answered")
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                results = await asyncio.gather(*running, return_exceptions=True)
+                if discard is not None:
+                    for result in results:
+                        if not isinstance(result, BaseException):
+                            await discard(result)
+
+    async def ainvoke(self, messages, **kwargs):
+        async def call(provider):
+            return await provider.llm.ainvoke(messages, **kwargs)
+
+        _, result = await self._hedged(call, lambda p: p.latency)
+        return result
+
+    async def astream(self, messages, **kwargs):
+        """Hedges on time to first chunk; the winning stream is then relayed to the end."""
+        async def call(provider):
+            stream = provider.llm.astream(messages, **kwargs)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await stream.aclose()
+                raise
+            return stream, first
+
+        async def discard(result):
+            await result[0].aclose()
+
+        provider, (stream, first) = await self._hedged(call, lambda p: p.first_token, discard)
+        try:
+            if first is not None:
+                yield first
+            async for chunk in stream:
+                yield chunk
+        except GeneratorExit:
+            raise
+        except Exception:
+            provider.failures += 1
+            provider.breaker.record_failure()
+            raise
+        finally:
+            await stream.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "hedged_requests": self.hedged_requests,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "providers": {p.name: p.stats() for p in self.providers},
+        }
+
+
+def build_router(names: list):
+    """(LLMRouter or None, {name: error}) for the configured provider names."""
+    providers, errors = [], {}
+    for name in names:
+        try:
+            providers.append(create_provider(name))
+        except Exception as e:
+            errors[name] = str(e)
+    return (LLMRouter(providers) if providers else None), errors
@@ -1,5 +1,7 @@
 import os
+import asyncio
 import pathlib
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 # Try to load .env from repo root first
@@ -11,96 +13,110 @@ else:
     load_dotenv()
 
 # IMPORTS 
-from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
+from . import llm_router
+from .response_cache import ResponseCache
+
 # LOAD ENVIRONMENT VARIABLES
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# "groq" (default) or "stub" (offline StubChatModel, for tests and local runs).
+# JARVIS_LLM_PROVIDERS (e.g. "groq,groq-instant,stub") overrides it with a routed priority list.
+LLM_BACKEND = os.getenv("JARVIS_LLM_BACKEND", "groq").lower()
 
-class Brain:
-    def __init__(self):
-        # Initialize state; do NOT perform heavy network ops here without handling errors.
-        self.llm = None
-        self._init_error = None
+FALLBACK_RESPONSE = "I couldn't contact the language model right now; please try again later."
+TIMEOUT_RESPONSE = "I'm sorry, sir. The language model took too long to answer; please try again."
+ERROR_RESPONSE = "I apologize, sir. My neural pathways failed to generate a response."
 
-        # Attempt to initialize the ChatGroq client only if the env var is present
-        groq_key = os.getenv("GROQ_API_KEY")
-        if not groq_key:
-            self._init_error = "GROQ_API_KEY not set"
-            return
+# Async path: at most this many LLM calls in flight per process, each bounded in time
+LLM_CONCURRENCY = int(os.getenv("JARVIS_LLM_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("JARVIS_LLM_TIMEOUT", "60"))
 
-        try:
-            # Initialize Groq 
-            self.llm = ChatGroq(
-                groq_api_key=groq_key,
-                model_name="llama-3.3-70b-versatile",
-                temperature=0.3,
-            )
+# UPDATED SYSTEM MESSAGE (
+# This teaches Jarvis to output JSON when he needs to search
+SYSTEM_PROMPT = (
+    "You are J.A.R.V.I.S, a precise and intelligent AI assistant.\n\n"
 
-            # UPDATED SYSTEM MESSAGE (
-            # This teaches Jarvis to output JSON when he needs to search
-            self.system_message_text = (
-                "You are J.A.R.V.I.S, a precise and intelligent AI assistant.\n\n"
+    "LIMIT: Respond in at most 30 words UNLESS using a tool.\n\n"
 
-                "LIMIT: Respond in at most 30 words UNLESS using a tool.\n\n"
+    "You have TWO tools:\n"
+    "1) Web Search Tool → for real-time information\n"
+    "2) Local Device Control Tool → for controlling the user's Windows computer\n\n"
 
-                "You have TWO tools:\n"
-                "1) Web Search Tool → for real-time information\n"
-                "2) Local Device Control Tool → for controlling the user's Windows computer\n\n"
+    "=========================\n"
+    "WEB SEARCH TOOL\n"
+    "Use when user asks about news, weather, current events, or unknown facts.\n"
+    "FORMAT:\n"
+    '{"query": "search text"}\n\n'
 
-                "=========================\n"
-                "WEB SEARCH TOOL\n"
-                "Use when user asks about news, weather, current events, or unknown facts.\n"
-                "FORMAT:\n"
-                '{"query": "search text"}\n\n'
+    "=========================\n"
+    "LOCAL DEVICE CONTROL TOOL\n"
+    "Use when user asks to operate the computer.\n\n"
 
-                "=========================\n"
-                "LOCAL DEVICE CONTROL TOOL\n"
-                "Use when user asks to operate the computer.\n\n"
+    "AVAILABLE ACTIONS:\n"
 
-                "AVAILABLE ACTIONS:\n"
+    "Open an application:\n"
+    '{"action":"open_app","app":"notepad"}\n\n'
 
-                "Open an application:\n"
-                '{"action":"open_app","app":"notepad"}\n\n'
+    "Close an application:\n"
+    '{"action":"close_app","app":"notepad"}\n\n'
 
-                "Close an application:\n"
-                '{"action":"close_app","app":"notepad"}\n\n'
+    "Open a website:\n"
+    '{"action":"open_website","url":"https://google.com"}\n\n'
 
-                "Open a website:\n"
-                '{"action":"open_website","url":"https://google.com"}\n\n'
+    "Close a browser:\n"
+    '{"action":"close_website","browser":"chrome"}\n\n'
 
-                "Close a browser:\n"
-                '{"action":"close_website","browser":"chrome"}\n\n'
+    "Set system volume (0–100):\n"
+    '{"action":"set_volume","level":50}\n\n'
 
-                "Set system volume (0–100):\n"
-                '{"action":"set_volume","level":50}\n\n'
+    "Create a folder:\n"
+    '{"action":"create_folder","path":"%DESKTOP%\\NewFolder"}\n\n'
 
-                "Create a folder:\n"
-                '{"action":"create_folder","path":"%DESKTOP%\\NewFolder"}\n\n'
+    "Delete a file:\n"
+    '{"action":"delete_file","path":"C:\\\\Users\\\\User\\\\Downloads\\\\file.txt"}\n\n'
 
-                "Delete a file:\n"
-                '{"action":"delete_file","path":"C:\\\\Users\\\\User\\\\Downloads\\\\file.txt"}\n\n'
+    "Run an executable program:\n"
+    '{"action":"run_exe","path":"C:\\\\Program Files\\\\App\\\\app.exe","args":""}\n\n'
 
-                "Run an executable program:\n"
-                '{"action":"run_exe","path":"C:\\\\Program Files\\\\App\\\\app.exe","args":""}\n\n'
+    "RULES:\n"
+    "- When using a tool, output ONLY JSON.\n"
+    "- No explanations when calling tools.\n"
+    "- Use full Windows 10/11 paths when required.\n"
+    "- Do not invent new actions.\n"
+    "- If the task cannot be done using these actions, respond normally instead. Do not take any destructive local actions \n\n"
 
-                "RULES:\n"
-                "- When using a tool, output ONLY JSON.\n"
-                "- No explanations when calling tools.\n"
-                "- Use full Windows 10/11 paths when required.\n"
-                "- Do not invent new actions.\n"
-                "- If the task cannot be done using these actions, respond normally instead. Do not take any destructive local actions \n\n"
+    "If the user asks a knowledge question → respond normally.\n"
+)
 
-                "If the user asks a knowledge question → respond normally.\n"
-            )
+def _provider_names() -> list:
+    names = llm_router.PROVIDERS or LLM_BACKEND
+    return [name.strip().lower() for name in names.split(",") if name.strip()]
 
+def _llm_configured() -> bool:
+    """False only when every configured provider needs a Groq key and none is set."""
+    return bool(os.getenv("GROQ_API_KEY")) or any(
+        name not in ("groq", "groq-instant") for name in _provider_names()
+    )
 
 
-        except Exception as e:
-            # Capture initialization errors and avoid raising during import
-            self._init_error = str(e)
+class Brain:
+    def __init__(self):
+        # Initialize state; do NOT perform heavy network ops here without handling errors.
+        self.llm = None
+        self._init_error = None
+        self.system_message_text = SYSTEM_PROMPT
+
+        # Providers that can't be set up (e.g. groq without GROQ_API_KEY) are left out
+        router, errors = llm_router.build_router(_provider_names())
+        for name, error in errors.items():
+            print(f"⚠️ LLM provider '{name}' unavailable: {error}")
+        if router is None:
+            self._init_error = "; ".join(f"{name}: {error}" for name, error in errors.items())
+            return
+        self.llm = router
 
-    def generate_response(self, user_text, chat_history=[], context=""):
+    def _build_messages(self, user_text, chat_history, context):
         # Convert Chat History
         formatted_history = []
 
@@ -116,30 +132,108 @@ class Brain:
             else:
                 formatted_history.append(msg)
 
+        return [
+            SystemMessage(content=self.system_message_text),
+            *formatted_history,
+            HumanMessage(content=user_text)
+        ]
+
+    def generate_response(self, user_text, chat_history=[], context=""):
         try:
             # 2. Use LLM directly
-            all_messages = [
-                SystemMessage(content=self.system_message_text),
-                *formatted_history,
-                HumanMessage(content=user_text)
-            ]
-
+            all_messages = self._build_messages(user_text, chat_history, context)
             response = self.llm.invoke(all_messages)
             return response.content
 
         except Exception as e:
             # Catch any unexpected error
             print(f"❌ generate_response error: {e}")
-            return "I apologize, sir. My neural pathways failed to generate a response."
+            return ERROR_RESPONSE
+
+    async def agenerate_response(self, user_text, chat_history=[], context="", timeout=LLM_TIMEOUT_SECONDS):
+        """generate_response without blocking the event loop (llm.ainvoke)."""
+        try:
+            all_messages = self._build_messages(user_text, chat_history, context)
+            response = await asyncio.wait_for(self.llm.ainvoke(all_messages), timeout)
+            return response.content
+
+        except asyncio.TimeoutError:
+            _llm_stats["timeouts"] += 1
+            print(f"⏱️ agenerate_response timed out after {timeout}s")
+            return TIMEOUT_RESPONSE
+        except Exception as e:
+            print(f"❌ agenerate_response error: {e}")
+            return ERROR_RESPONSE
+
+    async def astream_response(self, user_text, chat_history=[], context="", timeout=LLM_TIMEOUT_SECONDS,
+                               status=None):
+        """Yields the reply as text chunks while the model generates it.
+        `timeout` bounds the wait for each chunk, not the whole reply. If the stream
+        breaks off, status["failed"] is set (when a status dict is passed)."""
+        all_messages = self._build_messages(user_text, chat_history, context)
+        streamed = False
+        stream = self.llm.astream(all_messages)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                if chunk.content:
+                    streamed = True
+                    yield chunk.content
+        except asyncio.TimeoutError:
+            _llm_stats["timeouts"] += 1
+            print(f"⏱️ astream_response stalled for {timeout}s")
+            if status is not None:
+                status["failed"] = True
+            if not streamed:
+                yield TIMEOUT_RESPONSE
+        except Exception as e:
+            print(f"❌ astream_response error: {e}")
+            if status is not None:
+                status["failed"] = True
+            if not streamed:
+                yield ERROR_RESPONSE
+        finally:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
 
 # Lazy Global Instance
 _brain_instance = None
 
+_llm_semaphore = None
+_llm_stats = {"in_flight": 0, "waiting": 0, "timeouts": 0}
+
+
+def _get_llm_semaphore():
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    return _llm_semaphore
+
+
+@asynccontextmanager
+async def _llm_slot():
+    """Holds one of the LLM_CONCURRENCY slots, keeping the in-flight counters."""
+    semaphore = _get_llm_semaphore()
+    _llm_stats["waiting"] += 1
+    try:
+        await semaphore.acquire()
+    finally:
+        _llm_stats["waiting"] -= 1
+    _llm_stats["in_flight"] += 1
+    try:
+        yield
+    finally:
+        _llm_stats["in_flight"] -= 1
+        semaphore.release()
+
 
 def _get_brain_instance():
     """Return a Brain instance, re-attempt initialization when a GROQ key becomes available."""
     global _brain_instance
-    groq_key = os.getenv("GROQ_API_KEY")
+    groq_key = _llm_configured()
 
     # If already initialized and healthy, return it
     if _brain_instance is not None and not getattr(_brain_instance, "_init_error", None):
@@ -175,19 +269,107 @@ def _get_brain_instance():
         return None
 
 
+def _embed_for_cache(text: str):
+    from .memory_services import _get_embedding_function
+    return _get_embedding_function().embed_query(text)
+
+# Replies reused for identical (or, in semantic mode, similar) requests
+response_cache = ResponseCache(embed=_embed_for_cache)
+
+
+def _remember_reply(user_input, chat_history, long_term_memory, resp):
+    if resp not in (FALLBACK_RESPONSE, TIMEOUT_RESPONSE, ERROR_RESPONSE):
+        response_cache.put(user_input, chat_history, long_term_memory, resp)
+
+async def _aremember_reply(user_input, chat_history, long_term_memory, resp):
+    if resp not in (FALLBACK_RESPONSE, TIMEOUT_RESPONSE, ERROR_RESPONSE):
+        await response_cache.aput(user_input, chat_history, long_term_memory, resp)
+
+
 def get_brain_response(user_input: str, chat_history: list, long_term_memory: list):
     """High-level entrypoint for other modules."""
+    cached = response_cache.get(user_input, chat_history, long_term_memory)
+    if cached is not None:
+        return cached
+
     # Go directly to the LLM
     memory_context = "\n".join([f"- {m}" for m in long_term_memory])
     inst = _get_brain_instance()
     if inst is None:
-        return "I couldn't contact the language model right now; please try again later."
+        return FALLBACK_RESPONSE
     resp = inst.generate_response(user_input, chat_history, memory_context)
     if not resp:
-        return "I couldn't contact the language model right now; please try again later."
+        return FALLBACK_RESPONSE
+    _remember_reply(user_input, chat_history, long_term_memory, resp)
+    return resp
+
+
+async def aget_brain_response(user_input: str, chat_history: list, long_term_memory: list):
+    """Async get_brain_response: waits for a concurrency slot, then awaits the model."""
+    cached = await response_cache.aget(user_input, chat_history, long_term_memory)
+    if cached is not None:
+        return cached
+
+    memory_context = "\n".join([f"- {m}" for m in long_term_memory])
+    inst = _get_brain_instance()
+    if inst is None:
+        return FALLBACK_RESPONSE
+    async with _llm_slot():
+        resp = await inst.agenerate_response(user_input, chat_history, memory_context)
+    if not resp:
+        return FALLBACK_RESPONSE
+    await _aremember_reply(user_input, chat_history, long_term_memory, resp)
     return resp
 
 
+async def stream_brain_response(user_input: str, chat_history: list, long_term_memory: list):
+    """Streaming counterpart of get_brain_response: an async iterator of text chunks."""
+    cached = await response_cache.aget(user_input, chat_history, long_term_memory)
+    if cached is not None:
+        yield cached
+        return
+
+    memory_context = "\n".join([f"- {m}" for m in long_term_memory])
+    inst = _get_brain_instance()
+    if inst is None:
+        yield FALLBACK_RESPONSE
+        return
+    chunks = []
+    status = {}
+    async with _llm_slot():
+        async for chunk in inst.astream_response(user_input, chat_history, memory_context, status=status):
+            chunks.append(chunk)
+            yield chunk
+    if not status.get("failed"):
+        await _aremember_reply(user_input, chat_history, long_term_memory, "".join(chunks))
+
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and J.A.R.V.I.S.\n"
+    "Merge the new messages into the existing summary. Keep names, preferences, decisions, "
+    "open tasks and facts the assistant may need later. Drop small talk.\n"
+    "Reply with the updated summary only, at most 200 words."
+)
+
+
+def summarize_conversation(previous_summary: str, messages: list):
+    """Folds chat messages into a rolling summary. Returns None if the LLM is unavailable."""
+    inst = _get_brain_instance()
+    if inst is None:
+        return None
+
+    transcript = "\n".join(f"{m.get('role')}: {m.get('content')}" for m in messages)
+    try:
+        response = inst.llm.invoke([
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"Existing summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}")
+        ])
+        return response.content
+    except Exception as e:
+        print(f"❌ summarize_conversation error: {e}")
+        return None
+
+
 # STATUS CHECK
 def check_status() -> dict:
     """Return a lightweight status dict describing model availability."""
@@ -212,5 +394,8 @@ def check_status() -> dict:
         "brain_init_error": getattr(_brain_instance, "_init_error", None) if _brain_instance else None,
         "llm_available": (_brain_instance is not None and getattr(_brain_instance, "_init_error", None) is None),
         "local_multimodal_available": local_ok,
+        "llm_concurrency": {"limit": LLM_CONCURRENCY, **_llm_stats},
+        "response_cache": response_cache.stats(),
+        "llm_router": _brain_instance.llm.stats() if isinstance(getattr(_brain_instance, "llm", None), llm_router.LLMRouter) else None,
         "captioner_libraries_present": captioner_libs,
     }
\ No newline at end of file
@@ -0,0 +1,201 @@
+import json
+import os
+import re
+import sys
+import hashlib
+import threading
+
+# NEAR-DUPLICATE SUPPRESSION FOR LONG-TERM MEMORY
+# Every memory gets a normalized exact hash plus a MinHash signature bucketed
+# with LSH. A new memory is only compared against the few memories sharing a
+# bucket, so the check costs the same with 10 memories or 10,000.
+# Only the fact itself is compared: the "User Mentioned:" label and greeting or
+# filler around it ("Hi Jarvis, ...", "..., remember that") are dropped. A
+# candidate is a duplicate when the new fact's word bigrams are (almost) all
+# contained in the stored one and it adds no word of its own, so "my name is
+# Tony Stark" repeats a stored fact while "... live in Malibu California" or
+# "my wife is Sarah" (vs "... Pepper") is new. Facts that mention different
+# numbers ("I am 40" / "I am 41") are never duplicates.
+
+SIMILARITY_THRESHOLD = float(os.getenv("JARVIS_MEMORY_DEDUP_THRESHOLD", "0.85"))
+# Character shingle size for general near-duplicate checks (search snippets)
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 64
+BANDS = 16  # 16 bands x 4 rows -> candidates from roughly 0.5 Jaccard upwards
+ROWS = NUM_PERMUTATIONS // BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_PUNCT_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+_LABEL_RE = re.compile(r"^user mentioned\s+")
+# Matched against normalized text (lowercase, punctuation -> spaces)
+_FILLER_PREFIX_RE = re.compile(
+    r"^(?:(?:hi|hello|hey|ok|okay|btw|by the way|fyi|jarvis|please|just so you know|"
+    r"note that|remember that|for the record)\s+)+"
+)
+_FILLER_SUFFIX_RE = re.compile(
+    r"(?:\s+(?:jarvis|please|thanks|thank you|ok|okay|remember that|remember this|"
+    r"please remember|don t forget|for future reference))+$"
+)
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def _make_permutations():
+    # Fixed seed material so signatures are stable across restarts
+    perms = []
+    for i in range(NUM_PERMUTATIONS):
+        digest = hashlib.sha1(f"jarvis-minhash-{i}".encode()).digest()
+        a = int.from_bytes(digest[:8], "little") % _MERSENNE_PRIME or 1
+        b = int.from_bytes(digest[8:16], "little") % _MERSENNE_PRIME
+        perms.append((a, b))
+    return perms
+
+_PERMUTATIONS = _make_permutations()
+
+
+def normalize(text: str) -> str:
+    text = _PUNCT_RE.sub(" ", text.lower())
+    return _SPACE_RE.sub(" ", text).strip()
+
+def shingles(normalized: str) -> set:
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+def fact_text(text: str) -> str:
+    """Normalized memory without its "User Mentioned:" label or filler around the fact."""
+    fact = _LABEL_RE.sub("", normalize(text))
+    stripped = _FILLER_SUFFIX_RE.sub("", _FILLER_PREFIX_RE.sub("", fact))
+    return stripped or fact
+
+def word_shingles(fact: str) -> set:
+    words = fact.split()
+    if len(words) < 2:
+        return {fact}
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+
+def minhash(shingle_set: set) -> tuple:
+    hashes = [_shingle_hash(s) for s in shingle_set]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def containment(a: set, b: set) -> float:
+    """Share of `a` that also appears in `b`."""
+    if not a:
+        return 1.0
+    return len(a & b) / len(a)
+
+
+class DedupIndex:
+    """Exact-hash + MinHash/LSH index over one user's memories."""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._exact = {}
+        self._buckets = {}
+        self._shingles = []
+        self._words = []
+        self._numbers = []
+        self._texts = []
+        self._lock = threading.Lock()
+
+    def _bands(self, signature: tuple):
+        for band in range(BANDS):
+            yield band, signature[band * ROWS:(band + 1) * ROWS]
+
+    def _find(self, fact: str, shingle_set: set, signature: tuple):
+        if fact in self._exact:
+            return self._texts[self._exact[fact]]
+        numbers = frozenset(_NUMBER_RE.findall(fact))
+        words = set(fact.split())
+        seen = set()
+        for key in self._bands(signature):
+            for idx in self._buckets.get(key, ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                if self._numbers[idx] != numbers or not words <= self._words[idx]:
+                    continue
+                if containment(shingle_set, self._shingles[idx]) >= self.threshold:
+                    return self._texts[idx]
+        return None
+
+    def _features(self, text: str):
+        fact = fact_text(text)
+        shingle_set = word_shingles(fact)
+        return fact, shingle_set, minhash(shingle_set)
+
+    def find_duplicate(self, text: str):
+        """Returns the stored memory `text` duplicates, or None."""
+        fact, shingle_set, signature = self._features(text)
+        with self._lock:
+            return self._find(fact, shingle_set, signature)
+
+    def add(self, text: str) -> bool:
+        """Indexes `text` unless it is a near-duplicate. Returns True if added."""
+        fact, shingle_set, signature = self._features(text)
+        with self._lock:
+            if self._find(fact, shingle_set, signature) is not None:
+                return False
+            idx = len(self._texts)
+            self._texts.append(text)
+            self._shingles.append(shingle_set)
+            self._words.append(frozenset(fact.split()))
+            self._numbers.append(frozenset(_NUMBER_RE.findall(fact)))
+            self._exact[fact] = idx
+            for key in self._bands(signature):
+                self._buckets.setdefault(key, []).append(idx)
+            return True
+
+    def __len__(self):
+        return len(self._texts)
+
+
+def dedupe(memories: list) -> list:
+    """Keeps the first of every near-duplicate group, preserving order."""
+    index = DedupIndex()
+    return [m for m in memories if index.add(m)]
+
+
+# Per-user indexes, built once per process from the stored memories
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_index(user_id: str, load_memories) -> DedupIndex:
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            index = _indexes[user_id] = DedupIndex()
+            for memory in load_memories():
+                index.add(memory)
+        return index
+
+
+if __name__ == "__main__":
+    # Usage: python -m backend.brain.memory_dedup [data/users]
+    users_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join("data", "users")
+
+    for name in sorted(os.listdir(users_dir)):
+        path = os.path.join(users_dir, name, "memory.json")
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            memories = json.load(f)
+        kept = dedupe(memories)
+        if len(kept) != len(memories):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(kept, f, indent=4)
+            os.replace(tmp_path, path)
+        print(f"🧹 {name}: {len(memories)} -> {len(kept)} memories")
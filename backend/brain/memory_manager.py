@@ -1,14 +1,26 @@
 import json
 import os
 import uuid
+from collections import deque
 from datetime import datetime
+from itertools import islice
+
+from . import chat_index, chat_log, memory_dedup, sqlite_store
+from .session_cache import SessionCache
 
 # CONFIGURATION
 DATA_DIR = "data"
 USERS_DIR = os.path.join(DATA_DIR, "users")
 
+# "json" keeps one chats.json per user, "jsonl" stores append-only segments per chat,
+# "sqlite" uses a shared WAL-mode database (see sqlite_store.py)
+STORAGE_BACKEND = os.getenv("JARVIS_STORAGE_BACKEND", "json").lower()
+
 os.makedirs(USERS_DIR, exist_ok=True)
 
+# Parsed histories of recently used chats (see session_cache.py)
+session_cache = SessionCache()
+
 # INTERNAL HELPERS
 def _sanitize_user_id(user_id: str) -> str:
     """Prevent path traversal & invalid folder names"""
@@ -26,11 +38,17 @@ def _get_chats_path(user_id: str) -> str:
 def _get_memory_path(user_id: str) -> str:
     return os.path.join(_get_user_dir(user_id), "memory.json")
 
+def _get_summary_path(user_id: str, chat_id: str) -> str:
+    safe_chat_id = _sanitize_user_id(chat_id)
+    return os.path.join(_get_user_dir(user_id), "summaries", f"{safe_chat_id}.json")
+
 def _ensure_user_files(user_id: str):
     chats_path = _get_chats_path(user_id)
     memory_path = _get_memory_path(user_id)
 
-    if not os.path.exists(chats_path):
+    if STORAGE_BACKEND == "jsonl":
+        chat_log.ensure_user(_get_user_dir(user_id))
+    elif not os.path.exists(chats_path):
         with open(chats_path, "w", encoding="utf-8") as f:
             json.dump({}, f)
 
@@ -41,29 +59,66 @@ def _ensure_user_files(user_id: str):
 # PUBLIC INIT
 def init_db(user_id: str):
     """Initialize per-user storage"""
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.init_db(user_id)
     _ensure_user_files(user_id)
 
-# CHAT FUNCTIONS
-def get_all_chats(user_id: str):
-    """Returns chat list for sidebar"""
-    _ensure_user_files(user_id)
+# CHAT INDEX
+def _scan_chat_metadata(user_id: str):
+    """Full scan of chat data; only used to (re)build a missing chat index."""
+    entries = []
+
+    if STORAGE_BACKEND == "jsonl":
+        user_dir = _get_user_dir(user_id)
+        for chat_id in chat_log.list_chat_ids(user_dir):
+            header = chat_log.read_header(user_dir, chat_id)
+            if header is None:
+                continue
+            created_at = header.get("created_at", "")
+            updated_at, count = created_at, 0
+            for msg in chat_log.iter_messages(user_dir, chat_id):
+                updated_at = msg.get("timestamp") or updated_at
+                count += 1
+            entries.append(chat_index.make_entry(
+                chat_id, header.get("title", "New Conversation"), created_at, updated_at, count
+            ))
+        return entries
 
     with open(_get_chats_path(user_id), "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    chats = []
     for chat_id, chat in data.items():
-        chats.append({
-            "chat_id": chat_id,
-            "name": chat.get("title", "New Conversation"),
-            "timestamp": chat.get("created_at", "")
-        })
+        messages = chat.get("messages", [])
+        created_at = chat.get("created_at", "")
+        updated_at = (messages[-1].get("timestamp") if messages else None) or created_at
+        entries.append(chat_index.make_entry(
+            chat_id, chat.get("title", "New Conversation"), created_at, updated_at, len(messages)
+        ))
+    return entries
+
+def _ensure_chat_index(user_id: str) -> str:
+    user_dir = _get_user_dir(user_id)
+    if not chat_index.exists(user_dir):
+        chat_index.rebuild(user_dir, _scan_chat_metadata(user_id))
+    return user_dir
+
+# CHAT FUNCTIONS
+def get_chat_page(user_id: str, limit: int = None, cursor: str = None):
+    """Returns (chats, next_cursor), newest activity first, from the chat index only"""
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.get_chat_page(user_id, limit, cursor)
+    _ensure_user_files(user_id)
+    return chat_index.read_page(_ensure_chat_index(user_id), limit, cursor)
 
-    chats.sort(key=lambda x: x["timestamp"], reverse=True)
+def get_all_chats(user_id: str):
+    """Returns chat list for sidebar"""
+    chats, _ = get_chat_page(user_id)
     return chats
 
 def create_new_chat(user_id: str):
     """Create new chat scoped to user"""
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.create_new_chat(user_id)
     _ensure_user_files(user_id)
 
     chat_id = uuid.uuid4().hex
@@ -75,90 +130,271 @@ def create_new_chat(user_id: str):
         "messages": []
     }
 
-    path = _get_chats_path(user_id)
-    with open(path, "r+", encoding="utf-8") as f:
-        data = json.load(f)
-        data[chat_id] = new_chat
-        f.seek(0)
-        json.dump(data, f, indent=4)
-        f.truncate()
+    user_dir = _ensure_chat_index(user_id)
+    if STORAGE_BACKEND == "jsonl":
+        chat_log.create_chat(user_dir, chat_id, new_chat["title"], now)
+    else:
+        path = _get_chats_path(user_id)
+        with open(path, "r+", encoding="utf-8") as f:
+            data = json.load(f)
+            data[chat_id] = new_chat
+            f.seek(0)
+            json.dump(data, f, indent=4)
+            f.truncate()
 
+    chat_index.add(user_dir, chat_index.make_entry(chat_id, new_chat["title"], now))
     return {"chat_id": chat_id, "name": new_chat["title"]}
 
 def rename_chat(chat_id: str, new_name: str, user_id: str):
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.rename_chat(chat_id, new_name, user_id)
     _ensure_user_files(user_id)
-    path = _get_chats_path(user_id)
-
-    with open(path, "r+", encoding="utf-8") as f:
-        data = json.load(f)
-        if chat_id not in data:
+    user_dir = _ensure_chat_index(user_id)
+    if STORAGE_BACKEND == "jsonl":
+        if not chat_log.rename_chat(user_dir, chat_id, new_name):
             return False
+    else:
+        path = _get_chats_path(user_id)
 
-        data[chat_id]["title"] = new_name
-        f.seek(0)
-        json.dump(data, f, indent=4)
-        f.truncate()
+        with open(path, "r+", encoding="utf-8") as f:
+            data = json.load(f)
+            if chat_id not in data:
+                return False
 
+            data[chat_id]["title"] = new_name
+            f.seek(0)
+            json.dump(data, f, indent=4)
+            f.truncate()
+
+    chat_index.rename(user_dir, chat_id, new_name)
     return True
 
-def delete_chat(chat_id: str, user_id: str):
+def _delete_chat_data(chat_id: str, user_id: str) -> bool:
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.delete_chat(chat_id, user_id)
     _ensure_user_files(user_id)
-    path = _get_chats_path(user_id)
-
-    with open(path, "r+", encoding="utf-8") as f:
-        data = json.load(f)
-        if chat_id not in data:
+    user_dir = _ensure_chat_index(user_id)
+    if STORAGE_BACKEND == "jsonl":
+        if not chat_log.delete_chat(user_dir, chat_id):
             return False
+    else:
+        path = _get_chats_path(user_id)
+
+        with open(path, "r+", encoding="utf-8") as f:
+            data = json.load(f)
+            if chat_id not in data:
+                return False
 
-        del data[chat_id]
-        f.seek(0)
-        json.dump(data, f, indent=4)
-        f.truncate()
+            del data[chat_id]
+            f.seek(0)
+            json.dump(data, f, indent=4)
+            f.truncate()
 
+    chat_index.remove(user_dir, chat_id)
+    summary_path = _get_summary_path(user_id, chat_id)
+    if os.path.exists(summary_path):
+        os.remove(summary_path)
     return True
 
-def get_chat_history(chat_id: str, user_id: str):
+def delete_chat(chat_id: str, user_id: str):
+    session_cache.invalidate(user_id, chat_id)
+    if not _delete_chat_data(chat_id, user_id):
+        return False
+    _notify(_delete_listeners, user_id, chat_id)
+    return True
+
+def _read_chat_history(chat_id: str, user_id: str):
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.get_chat_history(chat_id, user_id)
     _ensure_user_files(user_id)
+    if STORAGE_BACKEND == "jsonl":
+        return list(chat_log.iter_messages(_get_user_dir(user_id), chat_id))
 
     with open(_get_chats_path(user_id), "r", encoding="utf-8") as f:
         data = json.load(f)
 
     return data.get(chat_id, {}).get("messages", [])
 
-def append_to_chat(chat_id: str, role: str, content: str, user_id: str):
+def _write_message(chat_id: str, message: dict, user_id: str) -> bool:
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.append_to_chat(
+            chat_id, message["role"], message["content"], user_id, message["timestamp"]
+        )
     _ensure_user_files(user_id)
-    path = _get_chats_path(user_id)
+    user_dir = _ensure_chat_index(user_id)
+    if STORAGE_BACKEND == "jsonl":
+        if not chat_log.append_message(user_dir, chat_id, message):
+            return False
+    else:
+        path = _get_chats_path(user_id)
 
-    with open(path, "r+", encoding="utf-8") as f:
-        data = json.load(f)
-        if chat_id not in data:
-            return
+        with open(path, "r+", encoding="utf-8") as f:
+            data = json.load(f)
+            if chat_id not in data:
+                return False
+
+            data[chat_id]["messages"].append(message)
+
+            f.seek(0)
+            json.dump(data, f, indent=4)
+            f.truncate()
 
-        data[chat_id]["messages"].append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.utcnow().isoformat()
-        })
+    chat_index.touch(user_dir, chat_id, message["timestamp"])
+    return True
+
+def _get_session(chat_id: str, user_id: str):
+    session = session_cache.get(user_id, chat_id)
+    if session is None:
+        # Loads wait for an in-flight append_to_chat, which writes and updates the cache together
+        with session_cache.chat_lock(user_id, chat_id):
+            session = session_cache.peek(user_id, chat_id)
+            if session is None:
+                epoch = session_cache.epoch(user_id, chat_id)
+                history = _read_chat_history(chat_id, user_id)
+                session = session_cache.put(user_id, chat_id, history, epoch)
+    return session
 
-        f.seek(0)
-        json.dump(data, f, indent=4)
-        f.truncate()
+def get_chat_history(chat_id: str, user_id: str):
+    return list(_get_session(chat_id, user_id).history)
+
+def get_langchain_history(chat_id: str, user_id: str):
+    """Chat history as prebuilt LangChain messages (served from the session cache)."""
+    return list(_get_session(chat_id, user_id).messages)
+
+def iter_chat_history(chat_id: str, user_id: str):
+    """Streams a chat's messages without materializing the full list."""
+    session = session_cache.get(user_id, chat_id)
+    if session is not None:
+        return iter(list(session.history))
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.iter_chat_history(chat_id, user_id)
+    if STORAGE_BACKEND == "jsonl":
+        _ensure_user_files(user_id)
+        return chat_log.iter_messages(_get_user_dir(user_id), chat_id)
+    return iter(_read_chat_history(chat_id, user_id))
+
+def iter_chat_page(chat_id: str, user_id: str, before: int = None, after: int = None,
+                   since: str = None, limit: int = None):
+    """
+    Streams a window of a chat's history; each message carries its "index".
+    after/since return messages newer than the cursor (oldest first, up to limit).
+    before (or limit alone) returns the newest `limit` messages older than the cursor.
+    """
+    def indexed():
+        for i, msg in enumerate(iter_chat_history(chat_id, user_id)):
+            if before is not None and i >= before:
+                return
+            if after is not None and i <= after:
+                continue
+            if since is not None and msg.get("timestamp", "") <= since:
+                continue
+            yield {**msg, "index": i}
+
+    messages = indexed()
+    if limit is None:
+        return messages
+    if after is not None or since is not None:
+        return islice(messages, limit)
+    # Paging backwards: keep only the tail in a bounded buffer
+    return iter(deque(messages, maxlen=limit))
+
+def get_chat_version(chat_id: str, user_id: str):
+    """(message_count, updated_at) from the chat index, or None if the chat is unknown."""
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.get_chat_version(chat_id, user_id)
+    _ensure_user_files(user_id)
+    entry = chat_index.get(_ensure_chat_index(user_id), chat_id)
+    if entry is None:
+        return None
+    return entry.get("message_count", 0), entry.get("updated_at", "")
+
+def append_to_chat(chat_id: str, role: str, content: str, user_id: str):
+    message = {
+        "role": role,
+        "content": content,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    with session_cache.chat_lock(user_id, chat_id):
+        stored = _write_message(chat_id, message, user_id)
+        if stored:
+            session_cache.append(user_id, chat_id, message)
+    if stored:
+        _notify(_append_listeners, user_id, chat_id, message)
+
+def get_cache_stats():
+    return session_cache.stats()
+
+# CHANGE LISTENERS
+# Side indexes (rolling summaries, search) subscribe here instead of being
+# called inline, so they stay optional and off the storage code path.
+_append_listeners = []
+_delete_listeners = []
+
+def add_append_listener(fn):
+    """fn(user_id, chat_id, message) is called after a message is stored."""
+    _append_listeners.append(fn)
+
+def add_delete_listener(fn):
+    """fn(user_id, chat_id) is called after a chat is deleted."""
+    _delete_listeners.append(fn)
+
+def _notify(listeners, *args):
+    for fn in listeners:
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"⚠️ memory_manager listener failed: {e}")
+
+# ROLLING SUMMARIES
+def get_chat_summary(chat_id: str, user_id: str):
+    """Returns {"summary", "covered"} for a chat, or None. `covered` counts folded messages."""
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.get_chat_summary(chat_id, user_id)
+    path = _get_summary_path(user_id, chat_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_chat_summary(chat_id: str, summary: str, covered: int, user_id: str):
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.save_chat_summary(chat_id, summary, covered, user_id)
+    path = _get_summary_path(user_id, chat_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "covered": covered}, f)
+    os.replace(tmp_path, path)
 
 # LONG-TERM MEMORY
 def get_long_term_memory(user_id: str):
+    if STORAGE_BACKEND == "sqlite":
+        return sqlite_store.get_long_term_memory(user_id)
     _ensure_user_files(user_id)
 
     with open(_get_memory_path(user_id), "r", encoding="utf-8") as f:
         return json.load(f)
 
 def add_long_term_memory(memory_text: str, user_id: str):
-    _ensure_user_files(user_id)
-    path = _get_memory_path(user_id)
-
-    with open(path, "r+", encoding="utf-8") as f:
-        memories = json.load(f)
-        if memory_text not in memories:
+    """Stores a memory unless it near-duplicates one we already have. Returns True if stored."""
+    index = memory_dedup.get_index(user_id, lambda: get_long_term_memory(user_id))
+    if index.find_duplicate(memory_text) is not None:
+        print(f"♻️ Skipping near-duplicate memory: {memory_text}")
+        return False
+
+    if STORAGE_BACKEND == "sqlite":
+        sqlite_store.add_long_term_memory(memory_text, user_id)
+    else:
+        _ensure_user_files(user_id)
+        path = _get_memory_path(user_id)
+
+        with open(path, "r+", encoding="utf-8") as f:
+            memories = json.load(f)
             memories.append(memory_text)
             f.seek(0)
             json.dump(memories, f, indent=4)
             f.truncate()
+
+    # Indexed only once stored, so a failed write doesn't block the fact later
+    index.add(memory_text)
+    return True
@@ -1,6 +1,13 @@
 import os
+import re
+import math
+import array
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
 from langchain_chroma import Chroma
-from langchain_mistralai import MistralAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -10,28 +17,325 @@ load_dotenv()
 PERSIST_DIRECTORY = "./chroma_db"
 COLLECTION_NAME = "jarvis_long_term_memory"
 
-def _get_embedding_function():
+# "mistral" (API), "hf" (local sentence-transformers model) or "local" (hashing, no model
+# download). Defaults to mistral when a key is present so existing stores keep working.
+EMBEDDINGS_BACKEND = os.getenv(
+    "JARVIS_EMBEDDINGS", "mistral" if os.getenv("MISTRAL_API_KEY") else "local"
+).lower()
+HF_EMBEDDING_MODEL = os.getenv("JARVIS_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+MEMORY_TOP_K = int(os.getenv("JARVIS_MEMORY_TOP_K", "5"))
+
+# Open Chroma handles kept per process (LRU by user)
+VECTOR_STORE_POOL_SIZE = int(os.getenv("JARVIS_VECTOR_STORE_POOL", "32"))
+# Embedding cache: hot vectors in memory, everything on disk
+EMBEDDING_CACHE_SIZE = int(os.getenv("JARVIS_EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_PATH = os.path.join(PERSIST_DIRECTORY, "embedding_cache.sqlite")
+# Batched ingestion: flush a user's pending texts at this size or after this many seconds
+INGEST_BATCH_SIZE = int(os.getenv("JARVIS_INGEST_BATCH_SIZE", "16"))
+INGEST_FLUSH_SECONDS = float(os.getenv("JARVIS_INGEST_FLUSH_SECONDS", "2.0"))
+
+
+class HashingEmbeddings(Embeddings):
+    """Offline embeddings: hashed word unigrams + bigrams, L2-normalized.
+    No model, no network; good enough to rank short personal facts."""
+
+    _token_re = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dim
+        words = self._token_re.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            digest = hashlib.md5(feature.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embedder with a content-hash keyed cache (LRU in memory + SQLite on disk),
+    so identical texts and queries are embedded once."""
+
+    def __init__(self, inner: Embeddings, namespace: str, path: str = EMBEDDING_CACHE_PATH,
+                 max_items: int = EMBEDDING_CACHE_SIZE):
+        self.inner = inner
+        self.namespace = namespace
+        self.max_items = max_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def _key(self, text: str) -> str:
+        return self.namespace + ":" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            missing = [k for k in keys if k not in found]
+            if missing and self._db is not None:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", missing
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array.array("f", blob).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+        return found
+
+    def _store(self, items):
+        with self._lock:
+            for key, vector in items:
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, array.array("f", vector).tobytes()) for key, vector in items]
+                )
+                self._db.commit()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        # Embed each distinct missing text once, in one batch
+        todo = {k: t for k, t in zip(keys, texts) if k not in found}
+        self.hits += len(keys) - len(todo)
+        self.misses += len(todo)
+        if todo:
+            vectors = self.inner.embed_documents(list(todo.values()))
+            fresh = list(zip(todo.keys(), vectors))
+            self._store(fresh)
+            found.update(fresh)
+        return [found[k] for k in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key("query:" + text)
+        found = self._lookup([key])
+        if key in found:
+            self.hits += 1
+            return found[key]
+        self.misses += 1
+        vector = self.inner.embed_query(text)
+        self._store([(key, vector)])
+        return vector
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "memory_items": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def _create_embedding_function():
+    if EMBEDDINGS_BACKEND == "local":
+        return HashingEmbeddings()
+    if EMBEDDINGS_BACKEND == "hf":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=HF_EMBEDDING_MODEL)
+
+    from langchain_mistralai import MistralAIEmbeddings
     api_key = os.getenv("MISTRAL_API_KEY")
     if not api_key:
         raise ValueError("MISTRAL_API_KEY not found in .env file.")
     return MistralAIEmbeddings(mistral_api_key=api_key)
 
-def get_vector_store(user_id: str):
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+def _get_embedding_function():
+    """Process-wide embedder, wrapped in the embedding cache."""
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                namespace = EMBEDDINGS_BACKEND
+                if EMBEDDINGS_BACKEND == "hf":
+                    namespace += ":" + HF_EMBEDDING_MODEL
+                _embeddings = CachedEmbeddings(_create_embedding_function(), namespace)
+    return _embeddings
+
+def _safe_id(user_id: str) -> str:
+    return "".join(c for c in user_id if c.isalnum() or c in ("-", "_"))
+
+def _open_vector_store(user_id: str):
     embeddings = _get_embedding_function()
+    safe_id = _safe_id(user_id)
+    # Vectors from different embedders can't share a collection
+    suffix = "" if EMBEDDINGS_BACKEND == "mistral" else f"_{EMBEDDINGS_BACKEND}"
     return Chroma(
-        collection_name=f"jarvis_memory_{user_id}",
+        collection_name=f"jarvis_memory_{safe_id}{suffix}",
         embedding_function=embeddings,
-        persist_directory=f"./chroma_db/{user_id}"
+        persist_directory=f"./chroma_db/{safe_id}"
     )
 
+# Registry of open stores, least recently used evicted first
+_vector_stores = OrderedDict()
+_vector_stores_lock = threading.Lock()
+
+def get_vector_store(user_id: str):
+    """Returns the user's pooled Chroma handle, opening it on first use."""
+    with _vector_stores_lock:
+        store = _vector_stores.get(user_id)
+        if store is not None:
+            _vector_stores.move_to_end(user_id)
+            return store
+    # Open outside the lock; a concurrent opener just loses the race
+    store = _open_vector_store(user_id)
+    with _vector_stores_lock:
+        store = _vector_stores.setdefault(user_id, store)
+        _vector_stores.move_to_end(user_id)
+        while len(_vector_stores) > VECTOR_STORE_POOL_SIZE:
+            evicted, _ = _vector_stores.popitem(last=False)
+            _indexed_ids.pop(evicted, None)
+    return store
+
+
+def memory_id(text: str) -> str:
+    """Stable vector id for a memory, so re-adding the same text is a no-op."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
 
 def add_text_to_memory(text: str, vector_store: Chroma):
     """Saves text to the long-term database."""
-    vector_store.add_texts([text])
+    vector_store.add_texts([text], ids=[memory_id(text)])
     print(f"💾 Memory stored: {text}")
 
-def search_memory(query: str, vector_store: Chroma) -> list[str]:
-    """Finds relevant past memories."""
-    # k=2 means "find the top 2 most relevant memories"
-    docs = vector_store.similarity_search(query, k=2)
-    return [doc.page_content for doc in docs]
\ No newline at end of file
+def search_memory(query: str, vector_store: Chroma, k: int = 2) -> list[str]:
+    """The k past memories most similar to the query, best first."""
+    docs = vector_store.similarity_search(query, k=k)
+    return [doc.page_content for doc in docs]
+
+
+# Ids already known to be in each user's collection (per process)
+_indexed_ids = {}
+
+def sync_memories(user_id: str, memories: list[str], vector_store: Chroma):
+    """Embeds any memories the vector index hasn't seen yet."""
+    known = _indexed_ids.setdefault(user_id, set())
+    missing = {memory_id(m): m for m in memories if memory_id(m) not in known}
+    if not missing:
+        return
+
+    existing = set(vector_store.get(ids=list(missing))["ids"])
+    new_ids = [i for i in missing if i not in existing]
+    if new_ids:
+        vector_store.add_texts([missing[i] for i in new_ids], ids=new_ids)
+        print(f"💾 Indexed {len(new_ids)} memories for {user_id}")
+    known.update(missing)
+
+def _drop_stale(user_id: str, stale: list[str], vector_store: Chroma):
+    """Deletes vectors for memories that left memory.json (dedup, manual edits)."""
+    try:
+        vector_store.delete(ids=[memory_id(m) for m in stale])
+        _indexed_ids.get(user_id, set()).difference_update(memory_id(m) for m in stale)
+        print(f"🧹 Dropped {len(stale)} stale memories for {user_id}")
+    except Exception as e:
+        print(f"⚠️ Could not drop stale memories for {user_id}: {e}")
+
+def retrieve_relevant_memories(user_id: str, query: str, memories: list[str], k: int = MEMORY_TOP_K) -> list[str]:
+    """Top-k long-term memories for the current turn, most relevant first.
+    Only memories still in `memories` count; stale vectors found on the way are deleted."""
+    if len(memories) <= k:
+        return list(reversed(memories))
+    vector_store = get_vector_store(user_id)
+    sync_memories(user_id, memories, vector_store)
+
+    current = set(memories)
+    fetch_k = 2 * k
+    while True:
+        found = search_memory(query, vector_store, k=fetch_k)
+        relevant = [m for m in found if m in current]
+        stale = [m for m in found if m not in current]
+        if stale:
+            _drop_stale(user_id, stale, vector_store)
+        # Enough live hits, or the collection has nothing more to give
+        if len(relevant) >= k or len(found) < fetch_k:
+            return relevant[:k]
+        fetch_k *= 2
+
+
+# BATCHED INGESTION
+_pending_texts = {}
+_pending_lock = threading.Lock()
+_flush_timer = None
+
+def _flush_user(user_id: str, texts: list[str]):
+    unique = list(dict.fromkeys(texts))
+    try:
+        get_vector_store(user_id).add_texts(unique, ids=[memory_id(t) for t in unique])
+        _indexed_ids.setdefault(user_id, set()).update(memory_id(t) for t in unique)
+        print(f"💾 Stored {len(unique)} memories for {user_id}")
+    except Exception as e:
+        print(f"❌ Memory ingestion failed for {user_id}: {e}")
+
+def flush(user_id: str = None):
+    """Writes pending texts now (one user, or everyone when user_id is None)."""
+    with _pending_lock:
+        if user_id is None:
+            batches = dict(_pending_texts)
+            _pending_texts.clear()
+        else:
+            batches = {user_id: _pending_texts.pop(user_id, [])}
+    for uid, texts in batches.items():
+        if texts:
+            _flush_user(uid, texts)
+
+def _on_timer():
+    global _flush_timer
+    with _pending_lock:
+        _flush_timer = None
+    flush()
+
+def queue_text(user_id: str, text: str):
+    """Buffers a memory for batched add_texts; flushed by size or by the flush interval."""
+    global _flush_timer
+    with _pending_lock:
+        batch = _pending_texts.setdefault(user_id, [])
+        batch.append(text)
+        full = len(batch) >= INGEST_BATCH_SIZE
+        if not full and _flush_timer is None:
+            _flush_timer = threading.Timer(INGEST_FLUSH_SECONDS, _on_timer)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+    if full:
+        flush(user_id)
+
+def get_stats() -> dict:
+    return {
+        "open_vector_stores": len(_vector_stores),
+        "pending_texts": sum(len(v) for v in _pending_texts.values()),
+        "embedding_cache": _embeddings.stats() if _embeddings is not None else None,
+    }
@@ -0,0 +1,199 @@
+import os
+import re
+import asyncio
+import math
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .memory_dedup import normalize
+
+# RESPONSE CACHE FOR THE BRAIN
+# The model's reply is a function of (prompt, history, memories), so identical
+# requests can reuse an earlier answer. Entries are keyed by the normalized
+# prompt plus a hash of the context window and expire after a TTL. Optionally
+# a prompt that is merely *similar* (embedding cosine) to a cached one within
+# the same context also counts as a hit. Tool calls and prompts about things
+# that change (time, weather, news, ...) are never cached.
+
+ENABLED = os.getenv("JARVIS_RESPONSE_CACHE", "1") != "0"
+TTL_SECONDS = float(os.getenv("JARVIS_RESPONSE_CACHE_TTL", "600"))
+MAX_ENTRIES = int(os.getenv("JARVIS_RESPONSE_CACHE_SIZE", "512"))
+SEMANTIC = os.getenv("JARVIS_RESPONSE_CACHE_SEMANTIC", "0") == "1"
+SIMILARITY_THRESHOLD = float(os.getenv("JARVIS_RESPONSE_CACHE_SIMILARITY", "0.92"))
+
+_TIME_SENSITIVE_RE = re.compile(
+    r"\b(time|date|today|tonight|tomorrow|yesterday|now|current(ly)?|latest|recent|news|"
+    r"weather|forecast|temperature|price|stock|score|live|this (week|month|year))\b",
+    re.IGNORECASE,
+)
+# Device commands must reach the agent every time, not replay an old reply
+_COMMAND_RE = re.compile(
+    r"^\s*(please\s+)?(open|close|launch|start|run|quit|kill|delete|create|make|set|turn|mute|unmute)\b",
+    re.IGNORECASE,
+)
+_TOOL_REPLY_RE = re.compile(r'\{\s*"(action|query)"\s*:')
+
+
+def is_cacheable_prompt(prompt: str) -> bool:
+    return not (_TIME_SENSITIVE_RE.search(prompt) or _COMMAND_RE.search(prompt))
+
+def is_cacheable_reply(reply: str) -> bool:
+    return bool(reply) and not _TOOL_REPLY_RE.search(reply)
+
+def context_hash(history: list, memories: list) -> str:
+    digest = hashlib.sha256()
+    for message in history:
+        if isinstance(message, dict):
+            role, content = message.get("role", ""), message.get("content", "")
+        else:
+            role, content = getattr(message, "type", ""), message.content
+        digest.update(f"{role}\x1f{content}\x1e".encode("utf-8"))
+    digest.update(b"\x1d")
+    for memory in memories:
+        digest.update(f"{memory}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class _Entry:
+    __slots__ = ("reply", "context", "vector", "expires_at")
+
+    def __init__(self, reply, context, vector, expires_at):
+        self.reply = reply
+        self.context = context
+        self.vector = vector
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """TTL + LRU cache of model replies with optional embedding-similarity lookup.
+    `embed` (text -> vector) is only used when `semantic` is on. A disabled cache
+    (JARVIS_RESPONSE_CACHE=0) never stores or returns anything."""
+
+    def __init__(self, ttl: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES,
+                 semantic: bool = SEMANTIC, threshold: float = SIMILARITY_THRESHOLD, embed=None,
+                 enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.threshold = threshold
+        self._embed = embed
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _key(self, prompt: str, context: str) -> str:
+        return hashlib.sha256(f"{normalize(prompt)}\x1f{context}".encode("utf-8")).hexdigest()
+
+    def _vector(self, prompt: str):
+        if not (self.semantic and self._embed):
+            return None
+        try:
+            return self._embed(normalize(prompt))
+        except Exception as e:
+            print(f"⚠️ Response cache embedding failed: {e}")
+            return None
+
+    def _drop(self, key):
+        del self._entries[key]
+        self.expirations += 1
+
+    def get(self, prompt: str, history: list, memories: list):
+        """The cached reply for this request, or None (also None for prompts that bypass the cache)."""
+        if not (self.enabled and is_cacheable_prompt(prompt)):
+            with self._lock:
+                self.bypassed += 1
+            return None
+
+        context = context_hash(history, memories)
+        key = self._key(prompt, context)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.reply
+            if not self.semantic:
+                self.misses += 1
+                return None
+
+        vector = self._vector(prompt)
+        with self._lock:
+            if vector is not None:
+                best_key, best_score = None, self.threshold
+                for other_key, other in list(self._entries.items()):
+                    if other.expires_at <= now:
+                        self._drop(other_key)
+                        continue
+                    if other.context != context or other.vector is None:
+                        continue
+                    score = _cosine(vector, other.vector)
+                    if score >= best_score:
+                        best_key, best_score = other_key, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                    return self._entries[best_key].reply
+            self.misses += 1
+            return None
+
+    def put(self, prompt: str, history: list, memories: list, reply: str) -> bool:
+        """Stores a reply unless the prompt or the reply must not be cached."""
+        if not (self.enabled and is_cacheable_prompt(prompt) and is_cacheable_reply(reply)):
+            return False
+        context = context_hash(history, memories)
+        entry = _Entry(reply, context, self._vector(prompt), time.time() + self.ttl)
+        key = self._key(prompt, context)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    async def aget(self, prompt: str, history: list, memories: list):
+        """get() for the event loop: semantic lookups embed the prompt on a worker thread."""
+        if self.enabled and self.semantic and self._embed:
+            return await asyncio.to_thread(self.get, prompt, history, memories)
+        return self.get(prompt, history, memories)
+
+    async def aput(self, prompt: str, history: list, memories: list, reply: str) -> bool:
+        """put() for the event loop; see aget."""
+        if self.enabled and self.semantic and self._embed:
+            return await asyncio.to_thread(self.put, prompt, history, memories, reply)
+        return self.put(prompt, history, memories, reply)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.semantic_hits) / lookups, 3) if lookups else 0.0,
+        }
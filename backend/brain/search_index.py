@@ -0,0 +1,183 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from . import memory_manager as mem
+
+# FULL-TEXT SEARCH OVER CHAT HISTORY
+# One SQLite FTS5 index per user (data/users/<id>/search.db), kept current by
+# memory_manager's append/delete listeners. An index is backfilled from the
+# stored chats in a single transaction that also records completion in `meta`,
+# so an interrupted backfill is simply redone on the next open. Inserts are
+# idempotent, so a message both backfilled and reported by a listener is
+# stored once.
+
+INDEX_FILE = "search.db"
+MAX_OPEN_INDEXES = int(os.getenv("JARVIS_SEARCH_MAX_OPEN", "64"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id        INTEGER PRIMARY KEY,
+    chat_id   TEXT NOT NULL,
+    role      TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    content   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_docs_chat ON docs (chat_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    content, content='docs', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS docs_ai AFTER INSERT ON docs BEGIN
+    INSERT INTO docs_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS docs_ad AFTER DELETE ON docs BEGIN
+    INSERT INTO docs_fts (docs_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+# Created by the backfill, after any rows from an older or partial index are cleared
+UNIQUE_DOCS = "CREATE UNIQUE INDEX IF NOT EXISTS idx_docs_unique ON docs (chat_id, timestamp, role, content)"
+INSERT_DOC = "INSERT OR IGNORE INTO docs (chat_id, role, timestamp, content) VALUES (?, ?, ?, ?)"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class _UserIndex:
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.users = 0        # callers currently holding it (guarded by _open_lock)
+        self.retired = False  # evicted; closed when the last caller is done
+
+    def is_backfilled(self) -> bool:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'backfilled'").fetchone()
+        return row is not None
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_open = OrderedDict()
+_open_lock = threading.Lock()
+# Serializes opening (and backfilling) each user's index
+_user_locks = {}
+_user_locks_guard = threading.Lock()
+
+
+def _user_lock(user_id: str) -> threading.Lock:
+    with _user_locks_guard:
+        lock = _user_locks.get(user_id)
+        if lock is None:
+            lock = _user_locks[user_id] = threading.Lock()
+        return lock
+
+def _backfill(user_id: str, index: _UserIndex):
+    rows = []
+    for chat in mem.get_all_chats(user_id):
+        for msg in mem.iter_chat_history(chat["chat_id"], user_id=user_id):
+            rows.append((chat["chat_id"], msg.get("role", ""), msg.get("timestamp", ""), msg.get("content") or ""))
+    with index.lock, index.conn:
+        index.conn.execute("DELETE FROM docs")
+        index.conn.execute(UNIQUE_DOCS)
+        index.conn.executemany(INSERT_DOC, rows)
+        index.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', '1')")
+    print(f"🔍 Search index built for {user_id}: {len(rows)} messages")
+
+def _acquire(user_id: str) -> _UserIndex:
+    with _user_lock(user_id):
+        with _open_lock:
+            index = _open.get(user_id)
+            if index is not None:
+                _open.move_to_end(user_id)
+                index.users += 1
+                return index
+
+        index = _UserIndex(os.path.join(mem._get_user_dir(user_id), INDEX_FILE))
+        index.users = 1
+        try:
+            if not index.is_backfilled():
+                _backfill(user_id, index)
+        except Exception:
+            index.close()
+            raise
+
+        with _open_lock:
+            _open[user_id] = index
+            while len(_open) > MAX_OPEN_INDEXES:
+                _, evicted = _open.popitem(last=False)
+                evicted.retired = True
+                if evicted.users == 0:
+                    evicted.close()
+        return index
+
+def _release(index: _UserIndex):
+    with _open_lock:
+        index.users -= 1
+        close = index.retired and index.users == 0
+    if close:
+        index.close()
+
+@contextmanager
+def _using(user_id: str):
+    """The user's open, fully backfilled index; it is not closed while in use."""
+    index = _acquire(user_id)
+    try:
+        yield index
+    finally:
+        _release(index)
+
+
+# LISTENERS
+def index_message(user_id: str, chat_id: str, message: dict):
+    with _using(user_id) as index, index.lock, index.conn:
+        index.conn.execute(
+            INSERT_DOC,
+            (chat_id, message.get("role", ""), message.get("timestamp", ""), message.get("content") or "")
+        )
+
+def remove_chat(user_id: str, chat_id: str):
+    with _using(user_id) as index, index.lock, index.conn:
+        index.conn.execute("DELETE FROM docs WHERE chat_id = ?", (chat_id,))
+
+
+# QUERY
+def _to_match_query(query: str) -> str:
+    """Plain user text -> FTS5 query: every word required, last word as a prefix."""
+    words = _WORD_RE.findall(query)
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+def search(user_id: str, query: str, limit: int = 20) -> list:
+    """Ranked (BM25) message hits with chat ids and highlighted snippets."""
+    match = _to_match_query(query)
+    if not match:
+        return []
+    with _using(user_id) as index, index.lock:
+        rows = index.conn.execute(
+            "SELECT d.chat_id, d.role, d.timestamp, "
+            "snippet(docs_fts, 0, '[', ']', '…', 12), bm25(docs_fts) "
+            "FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid "
+            "WHERE docs_fts MATCH ? ORDER BY bm25(docs_fts) LIMIT ?",
+            (match, limit)
+        ).fetchall()
+    return [
+        {"chat_id": chat_id, "role": role, "timestamp": ts, "snippet": snippet, "score": round(-score, 4)}
+        for chat_id, role, ts, snippet, score in rows
+    ]
+
+
+mem.add_append_listener(index_message)
+mem.add_delete_listener(remove_chat)
@@ -0,0 +1,134 @@
+import os
+import math
+from collections import Counter
+
+from .memory_dedup import normalize, shingles, jaccard
+from .context_window import count_tokens
+
+# SEARCH RESULT PACKING
+# Turns Serper's JSON into the text the second LLM call is grounded on. Every
+# answer box, knowledge-graph fact and snippet becomes a passage. Passages are
+# ranked against the query with BM25 (ties keep Google's order), near-duplicates
+# are dropped, and the best ones are packed into a token budget. The result is
+# smaller and more on-topic than the first 2000 characters of everything.
+
+TOKEN_BUDGET = int(os.getenv("JARVIS_SEARCH_TOKEN_BUDGET", "400"))
+DUPLICATE_THRESHOLD = float(os.getenv("JARVIS_SEARCH_DEDUP_THRESHOLD", "0.7"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Small bonus for Google's own ranking, so it breaks ties between similar BM25 scores
+POSITION_WEIGHT = 0.3
+
+NO_RESULTS_MESSAGE = "No good Google Search Result was found"
+
+_STOPWORDS = frozenset(
+    "a an the of in on at to for is are was were be been what whats who whos when where which how "
+    "do does did and or it its this that with from by as about me my".split()
+)
+
+
+class Passage:
+    __slots__ = ("text", "title", "source", "position", "score")
+
+    def __init__(self, text, title="", source="organic", position=0):
+        self.text = text
+        self.title = title
+        self.source = source
+        self.position = position
+        self.score = 0.0
+
+    def render(self) -> str:
+        return f"- {self.title}: {self.text}" if self.title else f"- {self.text}"
+
+
+def _terms(text: str) -> list:
+    return [word for word in normalize(text).split() if word not in _STOPWORDS]
+
+def extract_passages(data: dict) -> list:
+    """All quotable pieces of a Serper response, in the order Google gave them."""
+    passages = []
+
+    def add(text, title="", source="organic"):
+        if isinstance(text, list):
+            text = " ".join(str(part) for part in text)
+        text = " ".join(str(text or "").split())
+        if text:
+            passages.append(Passage(text, title, source, len(passages)))
+
+    answer_box = data.get("answerBox") or {}
+    add(answer_box.get("answer") or answer_box.get("snippet") or answer_box.get("snippetHighlighted"),
+        answer_box.get("title", ""), "answer")
+
+    graph = data.get("knowledgeGraph") or {}
+    title = graph.get("title", "")
+    if title and graph.get("type"):
+        add(f"{title}: {graph['type']}.", source="graph")
+    add(graph.get("description"), title, "graph")
+    for attribute, value in (graph.get("attributes") or {}).items():
+        add(f"{attribute}: {value}.", title, "graph")
+
+    for result in data.get("organic") or []:
+        attributes = " ".join(f"{k}: {v}." for k, v in (result.get("attributes") or {}).items())
+        add(f"{result.get('snippet', '')} {attributes}", result.get("title", ""))
+    for story in data.get("topStories") or data.get("news") or []:
+        add(story.get("snippet") or story.get("title"), story.get("source", ""), "news")
+    for question in data.get("peopleAlsoAsk") or []:
+        add(question.get("snippet"), question.get("question", ""), "related")
+    return passages
+
+def rank(query: str, passages: list) -> list:
+    """Passages by BM25 relevance to the query; answer boxes stay on top."""
+    if not passages:
+        return []
+    query_terms = set(_terms(query))
+    docs = [Counter(_terms(f"{p.title} {p.text}")) for p in passages]
+    avg_length = sum(sum(doc.values()) for doc in docs) / len(docs) or 1.0
+    frequency = Counter(term for doc in docs for term in doc if term in query_terms)
+
+    for passage, doc in zip(passages, docs):
+        length = sum(doc.values())
+        score = 0.0
+        for term in query_terms:
+            tf = doc.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - frequency[term] + 0.5) / (frequency[term] + 0.5))
+            score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+        passage.score = score + POSITION_WEIGHT / (1 + passage.position)
+    return sorted(passages, key=lambda p: (p.source != "answer", -p.score, p.position))
+
+def dedupe(passages: list, threshold: float = DUPLICATE_THRESHOLD) -> list:
+    """Drops passages that are near-copies of a better-ranked one."""
+    kept, kept_shingles = [], []
+    for passage in passages:
+        passage_shingles = shingles(normalize(passage.text))
+        if any(jaccard(passage_shingles, other) >= threshold for other in kept_shingles):
+            continue
+        kept.append(passage)
+        kept_shingles.append(passage_shingles)
+    return kept
+
+def _shorten(line: str, budget: int) -> str:
+    words = line.split()
+    while words and count_tokens(" ".join(words) + " ...") > budget:
+        words = words[:max(1, len(words) * 3 // 4)] if len(words) > 1 else []
+    return " ".join(words) + " ..." if words else ""
+
+def pack(query: str, data: dict, budget: int = TOKEN_BUDGET) -> str:
+    """The most relevant, distinct passages for `query` within `budget` tokens."""
+    passages = dedupe(rank(query, extract_passages(data)))
+    lines, used = [], 0
+    for passage in passages:
+        line = passage.render()
+        tokens = count_tokens(line)
+        if used + tokens > budget:
+            if lines:
+                continue
+            # Even the best passage is too long: keep its beginning
+            line = _shorten(line, budget)
+            tokens = count_tokens(line)
+            if not line:
+                break
+        lines.append(line)
+        used += tokens
+    return "\n".join(lines) if lines else NO_RESULTS_MESSAGE
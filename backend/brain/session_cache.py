@@ -0,0 +1,143 @@
+import os
+import threading
+from collections import OrderedDict
+
+from langchain_core.messages import HumanMessage, AIMessage
+
+# HOT CHAT-SESSION CACHE
+# Keeps recently used chats in memory as both raw message dicts and prebuilt
+# LangChain messages, so back-to-back turns in a chat skip disk reads entirely.
+
+# Rough memory cap (characters of message content + per-message overhead)
+MAX_BYTES = int(os.getenv("JARVIS_SESSION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+MESSAGE_OVERHEAD = 256
+
+
+def to_langchain(message: dict):
+    if message.get("role") == "human":
+        return HumanMessage(content=message.get("content", ""))
+    return AIMessage(content=message.get("content", ""))
+
+def _message_size(message: dict) -> int:
+    return len(message.get("content") or "") + MESSAGE_OVERHEAD
+
+
+class _Session:
+    __slots__ = ("history", "messages", "size")
+
+    def __init__(self, history):
+        self.history = list(history)
+        self.messages = [to_langchain(m) for m in self.history]
+        self.size = sum(_message_size(m) for m in self.history)
+
+
+class SessionCache:
+    """Size-bounded LRU of chat sessions keyed by (user_id, chat_id)."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped on every write so a slow load can't cache a stale history
+        self._epochs = {}
+        # Per-chat locks: a write and its write-through, or a load and its put,
+        # happen as one step so a load can't cache a message that append then adds again
+        self._chat_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._sessions:
+            _, session = self._sessions.popitem(last=False)
+            self._bytes -= session.size
+            self.evictions += 1
+
+    def get(self, user_id: str, chat_id: str):
+        """Returns the cached session or None, counting hits and misses."""
+        key = (user_id, chat_id)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(key)
+            self.hits += 1
+            return session
+
+    def peek(self, user_id: str, chat_id: str):
+        """Like get, without touching the LRU order or the counters."""
+        with self._lock:
+            return self._sessions.get((user_id, chat_id))
+
+    def chat_lock(self, user_id: str, chat_id: str) -> threading.Lock:
+        with self._lock:
+            lock = self._chat_locks.get((user_id, chat_id))
+            if lock is None:
+                lock = self._chat_locks[(user_id, chat_id)] = threading.Lock()
+            return lock
+
+    def epoch(self, user_id: str, chat_id: str) -> int:
+        with self._lock:
+            return self._epochs.get((user_id, chat_id), 0)
+
+    def put(self, user_id: str, chat_id: str, history, epoch: int = None):
+        """Caches a freshly loaded history; skipped if a write raced the load."""
+        session = _Session(history)
+        if session.size > self.max_bytes:
+            return session
+        key = (user_id, chat_id)
+        with self._lock:
+            if epoch is not None and self._epochs.get(key, 0) != epoch:
+                return session
+            old = self._sessions.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._sessions[key] = session
+            self._bytes += session.size
+            self._evict()
+        return session
+
+    def append(self, user_id: str, chat_id: str, message: dict):
+        """Write-through for a message that was already persisted (under chat_lock)."""
+        key = (user_id, chat_id)
+        with self._lock:
+            self._epochs[key] = self._epochs.get(key, 0) + 1
+            session = self._sessions.get(key)
+            if session is None:
+                return
+            session.history.append(message)
+            session.messages.append(to_langchain(message))
+            size = _message_size(message)
+            session.size += size
+            self._bytes += size
+            self._sessions.move_to_end(key)
+            self._evict()
+
+    def invalidate(self, user_id: str, chat_id: str):
+        key = (user_id, chat_id)
+        with self._lock:
+            self._epochs[key] = self._epochs.get(key, 0) + 1
+            session = self._sessions.pop(key, None)
+            if session is not None:
+                self._bytes -= session.size
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self._epochs.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
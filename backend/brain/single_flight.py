@@ -0,0 +1,136 @@
+import asyncio
+
+# SINGLE-FLIGHT COALESCING
+# Identical requests that arrive while the first is still running attach to it
+# instead of starting their own upstream call (retries, several open tabs,
+# double-clicks). Keys are request fingerprints chosen by the caller.
+#
+# Cancellation: a caller that goes away only detaches itself; the shared call is
+# cancelled when its last caller is gone. Everything runs on the event loop, so
+# no locking is needed.
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class _SharedStream:
+    __slots__ = ("items", "done", "error", "changed", "subscribers", "task")
+
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error = None
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+        self.task = None
+
+    def notify(self):
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._streams = {}
+        self.calls = 0
+        self.upstream = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def _finished(self, key, call, task):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.failed += 1
+
+    async def run(self, key, factory):
+        """Awaits factory() once per key at a time; concurrent callers share the result."""
+        self.calls += 1
+        call = self._calls.get(key)
+        if call is None:
+            self.upstream += 1
+            call = self._calls[key] = _Call(asyncio.ensure_future(factory()))
+            call.task.add_done_callback(lambda task, key=key, call=call: self._finished(key, call, task))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+                self.cancelled += 1
+            raise
+        finally:
+            call.waiters -= 1
+
+    async def _pump(self, key, shared, factory):
+        try:
+            async for item in factory():
+                shared.items.append(item)
+                shared.notify()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            shared.error = e
+            self.failed += 1
+        finally:
+            shared.done = True
+            shared.notify()
+            if self._streams.get(key) is shared:
+                del self._streams[key]
+
+    async def stream(self, key, factory):
+        """Async-iterates factory() once per key at a time. Later callers first replay
+        what was already produced, then follow along live."""
+        self.calls += 1
+        shared = self._streams.get(key)
+        if shared is None:
+            self.upstream += 1
+            shared = self._streams[key] = _SharedStream()
+            shared.task = asyncio.ensure_future(self._pump(key, shared, factory))
+        else:
+            self.coalesced += 1
+
+        shared.subscribers += 1
+        index = 0
+        try:
+            while True:
+                changed = shared.changed
+                if index < len(shared.items):
+                    index += 1
+                    yield shared.items[index - 1]
+                    continue
+                if shared.done:
+                    if shared.error is not None:
+                        raise shared.error
+                    if shared.task.cancelled():
+                        raise asyncio.CancelledError()
+                    return
+                await changed.wait()
+        finally:
+            shared.subscribers -= 1
+            if shared.subscribers == 0 and not shared.done:
+                shared.task.cancel()
+                self.cancelled += 1
+                if self._streams.get(key) is shared:
+                    del self._streams[key]
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "upstream": self.upstream,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "in_flight": len(self._calls) + len(self._streams),
+        }
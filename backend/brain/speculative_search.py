@@ -0,0 +1,165 @@
+import os
+import re
+import asyncio
+from collections import defaultdict
+
+from .memory_dedup import normalize
+
+# SPECULATIVE WEB SEARCH
+# A search-worthy question costs three serial round trips: LLM -> Serper -> LLM.
+# A cheap keyword/recency score guesses up front whether the model will ask for
+# a search; if it clears the threshold, the search for the user's own words
+# starts alongside the first LLM call. When the model's {"query": ...} is the
+# same or a close match, that result is used; otherwise it is thrown away.
+# Outcomes are counted per score bucket so the threshold can be tuned from /status.
+
+ENABLED = os.getenv("JARVIS_SPECULATIVE_SEARCH", "1") != "0"
+THRESHOLD = float(os.getenv("JARVIS_SPECULATIVE_THRESHOLD", "0.6"))
+# Content-word overlap (Jaccard) between the guessed and the model's query
+MATCH_THRESHOLD = float(os.getenv("JARVIS_SPECULATIVE_MATCH", "0.5"))
+
+# (pattern, weight): summed and clamped to [0, 1]
+_SIGNALS = [
+    # Explicit requests to search
+    (re.compile(r"\b(search|google|look up|find out|browse)\b"), 0.8),
+    # Things that change: the model can't know them from training data
+    (re.compile(r"\b(news|headlines?|weather|forecast|temperature|stock|shares?|price|rate|score|"
+                r"results?|standings|election|released?|launch(ed)?|trending)\b"), 0.5),
+    (re.compile(r"\b(today|tonight|tomorrow|yesterday|now|current(ly)?|latest|recent(ly)?|live|"
+                r"upcoming|this (week|month|year|season)|20\d\d)\b"), 0.4),
+    # Factual questions about a named thing
+    (re.compile(r"^(who|what|when|where|which|how (much|many|old|tall|far))\b"), 0.2),
+    (re.compile(r"\b(ceo|president|prime minister|capital|population|founder|owner|winner)\b"), 0.2),
+]
+# Conversation, device control and writing tasks never need a search
+_NEGATIVE = re.compile(
+    r"\b(my name|i am|i'm|i feel|you are|are you|your name|joke|poem|story|write|code|explain|"
+    r"translate|summari[sz]e|remind me|open|close|volume|mute)\b"
+)
+_LEADING_RE = re.compile(
+    r"^(?:(?:hey\s+)?jarvis\s*)?(?:(?:please|can you|could you|would you|tell me|do you know)\s+)*"
+    r"(?:(?:search|google|look up|find out|browse)(?:\s+(?:the web|online|google))?(?:\s+(?:for|about))?\s+)?"
+)
+_STOPWORDS = frozenset(
+    "a an the of in on at to for is are was were be been what whats who whos when where which how "
+    "do does did me about and or please tell can could you i my it its this that with from by".split()
+)
+
+
+def score(text: str) -> float:
+    """0..1 guess that the model will answer `text` with a web search."""
+    lowered = text.lower().strip()
+    if len(lowered) < 4 or _NEGATIVE.search(lowered):
+        return 0.0
+    total = sum(weight for pattern, weight in _SIGNALS if pattern.search(lowered))
+    return min(1.0, total)
+
+
+def guess_query(text: str) -> str:
+    """The user's question trimmed down to something a search engine wants."""
+    return _LEADING_RE.sub("", normalize(text)).strip() or normalize(text)
+
+
+def _terms(query: str) -> set:
+    return {word for word in normalize(query).split() if word not in _STOPWORDS}
+
+
+def query_similarity(a: str, b: str) -> float:
+    terms_a, terms_b = _terms(a), _terms(b)
+    if not terms_a or not terms_b:
+        return 1.0 if normalize(a) == normalize(b) else 0.0
+    return len(terms_a & terms_b) / len(terms_a | terms_b)
+
+
+def _bucket(value: float) -> str:
+    return f"{int(value * 10) / 10:.1f}"
+
+
+class Speculation:
+    """One turn's speculative search (inactive when the score was too low)."""
+
+    def __init__(self, speculator, search, query=None, score=0.0):
+        self._speculator = speculator
+        self._search = search
+        self.query = query
+        self.score = score
+        self.task = None
+        self.settled = False
+        if query is not None:
+            self.task = asyncio.ensure_future(search(query))
+            # A discarded search that failed must not log "exception never retrieved"
+            self.task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def results_for(self, query: str):
+        """Search results for the model's query, reusing the speculative search when it matches."""
+        if self.settled:
+            return await self._search(query)
+        self.settled = True
+        if self.task is None:
+            self._speculator.record(self.score, "missed")
+            return await self._search(query)
+        if query_similarity(self.query, query) < MATCH_THRESHOLD:
+            self.task.cancel()
+            self._speculator.record(self.score, "mismatched")
+            return await self._search(query)
+        try:
+            result = await self.task
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Speculative search failed, searching again: {e}")
+            self._speculator.record(self.score, "mismatched")
+            return await self._search(query)
+        self._speculator.record(self.score, "used")
+        print(f"⚡ Reused speculative search for: {query}")
+        return result
+
+    def close(self):
+        """The turn is over: a search nobody asked for is cancelled and counted as wasted."""
+        if self.settled:
+            return
+        self.settled = True
+        if self.task is not None:
+            self.task.cancel()
+            self._speculator.record(self.score, "wasted")
+        else:
+            self._speculator.record(self.score, "skipped")
+
+
+class Speculator:
+    def __init__(self, threshold: float = THRESHOLD, enabled: bool = ENABLED):
+        self.threshold = threshold
+        self.enabled = enabled
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+
+    def start(self, text: str, search) -> Speculation:
+        """Starts `search(query)` now if `text` looks search-worthy."""
+        value = score(text)
+        if not self.enabled or value < self.threshold:
+            return Speculation(self, search, score=value)
+        query = guess_query(text)
+        print(f"🔮 Speculative search ({value:.2f}) for: {query}")
+        return Speculation(self, search, query=query, score=value)
+
+    def record(self, value: float, outcome: str):
+        self.outcomes[_bucket(value)][outcome] += 1
+
+    def stats(self) -> dict:
+        totals = defaultdict(int)
+        for counts in self.outcomes.values():
+            for outcome, count in counts.items():
+                totals[outcome] += count
+        started = totals["used"] + totals["mismatched"] + totals["wasted"]
+        needed = totals["used"] + totals["mismatched"] + totals["missed"]
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "started": started,
+            "used": totals["used"],
+            "mismatched": totals["mismatched"],
+            "wasted": totals["wasted"],
+            "missed": totals["missed"],
+            "precision": round(totals["used"] / started, 3) if started else None,
+            "recall": round(totals["used"] / needed, 3) if needed else None,
+            "by_score": {bucket: dict(counts) for bucket, counts in sorted(self.outcomes.items())},
+        }
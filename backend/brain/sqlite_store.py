@@ -0,0 +1,313 @@
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# SQLITE STORAGE ENGINE
+# Same API surface as memory_manager, backed by a single WAL-mode database.
+# Enable with JARVIS_STORAGE_BACKEND=sqlite.
+
+DB_PATH = os.getenv("JARVIS_SQLITE_PATH", os.path.join("data", "jarvis.db"))
+POOL_SIZE = int(os.getenv("JARVIS_SQLITE_POOL_SIZE", "8"))
+# How long a caller waits for a free connection before giving up
+POOL_TIMEOUT_SECONDS = float(os.getenv("JARVIS_SQLITE_POOL_TIMEOUT", "10"))
+BUSY_TIMEOUT_MS = 5000
+# Rows per query when streaming a chat's history
+HISTORY_PAGE_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    user_id    TEXT NOT NULL,
+    chat_id    TEXT NOT NULL,
+    title      TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, chat_id)
+);
+CREATE INDEX IF NOT EXISTS idx_chats_recency
+    ON chats (user_id, updated_at DESC, chat_id DESC);
+CREATE TABLE IF NOT EXISTS messages (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id   TEXT NOT NULL,
+    chat_id   TEXT NOT NULL,
+    role      TEXT NOT NULL,
+    content   TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_chat
+    ON messages (user_id, chat_id, timestamp);
+CREATE TABLE IF NOT EXISTS summaries (
+    user_id TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    covered INTEGER NOT NULL,
+    PRIMARY KEY (user_id, chat_id)
+);
+CREATE TABLE IF NOT EXISTS memories (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id    TEXT NOT NULL,
+    text       TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (user_id, text)
+);
+"""
+
+
+class PoolTimeout(RuntimeError):
+    """No pooled connection became free in time."""
+
+
+class ConnectionPool:
+    """A small fixed-size pool of WAL-mode connections shared across threads."""
+
+    def __init__(self, path: str, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT_SECONDS):
+        self.path = path
+        self._idle = queue.Queue(maxsize=size)
+        self._created = 0
+        self._size = size
+        self._timeout = timeout
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # isolation_level=None -> we issue BEGIN/COMMIT ourselves
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self._size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                conn = self._connect()
+            else:
+                try:
+                    conn = self._idle.get(timeout=self._timeout)
+                except queue.Empty:
+                    raise PoolTimeout(
+                        f"all {self._size} SQLite connections busy for {self._timeout}s"
+                    ) from None
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction; takes the write lock up front to avoid upgrade deadlocks."""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+
+# PUBLIC INIT
+def init_db(user_id: str = None):
+    """Creates the schema. Storage is shared, so user_id is accepted but unused."""
+    get_pool()
+
+
+# CHAT FUNCTIONS
+def get_chat_page(user_id: str, limit: int = None, cursor: str = None):
+    """Returns (chats, next_cursor), newest activity first, using idx_chats_recency."""
+    query = (
+        "SELECT chat_id, title, created_at, updated_at, message_count FROM chats "
+        "WHERE user_id = ?"
+    )
+    params = [user_id]
+    if cursor:
+        updated_at, _, chat_id = cursor.partition("|")
+        query += " AND (updated_at, chat_id) < (?, ?)"
+        params += [updated_at, chat_id]
+    query += " ORDER BY updated_at DESC, chat_id DESC"
+    if limit is not None:
+        # Fetch one extra row to know whether another page exists
+        query += " LIMIT ?"
+        params.append(limit + 1)
+
+    with get_pool().connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+
+    chats = [
+        {
+            "chat_id": r["chat_id"],
+            "name": r["title"],
+            "timestamp": r["created_at"],
+            "updated_at": r["updated_at"],
+            "message_count": r["message_count"]
+        }
+        for r in rows
+    ]
+    if limit is None or len(chats) <= limit:
+        return chats, None
+    chats = chats[:limit]
+    return chats, f"{chats[-1]['updated_at']}|{chats[-1]['chat_id']}"
+
+def get_all_chats(user_id: str):
+    chats, _ = get_chat_page(user_id)
+    return chats
+
+def get_chat_version(chat_id: str, user_id: str):
+    """(message_count, updated_at) for a chat, or None if it doesn't exist."""
+    with get_pool().connection() as conn:
+        row = conn.execute(
+            "SELECT message_count, updated_at FROM chats WHERE user_id = ? AND chat_id = ?",
+            (user_id, chat_id)
+        ).fetchone()
+    return (row["message_count"], row["updated_at"]) if row else None
+
+def create_new_chat(user_id: str):
+    chat_id = uuid.uuid4().hex
+    title = "New Conversation"
+    now = datetime.utcnow().isoformat()
+    with get_pool().transaction() as conn:
+        conn.execute(
+            "INSERT INTO chats (user_id, chat_id, title, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (user_id, chat_id, title, now, now)
+        )
+    return {"chat_id": chat_id, "name": title}
+
+def rename_chat(chat_id: str, new_name: str, user_id: str):
+    with get_pool().transaction() as conn:
+        cur = conn.execute(
+            "UPDATE chats SET title = ? WHERE user_id = ? AND chat_id = ?",
+            (new_name, user_id, chat_id)
+        )
+    return cur.rowcount > 0
+
+def delete_chat(chat_id: str, user_id: str):
+    with get_pool().transaction() as conn:
+        cur = conn.execute(
+            "DELETE FROM chats WHERE user_id = ? AND chat_id = ?", (user_id, chat_id)
+        )
+        conn.execute(
+            "DELETE FROM messages WHERE user_id = ? AND chat_id = ?", (user_id, chat_id)
+        )
+        conn.execute(
+            "DELETE FROM summaries WHERE user_id = ? AND chat_id = ?", (user_id, chat_id)
+        )
+    return cur.rowcount > 0
+
+def iter_chat_history(chat_id: str, user_id: str):
+    """Streams messages in order, one page per query. No connection is held while
+    the caller consumes rows, so slow readers can't starve the pool."""
+    after = None
+    while True:
+        query = (
+            "SELECT id, role, content, timestamp FROM messages "
+            "WHERE user_id = ? AND chat_id = ?"
+        )
+        params = [user_id, chat_id]
+        if after is not None:
+            query += " AND (timestamp, id) > (?, ?)"
+            params += list(after)
+        query += " ORDER BY timestamp, id LIMIT ?"
+        params.append(HISTORY_PAGE_SIZE)
+
+        with get_pool().connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        for r in rows:
+            yield {"role": r["role"], "content": r["content"], "timestamp": r["timestamp"]}
+        if len(rows) < HISTORY_PAGE_SIZE:
+            return
+        after = (rows[-1]["timestamp"], rows[-1]["id"])
+
+def get_chat_history(chat_id: str, user_id: str):
+    return list(iter_chat_history(chat_id, user_id))
+
+def append_to_chat(chat_id: str, role: str, content: str, user_id: str, timestamp: str = None):
+    timestamp = timestamp or datetime.utcnow().isoformat()
+    with get_pool().transaction() as conn:
+        # Only append to chats that exist, matching the JSON backend
+        cur = conn.execute(
+            "INSERT INTO messages (user_id, chat_id, role, content, timestamp) "
+            "SELECT ?, ?, ?, ?, ? WHERE EXISTS "
+            "(SELECT 1 FROM chats WHERE user_id = ? AND chat_id = ?)",
+            (user_id, chat_id, role, content, timestamp, user_id, chat_id)
+        )
+        if cur.rowcount:
+            conn.execute(
+                "UPDATE chats SET updated_at = ?, message_count = message_count + 1 "
+                "WHERE user_id = ? AND chat_id = ?",
+                (timestamp, user_id, chat_id)
+            )
+    return cur.rowcount > 0
+
+
+# ROLLING SUMMARIES
+def get_chat_summary(chat_id: str, user_id: str):
+    with get_pool().connection() as conn:
+        row = conn.execute(
+            "SELECT summary, covered FROM summaries WHERE user_id = ? AND chat_id = ?",
+            (user_id, chat_id)
+        ).fetchone()
+    return {"summary": row["summary"], "covered": row["covered"]} if row else None
+
+def save_chat_summary(chat_id: str, summary: str, covered: int, user_id: str):
+    with get_pool().transaction() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO summaries (user_id, chat_id, summary, covered) "
+            "VALUES (?, ?, ?, ?)",
+            (user_id, chat_id, summary, covered)
+        )
+
+
+# LONG-TERM MEMORY
+def get_long_term_memory(user_id: str):
+    with get_pool().connection() as conn:
+        rows = conn.execute(
+            "SELECT text FROM memories WHERE user_id = ? ORDER BY id", (user_id,)
+        ).fetchall()
+    return [r["text"] for r in rows]
+
+def add_long_term_memory(memory_text: str, user_id: str):
+    with get_pool().transaction() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO memories (user_id, text, created_at) VALUES (?, ?, ?)",
+            (user_id, memory_text, datetime.utcnow().isoformat())
+        )
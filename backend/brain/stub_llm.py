@@ -0,0 +1,59 @@
+import os
+import re
+import asyncio
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+# OFFLINE STAND-IN FOR THE CHAT MODEL
+# Selected with JARVIS_LLM_BACKEND=stub, or as the "stub" provider of the LLM
+# router. Speaks the same invoke/ainvoke/stream/astream interface as ChatGroq,
+# so the API (including streaming) can be run and tested without a network or
+# an API key.
+
+STUB_RESPONSE = os.getenv("JARVIS_STUB_RESPONSE", "")
+STUB_TOKEN_DELAY = float(os.getenv("JARVIS_STUB_TOKEN_DELAY", "0"))
+# Simulated time before the reply (or its first token) on the async paths
+STUB_LATENCY = float(os.getenv("JARVIS_STUB_LATENCY", "0"))
+
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+class StubChatModel:
+    """Answers with a fixed reply, or echoes the last user message."""
+
+    def __init__(self, response: str = STUB_RESPONSE, token_delay: float = STUB_TOKEN_DELAY,
+                 latency: float = STUB_LATENCY):
+        self.response = response
+        self.token_delay = token_delay
+        self.latency = latency
+        self.calls = 0
+
+    def _reply(self, messages) -> str:
+        self.calls += 1
+        if self.response:
+            return self.response
+        last = messages[-1] if messages else None
+        return f"You said: {getattr(last, 'content', '')}"
+
+    def _tokens(self, text: str):
+        return _TOKEN_RE.findall(text)
+
+    def invoke(self, messages, **kwargs):
+        return AIMessage(content=self._reply(messages))
+
+    async def ainvoke(self, messages, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.invoke(messages)
+
+    def stream(self, messages, **kwargs):
+        for token in self._tokens(self._reply(messages)):
+            yield AIMessageChunk(content=token)
+
+    async def astream(self, messages, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for token in self._tokens(self._reply(messages)):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield AIMessageChunk(content=token)
@@ -0,0 +1,78 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import memory_manager as mem
+
+# ROLLING CONVERSATION SUMMARIES
+# After a message is stored, a background worker folds everything except the
+# newest KEEP_RECENT messages into a per-chat summary. Prompts then carry
+# summary + recent tail, so their size stays flat however long a chat gets.
+
+# Fold once this many messages sit outside the summary...
+TRIGGER_MESSAGES = int(os.getenv("JARVIS_SUMMARY_TRIGGER", "40"))
+# ...and always leave this many recent messages verbatim
+KEEP_RECENT = int(os.getenv("JARVIS_SUMMARY_KEEP_RECENT", "20"))
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+_pending = set()
+_pending_lock = threading.Lock()
+_summarize_fn = None
+
+
+def _default_summarize(previous_summary: str, messages: list) -> str:
+    from . import llm_services
+    summary = llm_services.summarize_conversation(previous_summary, messages)
+    if summary is None:
+        raise RuntimeError("language model unavailable")
+    return summary
+
+def set_summarizer(fn):
+    """Override how summaries are produced: fn(previous_summary, messages) -> str.
+    Pass None to restore the LLM-backed default. Tests use this to stay offline."""
+    global _summarize_fn
+    _summarize_fn = fn
+
+def compact_chat(chat_id: str, user_id: str) -> bool:
+    """Folds old turns into the stored summary if enough have piled up."""
+    history = mem.get_chat_history(chat_id, user_id=user_id)
+    record = mem.get_chat_summary(chat_id, user_id=user_id) or {"summary": "", "covered": 0}
+    covered = record["covered"]
+
+    if len(history) - covered < TRIGGER_MESSAGES:
+        return False
+
+    fold_until = len(history) - KEEP_RECENT
+    summarize = _summarize_fn or _default_summarize
+    summary = summarize(record["summary"], history[covered:fold_until])
+    mem.save_chat_summary(chat_id, summary, fold_until, user_id=user_id)
+    print(f"🗜️ Summarized {fold_until - covered} messages of chat {chat_id}")
+    return True
+
+def _run(chat_id: str, user_id: str):
+    try:
+        compact_chat(chat_id, user_id)
+    except Exception as e:
+        print(f"⚠️ Summary compaction failed for {chat_id}: {e}")
+    finally:
+        with _pending_lock:
+            _pending.discard((user_id, chat_id))
+
+def schedule(user_id: str, chat_id: str, message: dict = None):
+    """Queues a compaction check; at most one is pending per chat."""
+    key = (user_id, chat_id)
+    with _pending_lock:
+        if key in _pending:
+            return None
+        _pending.add(key)
+    return _executor.submit(_run, chat_id, user_id)
+
+def prompt_history(chat_id: str, user_id: str, history: list):
+    """Splits a chat into (summary_text, recent_tail) for prompt building."""
+    record = mem.get_chat_summary(chat_id, user_id=user_id)
+    if not record or not record.get("summary"):
+        return "", history
+    return record["summary"], history[record["covered"]:]
+
+
+mem.add_append_listener(schedule)
@@ -0,0 +1,90 @@
+import json
+
+# INCREMENTAL TOOL-CALL DETECTION
+# The model asks for a tool by emitting a JSON object ({"query": ...} or
+# {"action": ...}). ToolCallDetector reads the reply as it streams, tracking
+# brace depth while skipping braces inside JSON strings, and reports the tool
+# call the moment its closing brace arrives so the caller can stop generating.
+
+TOOL_KEYS = ("action", "query")
+
+
+def is_tool_call(obj) -> bool:
+    return isinstance(obj, dict) and any(key in obj for key in TOOL_KEYS)
+
+
+class JsonObjectScanner:
+    """Finds balanced top-level {...} spans in text fed in pieces."""
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def in_object(self) -> bool:
+        return self._depth > 0
+
+    def feed(self, text: str):
+        """Yields every top-level object text that closes within `text`."""
+        for ch in text:
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._buffer = [ch]
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    yield "".join(self._buffer)
+                    self._buffer = []
+
+
+class ToolCallDetector:
+    """feed() chunks of a streaming reply; returns the tool call dict once one is complete."""
+
+    def __init__(self):
+        self._scanner = JsonObjectScanner()
+        self.tool_call = None
+
+    @property
+    def in_object(self) -> bool:
+        return self._scanner.in_object
+
+    def feed(self, chunk: str):
+        if self.tool_call is not None:
+            return self.tool_call
+        for candidate in self._scanner.feed(chunk):
+            try:
+                obj = json.loads(candidate)
+            except ValueError:
+                continue
+            if is_tool_call(obj):
+                self.tool_call = obj
+                return obj
+        return None
+
+
+def first_json_object(text: str):
+    """Text of the first balanced {...} in `text` (string-aware), or None."""
+    for candidate in JsonObjectScanner().feed(text):
+        return candidate
+    return None
+
+def find_tool_call(text: str):
+    """The first tool call object anywhere in a finished reply, or None."""
+    return ToolCallDetector().feed(text)
@@ -1,43 +1,276 @@
 import os
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+from collections import OrderedDict
+import httpx
 from dotenv import load_dotenv
-from langchain_community.utilities import GoogleSerperAPIWrapper
-from langchain_core.tools import Tool
+
+from .memory_dedup import normalize
+from . import search_results
 
 # Load environment variables explicitly
 load_dotenv()
 
-def get_search_tool():
-    """
-    Returns the Google Serper search tool.
-    Requires SERPER_API_KEY in the .env file.
-    """
+# SEARCH RESULT CACHE
+# Results are cached by normalized query ("Weather in Pune?" == "weather in pune")
+# with a TTL that depends on how fast the answer goes stale: news and live data
+# expire in minutes, encyclopedic facts last a day. Least recently used entries
+# are evicted past the size limit. Set JARVIS_SEARCH_CACHE_FILE to keep the
+# cache across restarts; the file is rewritten in the background at most once
+# per JARVIS_SEARCH_CACHE_SAVE_SECONDS, and on shutdown.
+CACHE_ENABLED = os.getenv("JARVIS_SEARCH_CACHE", "1") != "0"
+CACHE_SIZE = int(os.getenv("JARVIS_SEARCH_CACHE_SIZE", "512"))
+CACHE_FILE = os.getenv("JARVIS_SEARCH_CACHE_FILE", "")
+CACHE_SAVE_SECONDS = float(os.getenv("JARVIS_SEARCH_CACHE_SAVE_SECONDS", "5"))
+TTL_SECONDS = {
+    "news": float(os.getenv("JARVIS_SEARCH_TTL_NEWS", "300")),
+    "default": float(os.getenv("JARVIS_SEARCH_TTL", "3600")),
+    "facts": float(os.getenv("JARVIS_SEARCH_TTL_FACTS", "86400")),
+}
+
+_NEWS_RE = re.compile(
+    r"\b(news|headlines?|breaking|today|tonight|tomorrow|yesterday|now|current(ly)?|latest|recent|live|"
+    r"weather|forecast|temperature|stock|shares?|price|rate|score|standings|election|trending|"
+    r"this (week|month|year|season))\b"
+)
+_FACTS_RE = re.compile(
+    r"^(who (is|was)|what (is|are|was|were)|when (was|did)|where (is|was)|define|definition|meaning)\b|"
+    r"\b(capital|population|born|founded|invented|discovered|history of|height of|distance)\b"
+)
+
+
+def normalize_query(query: str) -> str:
+    return normalize(query)
+
+def query_class(query: str) -> str:
+    """'news' (goes stale fast), 'facts' (rarely changes) or 'default'."""
+    normalized = normalize_query(query)
+    if _NEWS_RE.search(normalized):
+        return "news"
+    if _FACTS_RE.search(normalized):
+        return "facts"
+    return "default"
+
+
+class SearchCache:
+    """TTL + LRU map of normalized query -> result text, optionally mirrored to a JSON file.
+    Changes mark the cache dirty; a timer thread writes the file, so put() never does file I/O."""
+
+    def __init__(self, max_entries: int = CACHE_SIZE, ttls: dict = None, path: str = CACHE_FILE,
+                 save_interval: float = CACHE_SAVE_SECONDS):
+        self.max_entries = max_entries
+        self.ttls = dict(TTL_SECONDS, **(ttls or {}))
+        self.path = path
+        self.save_interval = save_interval
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one writer of the file at a time
+        self._dirty = False
+        self._save_timer = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable search cache {self.path}: {e}")
+            return
+        now = time.time()
+        for key, expires_at, result in stored[-self.max_entries:]:
+            if expires_at > now:
+                self._entries[key] = (expires_at, result)
+
+    def _mark_dirty(self):
+        """Schedules a background save. Caller holds the lock."""
+        if not self.path:
+            return
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_interval, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Atomically rewrites the cache file (temp file + rename) if anything changed."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            snapshot = [[key, expires_at, result] for key, (expires_at, result) in self._entries.items()]
+
+        with self._save_lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"⚠️ Could not save search cache: {e}")
+
+    def get(self, query: str):
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, query: str, result: str):
+        key = normalize_query(query)
+        expires_at = time.time() + self.ttls[query_class(query)]
+        with self._lock:
+            self._entries[key] = (expires_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._mark_dirty()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._mark_dirty()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "persistent": bool(self.path),
+            "unsaved": self._dirty,
+        }
+
+
+search_cache = SearchCache()
+
+DISABLED_MESSAGE = "System Error: Web Search is disabled because the SERPER_API_KEY is missing."
+
+
+# ASYNC SERPER CLIENT
+# One pooled keep-alive httpx client per event loop, strict timeouts, at most
+# SEARCH_CONCURRENCY requests in flight, and retries with jittered exponential
+# backoff on timeouts, connection errors, 429 and 5xx. JARVIS_SERPER_URL points
+# it at another server (e.g. a local fake in tests).
+SERPER_URL = os.getenv("JARVIS_SERPER_URL", "https://google.serper.dev").rstrip("/")
+SEARCH_RESULTS = 5
+SEARCH_CONCURRENCY = int(os.getenv("JARVIS_SEARCH_CONCURRENCY", "4"))
+CONNECT_TIMEOUT = float(os.getenv("JARVIS_SEARCH_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("JARVIS_SEARCH_READ_TIMEOUT", "8"))
+SEARCH_RETRIES = int(os.getenv("JARVIS_SEARCH_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("JARVIS_SEARCH_RETRY_BACKOFF", "0.25"))
+
+
+class SearchError(RuntimeError):
+    """Serper could not be reached or kept failing after the retries."""
+
+
+_client = None
+_client_loop = None
+_semaphore = None
+_client_stats = {"requests": 0, "retries": 0, "failures": 0, "in_flight": 0}
+
+
+def _get_client():
+    """The shared client and semaphore, rebuilt if the event loop changed."""
+    global _client, _client_loop, _semaphore
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            base_url=SERPER_URL,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=SEARCH_CONCURRENCY, max_keepalive_connections=SEARCH_CONCURRENCY),
+        )
+        _client_loop = loop
+        _semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+    return _client, _semaphore
+
+async def aclose():
+    """Closes the pooled connections (app shutdown)."""
+    global _client, _client_loop
+    if _client is not None:
+        client, _client, _client_loop = _client, None, None
+        await client.aclose()
+
+def _retry_delay(attempt: int) -> float:
+    # Full jitter: uniform in [0, base * 2^attempt]
+    return random.uniform(0, RETRY_BACKOFF * (2 ** attempt))
+
+async def fetch_results(query: str, k: int = SEARCH_RESULTS) -> dict:
+    """Raw Serper JSON for a query. Raises SearchError once the retries are used up."""
     api_key = os.getenv("SERPER_API_KEY")
+    client, semaphore = _get_client()
+    last_error = None
+    for attempt in range(SEARCH_RETRIES + 1):
+        if attempt:
+            _client_stats["retries"] += 1
+            await asyncio.sleep(_retry_delay(attempt - 1))
+        async with semaphore:
+            _client_stats["requests"] += 1
+            _client_stats["in_flight"] += 1
+            try:
+                response = await client.post(
+                    "/search", json={"q": query, "num": k}, headers={"X-API-KEY": api_key or ""}
+                )
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error = e
+                continue
+            finally:
+                _client_stats["in_flight"] -= 1
+        if response.status_code == 429 or response.status_code >= 500:
+            last_error = SearchError(f"Serper answered HTTP {response.status_code}")
+            continue
+        if response.status_code >= 400:
+            _client_stats["failures"] += 1
+            raise SearchError(f"Serper rejected the request: HTTP {response.status_code}")
+        return response.json()
+    _client_stats["failures"] += 1
+    raise SearchError(f"Serper unavailable after {SEARCH_RETRIES + 1} attempts: {last_error}")
 
-    # Check if the key exists before trying to initialize
-    if not api_key:
+async def asearch(query: str) -> str:
+    """Async web search through the result cache. Errors raise; they are never cached."""
+    if CACHE_ENABLED:
+        cached = search_cache.get(query)
+        if cached is not None:
+            print(f"💾 Search cache hit for: {query}")
+            return cached
+
+    if not os.getenv("SERPER_API_KEY"):
         print("⚠️ Warning: SERPER_API_KEY not found in .env file.")
-        def _disabled_search(query: str):
-            return "System Error: Web Search is disabled because the SERPER_API_KEY is missing."
-        
-        return Tool(
-            name="web_search", 
-            func=_disabled_search, 
-            description="Disabled search."
-        )
+        return DISABLED_MESSAGE
 
-    try:
-        # Initialize Serper
-        # k=5 means it returns the top 5 results
-        search = GoogleSerperAPIWrapper(k=5)
-        
-        return Tool(
-            name="web_search",
-            func=search.run,
-            description="Search the web for current events, news, facts, or specific information."
-        )
-        
-    except Exception as e:
-        print(f"❌ Error initializing Serper: {e}")
-        def _error_search(query: str):
-            return f"Search Error: {str(e)}"
-        return Tool(name="web_search", func=_error_search, description="Error in search.")
\ No newline at end of file
+    result = search_results.pack(query, await fetch_results(query))
+    if CACHE_ENABLED:
+        search_cache.put(query, result)
+    return result
+
+def client_stats() -> dict:
+    return dict(_client_stats, concurrency=SEARCH_CONCURRENCY)
@@ -31,6 +31,7 @@ import subprocess
 import edge_tts 
 import re
 import shutil
+import hashlib
 from contextlib import asynccontextmanager
 
 # Allow running this file directly from the `backend/` directory for convenience.
@@ -40,7 +41,7 @@ if __package__ is None:
     if repo_root_str not in sys.path:
         sys.path.insert(0, repo_root_str)
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Form, Depends, status, WebSocket
+from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Form, Depends, status, WebSocket, WebSocketDisconnect, Response, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
@@ -52,9 +53,17 @@ from faster_whisper import WhisperModel
 from backend.brain import memory_manager as mem
 from backend.brain import llm_services as brain
 from backend.brain import web_search as searcher      
+from backend.brain import context_window
+from backend.brain import summarizer
+from backend.brain import memory_services
+from backend.brain import search_index
+from backend.brain import intent_router
+from backend.brain import tool_stream
+from backend.brain.single_flight import SingleFlight
+from backend.brain.speculative_search import Speculator
+from backend.brain.response_cache import context_hash
 from backend import auth 
 
-from langchain_core.messages import HumanMessage, AIMessage
 
 # CONFIG & LIFESPAN
 FFMPEG_PATH = shutil.which("ffmpeg") or r"C:\ffmpeg\bin\ffmpeg.exe"
@@ -62,6 +71,13 @@ AGENT_PATH = os.path.join(os.path.dirname(__file__), "agent.exe")
 connected_agent = None
 agent_lock = asyncio.Lock()
 
+# Identical concurrent brain/search/vision requests share one upstream call
+brain_flight = SingleFlight("brain")
+search_flight = SingleFlight("search")
+vision_flight = SingleFlight("vision")
+# Likely web searches start alongside the first LLM call
+speculator = Speculator()
+
 # Global Model Variables
 whisper_model = None
 
@@ -84,6 +100,12 @@ async def lifespan(app: FastAPI):
     whisper_model = WhisperModel("small.en", device="cpu", compute_type="int8")
     print("✅ Whisper Model Loaded!")
 
+    # Load the tokenizer now: its first load may download the encoding
+    if context_window.load_encoder():
+        print("✅ Tokenizer Loaded!")
+    else:
+        print("⚠️ tiktoken unavailable, estimating token counts")
+
     # Preload Multimodal
     print("⏳ Preloading Multimodal Model...")
     try:
@@ -99,6 +121,9 @@ async def lifespan(app: FastAPI):
     yield
     # SHUTDOWN LOGIC
     print("🛑 JARVIS Systems Shutting Down...")
+    memory_services.flush()
+    searcher.search_cache.flush()
+    await searcher.aclose()
 
 # APP INITIALIZATION (DO THIS ONLY ONCE)
 app = FastAPI(lifespan=lifespan)
@@ -108,6 +133,7 @@ app.add_middleware(
     allow_origins=["*"], 
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # REQUEST MODELS
@@ -118,6 +144,7 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     chat_id: str
+    prompt_tokens: Optional[int] = None
 
 class RenameRequest(BaseModel):
     new_name: str
@@ -130,39 +157,139 @@ class SignupRequest(BaseModel):
     password: str
 
 # HELPER FUNCTIONS
-def extract_first_json(text):
-    start = text.find("{")
-    if start == -1:
-        return None
-    brace_count = 0
-    for i in range(start, len(text)):
-        if text[i] == "{":
-            brace_count += 1
-        elif text[i] == "}":
-            brace_count -= 1
-        if brace_count == 0:
-            return text[start:i+1]
-    return None 
-
-def perform_search(query):
+def _brain_key(prompt_text, history, memories):
+    return hashlib.sha256(f"{prompt_text}\x1f{context_hash(history, memories)}".encode("utf-8")).hexdigest()
+
+async def ask_brain(prompt_text, history, memories):
+    """aget_brain_response, shared between identical concurrent requests."""
+    return await brain_flight.run(
+        _brain_key(prompt_text, history, memories),
+        lambda: brain.aget_brain_response(prompt_text, history, memories),
+    )
+
+def stream_brain(prompt_text, history, memories):
+    """stream_brain_response, shared between identical concurrent requests."""
+    return brain_flight.stream(
+        _brain_key(prompt_text, history, memories),
+        lambda: brain.stream_brain_response(prompt_text, history, memories),
+    )
+
+async def search_web(query):
+    """perform_search, shared between identical concurrent queries."""
+    key = searcher.normalize_query(query)
+    return await search_flight.run(key, lambda: perform_search(query))
+
+async def describe_image(contents):
+    """Local vision analysis of image bytes, shared between concurrent uploads of the same image."""
+    from backend.brain import local_multimodal
+    key = hashlib.sha256(contents).hexdigest()
+    return await vision_flight.run(
+        key, lambda: asyncio.to_thread(local_multimodal.analyze_image_with_local_llm, contents, None)
+    )
+
+async def stream_until_tool(prompt_text, history, memories):
+    """
+    Relays the model's reply as ("text", chunk) pairs while watching it for a
+    tool call. When a tool JSON closes, yields ("tool", dict) and cancels the
+    rest of the generation.
+    """
+    detector = tool_stream.ToolCallDetector()
+    stream = stream_brain(prompt_text, history, memories)
+    try:
+        async for chunk in stream:
+            tool_data = detector.feed(chunk)
+            yield "text", chunk
+            if tool_data is not None:
+                print("🛠️ Tool call complete, stopping generation:", tool_data)
+                yield "tool", tool_data
+                return
+    finally:
+        await stream.aclose()
+
+async def collect_reply(prompt_text, history, memories):
+    """(reply_text, tool_call or None) for callers that don't stream to the client."""
+    chunks, tool_data = [], None
+    async for kind, value in stream_until_tool(prompt_text, history, memories):
+        if kind == "tool":
+            tool_data = value
+        else:
+            chunks.append(value)
+    return "".join(chunks), tool_data
+
+async def send_agent_command(tool_data):
+    """Forwards a device action to the local agent; returns the reply for the user."""
+    print("📤 Sending command to agent:", tool_data)
+    if not connected_agent:
+        return "⚠️ Local agent is not running."
+    try:
+        await connected_agent.send_text(json.dumps(tool_data))
+        return f"Executing {tool_data['action']}..."
+    except Exception as e:
+        print("Agent send failed:", e)
+        return "⚠️ Agent connected but command failed."
+
+def save_turn(chat_id, user_id, human_text, ai_text):
+    """Stores one human/AI exchange (blocking file/DB I/O: await it via asyncio.to_thread)."""
+    mem.append_to_chat(chat_id, "human", human_text, user_id=user_id)
+    mem.append_to_chat(chat_id, "ai", ai_text, user_id=user_id)
+
+def remember_user_facts(user_text, user_id):
+    # Auto-Save "My Name is"
+    if "my name is" in user_text.lower():
+        memory_text = f"User Mentioned: {user_text}"
+        if mem.add_long_term_memory(memory_text, user_id=user_id):
+            memory_services.queue_text(user_id, memory_text)
+
+def get_relevant_memories(prompt_text, user_id):
+    """Top-k long-term memories for this turn, most relevant first."""
+    memories = mem.get_long_term_memory(user_id=user_id)
+    try:
+        return memory_services.retrieve_relevant_memories(user_id, prompt_text, memories)
+    except Exception as e:
+        print(f"⚠️ Memory retrieval failed, using newest memories: {e}")
+        return list(reversed(memories))
+
+def build_prompt_context(prompt_text, chat_id, user_id):
+    """Shared by /chat and /image_qa: fits history + memory into the token budget."""
+    history = mem.get_langchain_history(chat_id, user_id=user_id)
+    summary, history = summarizer.prompt_history(chat_id, user_id, history)
+    long_term_mem = get_relevant_memories(prompt_text, user_id)
+    window = context_window.build_context(
+        prompt_text, history, long_term_mem, system_prompt=brain.SYSTEM_PROMPT, summary=summary
+    )
+    print(f"🧮 Prompt: {window.tokens} tokens, {len(window.history)} messages "
+          f"({window.dropped_messages} older dropped), {len(window.memories)} memories")
+    return window
+
+async def perform_search(query):
     print(f"🔎 Jarvis is searching the web for: {query}")
-    tool = searcher.get_search_tool()
     try:
-        result = tool.func(query)
-        return str(result)[:2000] if len(str(result)) > 2000 else str(result)
+        return await searcher.asearch(query)
     except Exception as e:
         print(f"❌ Search Error: {e}")
         return "I attempted to search but encountered an error."
 
 # 0. AUTH ENDPOINTS
+def _password_pool_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins right now, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @app.post("/signup")
-def signup(user: SignupRequest):
+async def signup(user: SignupRequest):
     """Register a new user."""
     # Check if user exists
     if auth.get_user(user.username):
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    auth.create_user_in_db(user.username, user.password)
+    try:
+        hashed_pw = await auth.aget_password_hash(user.password)
+    except auth.PoolBusy:
+        raise _password_pool_busy()
+    if not await asyncio.to_thread(auth.create_user_in_db, user.username, user.password, hashed_pw):
+        raise HTTPException(status_code=400, detail="Username already registered")
     return {"status": "success", "message": "User created successfully"}
 
 @app.post("/token")
@@ -170,7 +297,11 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Standard OAuth2 login endpoint."""
     user = auth.get_user(form_data.username)
     
-    if not user or not auth.verify_password(form_data.password, user["hashed_password"]):
+    try:
+        valid = bool(user) and await auth.averify_password(form_data.password, user["hashed_password"])
+    except auth.PoolBusy:
+        raise _password_pool_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -190,9 +321,17 @@ def get_profile(current_user: dict = Depends(auth.get_current_user)):
 
 # MANAGEMENT ENDPOINTS (PROTECTED)
 @app.get("/chats")
-def list_chats(current_user: dict = Depends(auth.get_current_user)):
+def list_chats(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(auth.get_current_user)
+):
     user_id = current_user["username"]
-    return mem.get_all_chats(user_id=user_id)
+    chats, next_cursor = mem.get_chat_page(user_id, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return chats
 
 @app.post("/chats/new")
 def create_chat(current_user: dict = Depends(auth.get_current_user)):
@@ -216,10 +355,61 @@ def delete_chat(chat_id: str, current_user: dict = Depends(auth.get_current_user
     return {"status": "success"}
 
 
+def _stream_json_array(items):
+    yield "["
+    for i, item in enumerate(items):
+        yield ("," if i else "") + json.dumps(item)
+    yield "]"
+
+def _history_etag(count, updated_at, before, after, since, limit):
+    """Weak ETag for one view of a chat: its version plus the window asked for."""
+    window = json.dumps([before, after, since, limit])
+    digest = hashlib.sha256(window.encode("utf-8")).hexdigest()[:12]
+    return f'W/"{count}-{updated_at}-{digest}"'
+
 @app.get("/chats/{chat_id}/history")
-def get_history(chat_id: str, current_user: dict = Depends(auth.get_current_user)):
+def get_history(
+    chat_id: str,
+    request: Request,
+    before: Optional[int] = Query(None, ge=0),
+    after: Optional[int] = Query(None, ge=-1),
+    since: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """
+    Full history by default. `before`/`after` are message indexes, `since` is a
+    timestamp for delta pulls. Unchanged histories answer 304 via If-None-Match.
+    """
+    user_id = current_user["username"]
+
+    version = mem.get_chat_version(chat_id, user_id=user_id)
+    headers = {"Cache-Control": "private, no-cache"}
+    if version is not None:
+        count, updated_at = version
+        headers["ETag"] = _history_etag(count, updated_at, before, after, since, limit)
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+
+    messages = mem.iter_chat_page(
+        chat_id, user_id=user_id, before=before, after=after, since=since, limit=limit
+    )
+    return StreamingResponse(_stream_json_array(messages), media_type="application/json", headers=headers)
+
+
+@app.get("/search")
+def search_chats(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Full-text search across the user's chats, best matches first."""
     user_id = current_user["username"]
-    return mem.get_chat_history(chat_id, user_id=user_id)
+    hits = search_index.search(user_id, q, limit=limit)
+    names = {c["chat_id"]: c["name"] for c in mem.get_all_chats(user_id=user_id)}
+    for hit in hits:
+        hit["chat_name"] = names.get(hit["chat_id"], "")
+    return hits
 
 
 # CHAT & BRAIN ENDPOINT (PROTECTED)
@@ -231,74 +421,168 @@ async def chat_endpoint(req: ChatRequest, current_user: dict = Depends(auth.get_
 
     # Handle New Chat creation
     if not chat_id:
-        new_chat = mem.create_new_chat(user_id=user_id)
+        new_chat = await asyncio.to_thread(mem.create_new_chat, user_id=user_id)
         chat_id = new_chat["chat_id"]
 
-    # Get History
-    history_dicts = mem.get_chat_history(chat_id, user_id=user_id)
-    langchain_history = []
-    for h in history_dicts:
-        if h["role"] == "human":
-            langchain_history.append(HumanMessage(content=h["content"]))
-        else:
-            langchain_history.append(AIMessage(content=h["content"]))
-
-    # Get Long Term Memory
-    long_term_mem = mem.get_long_term_memory(user_id=user_id)
+    # Plain device commands go straight to the agent, no LLM round trip
+    command = intent_router.match(user_text)
+    if command:
+        final_answer = await send_agent_command(command)
+        await asyncio.to_thread(save_turn, chat_id, user_id, user_text, final_answer)
+        return ChatResponse(response=final_answer, chat_id=chat_id)
 
-    # First Call to Brain
-    ai_response = brain.get_brain_response(user_text, langchain_history, long_term_mem)
-    ai_response = ai_response.replace("```json", "").replace("```", "")
-    
-    tool_data = None
+    # Search-worthy questions start searching while the model thinks
+    speculation = speculator.start(user_text, search_web)
     try:
-        json_str = extract_first_json(ai_response)
-        if json_str:
-            tool_data = json.loads(json_str)
-    except Exception as e:
-        print("JSON parse fail:", e)
-
-    # AGENT HANDLING
-    if isinstance(tool_data, dict) and "action" in tool_data:
-        print("📤 Sending command to agent:", tool_data)
-
-        if connected_agent:
-            try:
-                await connected_agent.send_text(json.dumps(tool_data))
-                final_answer = f"Executing {tool_data['action']}..."
-            except Exception as e:
-                print("Agent send failed:", e)
-                final_answer = "⚠️ Agent connected but command failed."
-        else:
-            final_answer = "⚠️ Local agent is not running."
+        # Get History + Long Term Memory, trimmed to the token budget
+        context = await asyncio.to_thread(build_prompt_context, user_text, chat_id, user_id)
+        langchain_history = context.history
+        long_term_mem = context.memories
 
-        mem.append_to_chat(chat_id, "human", user_text, user_id=user_id)
-        mem.append_to_chat(chat_id, "ai", final_answer, user_id=user_id)
-        return ChatResponse(response=final_answer, chat_id=chat_id)
+        # First Call to Brain
+        ai_response, tool_data = await collect_reply(user_text, langchain_history, long_term_mem)
+        ai_response = ai_response.replace("```json", "").replace("```", "")
 
-    # WEB SEARCH HANDLING
-    final_answer = ai_response
-    try:
-        if isinstance(tool_data, dict) and "query" in tool_data:
-            search_query = tool_data["query"]
-            search_results = perform_search(search_query)
+        # AGENT HANDLING
+        if isinstance(tool_data, dict) and "action" in tool_data:
+            final_answer = await send_agent_command(tool_data)
+
+            await asyncio.to_thread(save_turn, chat_id, user_id, user_text, final_answer)
+            return ChatResponse(response=final_answer, chat_id=chat_id, prompt_tokens=context.tokens)
+
+        # WEB SEARCH HANDLING
+        final_answer = ai_response
+        try:
+            if isinstance(tool_data, dict) and "query" in tool_data:
+                search_query = tool_data["query"]
+                search_results = await speculation.results_for(search_query)
             
-            search_context = f"SYSTEM: I have searched Google. Here are the results: {search_results}\n\nUsing these results, answer the user's original question."
+                search_context = f"SYSTEM: I have searched Google. Here are the results: {search_results}\n\nUsing these results, answer the user's original question."
             
-            final_answer = brain.get_brain_response(search_context, langchain_history, long_term_mem)
-    except Exception as e:
-        print(f"⚠️ Tool call parsing failed, returning original response. Error: {e}")
-        final_answer = ai_response
+                final_answer = await ask_brain(search_context, langchain_history, long_term_mem)
+        except Exception as e:
+            print(f"⚠️ Tool call parsing failed, returning original response. Error: {e}")
+            final_answer = ai_response
+    finally:
+        speculation.close()
 
     # Save to DB
-    mem.append_to_chat(chat_id, "human", user_text, user_id=user_id)
-    mem.append_to_chat(chat_id, "ai", final_answer, user_id=user_id)
+    await asyncio.to_thread(save_turn, chat_id, user_id, user_text, final_answer)
+
+    await asyncio.to_thread(remember_user_facts, user_text, user_id)
+
+    return ChatResponse(response=final_answer, chat_id=chat_id, prompt_tokens=context.tokens)
+
+# STREAMING CHAT (SSE + WEBSOCKET)
+async def stream_chat_events(user_text, chat_id, user_id):
+    """
+    One /chat turn as a sequence of events:
+      start  {chat_id, prompt_tokens}
+      token  {text}            appended as the model generates
+      tool   {action | query}  when the reply was a tool call
+      done   {response, chat_id, prompt_tokens}  final text (authoritative)
+    The turn is saved once the reply is complete.
+    """
+    if not chat_id:
+        chat_id = (await asyncio.to_thread(mem.create_new_chat, user_id=user_id))["chat_id"]
+
+    command = intent_router.match(user_text)
+    if command:
+        yield {"type": "start", "chat_id": chat_id, "prompt_tokens": 0}
+        yield {"type": "tool", "action": command["action"]}
+        final_answer = await send_agent_command(command)
+        await asyncio.to_thread(save_turn, chat_id, user_id, user_text, final_answer)
+        yield {"type": "done", "response": final_answer, "chat_id": chat_id, "prompt_tokens": 0}
+        return
+
+    speculation = speculator.start(user_text, search_web)
+    try:
+        context = await asyncio.to_thread(build_prompt_context, user_text, chat_id, user_id)
+        yield {"type": "start", "chat_id": chat_id, "prompt_tokens": context.tokens}
+
+        # Replies starting like JSON are probably tool calls: hold them back
+        chunks = []
+        holding = True
+        tool_data = None
+        async for kind, value in stream_until_tool(user_text, context.history, context.memories):
+            if kind == "tool":
+                tool_data = value
+                continue
+            chunks.append(value)
+            if not holding:
+                yield {"type": "token", "text": value}
+                continue
+            head = "".join(chunks).lstrip()
+            if head and head[0] not in "{`":
+                holding = False
+                yield {"type": "token", "text": "".join(chunks)}
+
+        ai_response = "".join(chunks).replace("```json", "").replace("```", "")
+        final_answer = ai_response
 
-    # Auto-Save "My Name is"
-    if "my name is" in user_text.lower():
-        mem.add_long_term_memory(f"User Mentioned: {user_text}", user_id=user_id)
+        if isinstance(tool_data, dict) and "action" in tool_data:
+            yield {"type": "tool", "action": tool_data["action"]}
+            final_answer = await send_agent_command(tool_data)
+        elif isinstance(tool_data, dict) and "query" in tool_data:
+            yield {"type": "tool", "query": tool_data["query"]}
+            search_results = await speculation.results_for(tool_data["query"])
+            search_context = f"SYSTEM: I have searched Google. Here are the results: {search_results}\n\nUsing these results, answer the user's original question."
+            chunks = []
+            async for chunk in stream_brain(search_context, context.history, context.memories):
+                chunks.append(chunk)
+                yield {"type": "token", "text": chunk}
+            final_answer = "".join(chunks)
+        elif holding and ai_response:
+            yield {"type": "token", "text": ai_response}
+    finally:
+        speculation.close()
+
+    await asyncio.to_thread(save_turn, chat_id, user_id, user_text, final_answer)
+    if not (isinstance(tool_data, dict) and "action" in tool_data):
+        await asyncio.to_thread(remember_user_facts, user_text, user_id)
+
+    yield {"type": "done", "response": final_answer, "chat_id": chat_id, "prompt_tokens": context.tokens}
+
+async def _guarded_chat_events(user_text, chat_id, user_id):
+    try:
+        async for event in stream_chat_events(user_text, chat_id, user_id):
+            yield event
+    except Exception as e:
+        print(f"❌ Streaming chat failed: {e}")
+        yield {"type": "error", "detail": "I'm having trouble connecting to my brain right now."}
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest, current_user: dict = Depends(auth.get_current_user)):
+    """/chat as Server-Sent Events: one `data: {json event}` line per event."""
+    async def sse():
+        async for event in _guarded_chat_events(req.text, req.chat_id, current_user["username"]):
+            yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    return ChatResponse(response=final_answer, chat_id=chat_id)
+@app.websocket("/ws/chat")
+async def chat_ws(ws: WebSocket, token: str = Query(...)):
+    """Same events as /chat/stream. Send {"text", "chatId"} per turn; the token goes in the query
+    string because browsers can't set headers on WebSockets."""
+    try:
+        current_user = await auth.get_current_user(token)
+    except HTTPException:
+        await ws.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await ws.accept()
+    try:
+        while True:
+            req = await ws.receive_json()
+            chat_id = req.get("chatId") or req.get("chat_id")
+            async for event in _guarded_chat_events(req.get("text", ""), chat_id, current_user["username"]):
+                await ws.send_json(event)
+    except WebSocketDisconnect:
+        pass
 
 # IMAGE QUESTION ENDPOINT (PROTECTED)
 @app.post("/image_qa", response_model=ChatResponse)
@@ -310,7 +594,7 @@ async def image_question(
 ):
     user_id = current_user["username"]
     if not chat_id:
-        new_chat = mem.create_new_chat(user_id=user_id)
+        new_chat = await asyncio.to_thread(mem.create_new_chat, user_id=user_id)
         chat_id = new_chat["chat_id"]
 
     contents = await file.read()
@@ -322,7 +606,7 @@ async def image_question(
     try:
         from backend.brain import local_multimodal
         if local_multimodal and local_multimodal.is_available():
-            image_description, error_message = local_multimodal.analyze_image_with_local_llm(contents, None)
+            image_description, error_message = await describe_image(contents)
         else:
             error_message = "Local multimodal module not available or imports missing."
     except Exception as e:
@@ -334,8 +618,7 @@ async def image_question(
         detailed_error = error_message if error_message else "Unknown error occurred."
         ai_response = f"I'm sorry, I couldn't see the image. The internal error was: [{detailed_error}]"
         
-        mem.append_to_chat(chat_id, "human", f"[Image: {file.filename}] {question}", user_id=user_id)
-        mem.append_to_chat(chat_id, "ai", ai_response, user_id=user_id)
+        await asyncio.to_thread(save_turn, chat_id, user_id, f"[Image: {file.filename}] {question}", ai_response)
         return ChatResponse(response=ai_response, chat_id=chat_id)
 
     # 2. Send Description to Brain (WITH STRICTER INSTRUCTIONS)
@@ -354,28 +637,13 @@ async def image_question(
     )
     # -----------------------------------------------------
 
-    history_dicts = mem.get_chat_history(chat_id, user_id=user_id)
-    langchain_history = []
-    for h in history_dicts:
-        if h["role"] == "human":
-            langchain_history.append(HumanMessage(content=h["content"]))
-        else:
-            langchain_history.append(AIMessage(content=h["content"]))
-    
-    long_term_mem = mem.get_long_term_memory(user_id=user_id)
+    context = await asyncio.to_thread(build_prompt_context, prompt_for_brain, chat_id, user_id)
+    langchain_history = context.history
+    long_term_mem = context.memories
 
-    # 3. Get Response
-    ai_response = brain.get_brain_response(prompt_for_brain, langchain_history, long_term_mem)
+    # 3. Get Response (4. tool_data is set if it STILL tried to use a tool: Safety Net)
+    ai_response, tool_data = await collect_reply(prompt_for_brain, langchain_history, long_term_mem)
     ai_response = ai_response.replace("```json", "").replace("```", "")
-    
-    # 4. Check if it STILL tried to use a tool (Safety Net)
-    tool_data = None
-    try:
-        json_str = extract_first_json(ai_response)
-        if json_str:
-            tool_data = json.loads(json_str)
-    except Exception as e:
-        print("JSON parse fail inside Image QA:", e)
 
     final_answer = ai_response
 
@@ -384,7 +652,7 @@ async def image_question(
         if isinstance(tool_data, dict) and "query" in tool_data:
             search_query = tool_data["query"]
             print(f"🖼️ Image triggered search (despite instructions): {search_query}")
-            search_results = perform_search(search_query)
+            search_results = await search_web(search_query)
             
             search_context = (
                 f"SYSTEM: You analyzed an image which prompted a search.\n"
@@ -392,7 +660,7 @@ async def image_question(
                 f"Now answer the user's original question about the image."
             )
             
-            final_answer = brain.get_brain_response(search_context, langchain_history, long_term_mem)
+            final_answer = await ask_brain(search_context, langchain_history, long_term_mem)
             
         # Handle Agent Actions
         elif isinstance(tool_data, dict) and "action" in tool_data:
@@ -411,15 +679,23 @@ async def image_question(
         final_answer = ai_response
 
     # 5. Save to Memory
-    mem.append_to_chat(chat_id, "human", f"[Image: {file.filename}] {question}", user_id=user_id)
-    mem.append_to_chat(chat_id, "ai", final_answer, user_id=user_id)
+    await asyncio.to_thread(save_turn, chat_id, user_id, f"[Image: {file.filename}] {question}", final_answer)
 
-    return ChatResponse(response=final_answer, chat_id=chat_id)
+    return ChatResponse(response=final_answer, chat_id=chat_id, prompt_tokens=context.tokens)
 @app.get("/status")
 def service_status():
     try:
         from backend.brain import llm_services
-        return llm_services.check_status()
+        status_info = llm_services.check_status()
+        status_info["session_cache"] = mem.get_cache_stats()
+        status_info["memory_index"] = memory_services.get_stats()
+        status_info["password_pool"] = auth.password_pool.stats()
+        status_info["token_cache"] = auth.token_cache.stats()
+        status_info["single_flight"] = {f.name: f.stats() for f in (brain_flight, search_flight, vision_flight)}
+        status_info["speculative_search"] = speculator.stats()
+        status_info["search_cache"] = searcher.search_cache.stats()
+        status_info["search_client"] = searcher.client_stats()
+        return status_info
     except Exception as e:
         return {"error": str(e)}
 
@@ -0,0 +1,153 @@
+import sys
+import os
+import json
+import asyncio
+import threading
+from datetime import timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from fastapi import HTTPException
+from backend import auth
+
+
+@pytest.fixture
+def users_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # keeps any storage init_db creates out of the repo
+    path = str(tmp_path / "users.json")
+    monkeypatch.setattr(auth, "USERS_FILE", path)
+    monkeypatch.setattr(auth, "_users_cache", None)
+    monkeypatch.setattr(auth, "_users_mtime", None)
+    return path
+
+
+def test_concurrent_signups_with_same_name_create_one_user(users_file):
+    results = []
+    start = threading.Barrier(8)
+
+    def signup(i):
+        start.wait()
+        results.append(auth.create_user_in_db("tony", "pw", hashed_pw=f"hash-{i}"))
+
+    threads = [threading.Thread(target=signup, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count(True) == 1
+    with open(users_file) as f:
+        on_disk = json.load(f)
+    assert list(on_disk) == ["tony"]
+    assert auth.get_user("tony") == on_disk["tony"]
+
+
+def test_concurrent_signups_with_different_names_are_all_kept(users_file):
+    threads = [
+        threading.Thread(target=auth.create_user_in_db, args=(f"user{i}", "pw", "hash"))
+        for i in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with open(users_file) as f:
+        assert sorted(json.load(f)) == sorted(f"user{i}" for i in range(8))
+
+
+def test_external_edit_to_users_file_is_picked_up(users_file):
+    auth.create_user_in_db("tony", "pw", hashed_pw="hash")
+    assert auth.get_user("pepper") is None
+
+    with open(users_file) as f:
+        data = json.load(f)
+    data["pepper"] = {"username": "pepper", "hashed_password": "other"}
+    with open(users_file, "w") as f:
+        json.dump(data, f)
+    # Make sure the change is visible even on coarse mtime clocks
+    stat = os.stat(users_file)
+    os.utime(users_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert auth.get_user("pepper")["hashed_password"] == "other"
+    assert auth.get_user("tony")["hashed_password"] == "hash"
+
+
+def test_unchanged_file_is_parsed_once(users_file, monkeypatch):
+    auth.create_user_in_db("tony", "pw", hashed_pw="hash")
+    loads = []
+    real_load = json.load
+    monkeypatch.setattr(auth.json, "load", lambda f: loads.append(1) or real_load(f))
+
+    for _ in range(3):
+        assert auth.get_user("tony") is not None
+    assert loads == []
+
+
+# TOKEN CACHE
+
+@pytest.fixture
+def signed_in(users_file, monkeypatch):
+    monkeypatch.setattr(auth, "token_cache", auth.TokenCache())
+    decodes = []
+    real_decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: decodes.append(1) or real_decode(*a, **kw))
+    auth.create_user_in_db("tony", "pw", hashed_pw="hash")
+    token = auth.create_access_token({"sub": "tony"}, expires_delta=timedelta(minutes=5))
+    return token, decodes
+
+
+def _current_user(token):
+    return asyncio.run(auth.get_current_user(token))
+
+
+def test_repeat_requests_hit_the_token_cache(signed_in):
+    token, decodes = signed_in
+    first = _current_user(token)
+    assert _current_user(token) is first
+    assert decodes == [1]
+    assert auth.token_cache.stats()["hits"] == 1
+
+
+def test_cached_token_expires_at_its_exp(signed_in, monkeypatch):
+    token, decodes = signed_in
+    _current_user(token)
+    exp = auth.jwt.get_unverified_claims(token)["exp"]
+
+    monkeypatch.setattr(auth.time, "time", lambda: exp - 1)
+    assert auth.token_cache.get(token) is not None
+    monkeypatch.setattr(auth.time, "time", lambda: exp)
+    assert auth.token_cache.get(token) is None
+    assert auth.token_cache.stats()["entries"] == 0
+
+
+def test_expired_token_is_rejected_even_if_it_was_cached(signed_in):
+    token = auth.create_access_token({"sub": "tony"}, expires_delta=timedelta(seconds=-1))
+    payload = auth.jwt.get_unverified_claims(token)
+    auth.token_cache.put(token, payload, auth.get_user("tony"))
+
+    with pytest.raises(HTTPException) as err:
+        _current_user(token)
+    assert err.value.status_code == 401
+
+
+def test_rewritten_user_record_revokes_cached_token(signed_in):
+    token, decodes = signed_in
+    _current_user(token)
+
+    db = dict(auth._read_users_db())
+    db["tony"] = {"username": "tony", "hashed_password": "new-hash"}
+    auth._write_users_db(db)
+
+    assert _current_user(token)["hashed_password"] == "new-hash"
+    assert decodes == [1, 1]
+
+
+def test_removed_user_revokes_cached_token(signed_in):
+    token, _ = signed_in
+    _current_user(token)
+
+    auth._write_users_db({})
+    with pytest.raises(HTTPException) as err:
+        _current_user(token)
+    assert err.value.status_code == 401
@@ -0,0 +1,76 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from backend.brain import chat_index
+from backend.brain import memory_manager as mem
+from backend.brain.session_cache import SessionCache
+
+
+def _walk(user_dir, limit):
+    seen, cursor = [], None
+    while True:
+        page, cursor = chat_index.read_page(user_dir, limit=limit, cursor=cursor)
+        seen += [e["chat_id"] for e in page]
+        if cursor is None:
+            return seen
+
+
+def test_touch_moves_chat_to_front_and_counts(tmp_path):
+    user_dir = str(tmp_path)
+    chat_index.rebuild(user_dir, [
+        chat_index.make_entry("a", "A", "2026-01-01"),
+        chat_index.make_entry("b", "B", "2026-01-02"),
+        chat_index.make_entry("c", "C", "2026-01-03"),
+    ])
+    assert _walk(user_dir, limit=2) == ["c", "b", "a"]
+
+    chat_index.touch(user_dir, "a", "2026-01-04")
+    assert _walk(user_dir, limit=2) == ["a", "c", "b"]
+    assert chat_index.get(user_dir, "a")["message_count"] == 1
+
+    chat_index.remove(user_dir, "c")
+    assert _walk(user_dir, limit=1) == ["a", "b"]
+
+
+def test_cursor_skips_nothing_when_chats_are_deleted_between_pages(tmp_path):
+    user_dir = str(tmp_path)
+    chat_index.rebuild(user_dir, [chat_index.make_entry(str(i), str(i), f"2026-01-0{i}") for i in range(1, 6)])
+
+    page, cursor = chat_index.read_page(user_dir, limit=2)
+    assert [e["chat_id"] for e in page] == ["5", "4"]
+    chat_index.remove(user_dir, "4")  # the cursor's own chat disappears
+    page, cursor = chat_index.read_page(user_dir, limit=2, cursor=cursor)
+    assert [e["chat_id"] for e in page] == ["3", "2"]
+
+
+@pytest.fixture
+def json_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(mem, "USERS_DIR", str(tmp_path))
+    monkeypatch.setattr(mem, "STORAGE_BACKEND", "json")
+    monkeypatch.setattr(mem, "session_cache", SessionCache())
+    return mem
+
+
+def test_list_chats_follows_appends_and_deletes(json_store):
+    first = json_store.create_new_chat("tony")["chat_id"]
+    second = json_store.create_new_chat("tony")["chat_id"]
+    assert [c["chat_id"] for c in json_store.get_all_chats("tony")][0] == second
+
+    json_store.append_to_chat(first, "human", "hello", user_id="tony")
+    chats = json_store.get_all_chats("tony")
+    assert [c["chat_id"] for c in chats] == [first, second]
+    assert chats[0]["message_count"] == 1
+
+    json_store.delete_chat(first, user_id="tony")
+    assert [c["chat_id"] for c in json_store.get_all_chats("tony")] == [second]
+
+
+def test_missing_index_is_rebuilt_from_chat_data(json_store):
+    chat_id = json_store.create_new_chat("tony")["chat_id"]
+    json_store.append_to_chat(chat_id, "human", "hello", user_id="tony")
+    os.remove(os.path.join(json_store._get_user_dir("tony"), chat_index.INDEX_FILE))
+
+    chats = json_store.get_all_chats("tony")
+    assert [(c["chat_id"], c["message_count"]) for c in chats] == [(chat_id, 1)]
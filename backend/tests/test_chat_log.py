@@ -0,0 +1,70 @@
+import json
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from backend.brain import chat_log
+
+
+def test_append_and_stream_messages(tmp_path):
+    user_dir = str(tmp_path)
+    chat_log.create_chat(user_dir, "c1", "New Conversation", "2024-01-01T00:00:00")
+    chat_log.append_message(user_dir, "c1", {"role": "human", "content": "hi", "timestamp": "t1"})
+    chat_log.append_message(user_dir, "c1", {"role": "ai", "content": "hello", "timestamp": "t2"})
+    chat_log.rename_chat(user_dir, "c1", "Greetings")
+
+    messages = list(chat_log.iter_messages(user_dir, "c1"))
+    assert [m["content"] for m in messages] == ["hi", "hello"]
+    assert chat_log.read_header(user_dir, "c1")["title"] == "Greetings"
+
+    # Compaction folds the rename into the header and keeps every message
+    assert chat_log.compact_chat(user_dir, "c1")
+    lines = (tmp_path / "chats" / "c1.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[0])["title"] == "Greetings"
+
+
+def test_migrates_legacy_chats_json(tmp_path):
+    legacy = {"abc": {"title": "Old", "created_at": "2024", "messages": [{"role": "human", "content": "hey"}]}}
+    (tmp_path / "chats.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    chat_log.ensure_user(str(tmp_path))
+
+    assert chat_log.list_chat_ids(str(tmp_path)) == ["abc"]
+    assert list(chat_log.iter_messages(str(tmp_path), "abc"))[0]["content"] == "hey"
+    assert not (tmp_path / "chats.json").exists()
+
+
+def _torn_write(tmp_path, chat_id, text):
+    with open(tmp_path / "chats" / f"{chat_id}.jsonl", "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_append_after_a_torn_write_keeps_the_new_message(tmp_path):
+    user_dir = str(tmp_path)
+    chat_log.create_chat(user_dir, "c1", "New Conversation", "2024-01-01T00:00:00")
+    chat_log.append_message(user_dir, "c1", {"role": "human", "content": "a", "timestamp": "t1"})
+    _torn_write(tmp_path, "c1", '{"type": "message", "role": "ai", "cont')
+
+    # The torn tail is tolerated on read...
+    assert [m["content"] for m in chat_log.iter_messages(user_dir, "c1")] == ["a"]
+
+    # ...and cut off before the next append instead of swallowing it
+    chat_log.append_message(user_dir, "c1", {"role": "human", "content": "after crash", "timestamp": "t2"})
+    chat_log.rename_chat(user_dir, "c1", "Recovered")
+    assert [m["content"] for m in chat_log.iter_messages(user_dir, "c1")] == ["a", "after crash"]
+
+    assert chat_log.compact_chat(user_dir, "c1")
+    assert [m["content"] for m in chat_log.iter_messages(user_dir, "c1")] == ["a", "after crash"]
+    assert chat_log.read_header(user_dir, "c1")["title"] == "Recovered"
+
+
+def test_compaction_leaves_damaged_segments_alone(tmp_path):
+    user_dir = str(tmp_path)
+    chat_log.create_chat(user_dir, "c1", "New Conversation", "2024-01-01T00:00:00")
+    _torn_write(tmp_path, "c1", "not json\n")
+    chat_log.append_message(user_dir, "c1", {"role": "human", "content": "kept", "timestamp": "t1"})
+    before = (tmp_path / "chats" / "c1.jsonl").read_text(encoding="utf-8")
+
+    assert [m["content"] for m in chat_log.iter_messages(user_dir, "c1")] == ["kept"]
+    assert not chat_log.compact_chat(user_dir, "c1")
+    assert (tmp_path / "chats" / "c1.jsonl").read_text(encoding="utf-8") == before
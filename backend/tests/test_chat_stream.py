@@ -0,0 +1,86 @@
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend import auth
+from backend.brain import llm_services
+from backend.brain import memory_manager as mem
+from backend.brain.response_cache import ResponseCache
+from backend.brain.stub_llm import StubChatModel
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(mem, "USERS_DIR", str(tmp_path))
+    monkeypatch.setattr(mem, "session_cache", type(mem.session_cache)())
+    monkeypatch.setattr(llm_services, "LLM_BACKEND", "stub")
+    monkeypatch.setattr(llm_services, "_brain_instance", None)
+    monkeypatch.setattr(llm_services, "response_cache", ResponseCache())
+
+    async def fake_user(token: str = None):
+        return {"username": "tony"}
+
+    app.dependency_overrides[auth.get_current_user] = fake_user
+    monkeypatch.setattr(auth, "get_current_user", fake_user)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def _sse_events(body: str):
+    return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+def test_sse_streams_tokens_and_persists_reply(client):
+    res = client.post("/chat/stream", json={"text": "hello there"})
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(res.text)
+    assert events[0]["type"] == "start"
+    tokens = [e["text"] for e in events if e["type"] == "token"]
+    assert len(tokens) > 1
+    assert events[-1]["type"] == "done"
+    assert "".join(tokens) == events[-1]["response"] == "You said: hello there"
+
+    chat_id = events[-1]["chat_id"]
+    history = mem.get_chat_history(chat_id, user_id="tony")
+    assert [m["content"] for m in history] == ["hello there", "You said: hello there"]
+
+
+def test_tool_call_json_is_not_streamed(client, monkeypatch):
+    monkeypatch.setattr(llm_services, "_brain_instance", llm_services.Brain())
+    llm_services._brain_instance.llm = StubChatModel('{"action": "open_app", "app": "notepad"}')
+
+    events = _sse_events(client.post("/chat/stream", json={"text": "I need notepad up"}).text)
+
+    assert not [e for e in events if e["type"] == "token"]
+    assert {"type": "tool", "action": "open_app"} in events
+    assert events[-1]["response"] == "⚠️ Local agent is not running."
+
+
+def test_websocket_streams_same_events(client):
+    with client.websocket_connect("/ws/chat?token=t") as ws:
+        ws.send_json({"text": "ping"})
+        events = []
+        while not events or events[-1]["type"] != "done":
+            events.append(ws.receive_json())
+
+    assert events[0]["type"] == "start"
+    assert events[-1]["response"] == "You said: ping"
+
+
+def test_device_command_skips_the_llm(client, monkeypatch):
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("LLM should not be called")
+        yield
+
+    monkeypatch.setattr(llm_services, "stream_brain_response", no_llm)
+
+    events = _sse_events(client.post("/chat/stream", json={"text": "open notepad"}).text)
+
+    assert {"type": "tool", "action": "open_app"} in events
+    assert events[-1]["response"] == "⚠️ Local agent is not running."
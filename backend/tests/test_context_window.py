@@ -0,0 +1,25 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from langchain_core.messages import HumanMessage, AIMessage
+from backend.brain import context_window
+
+
+def test_keeps_most_recent_turns_within_budget():
+    history = [HumanMessage(content=f"question {i} " * 20) if i % 2 == 0 else AIMessage(content=f"answer {i} " * 20)
+               for i in range(40)]
+
+    window = context_window.build_context("hi", history, [], budget=500)
+
+    assert window.tokens <= 500
+    assert window.dropped_messages > 0
+    assert window.history == history[-len(window.history):]
+
+
+def test_small_context_is_untouched():
+    history = [HumanMessage(content="hello"), AIMessage(content="hi there")]
+    window = context_window.build_context("how are you?", history, ["User Mentioned: my name is Tony"])
+
+    assert window.history == history
+    assert window.memories == ["User Mentioned: my name is Tony"]
+    assert window.dropped_messages == 0
@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from backend.brain import memory_services
+from backend.brain.memory_services import CachedEmbeddings, HashingEmbeddings
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    def __init__(self):
+        super().__init__(dim=16)
+        self.documents = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.documents.append(list(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return super().embed_query(text)
+
+
+def test_memory_hits_and_misses():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, "test", path="")
+
+    first = cache.embed_documents(["a", "b", "a"])
+    second = cache.embed_documents(["b", "c"])
+    assert inner.documents == [["a", "b"], ["c"]]
+    assert first[0] == first[2] and second[0] == first[1]
+    assert (cache.hits, cache.misses) == (2, 3)
+
+    cache.embed_query("a")
+    cache.embed_query("a")
+    # Queries are cached apart from documents with the same text
+    assert inner.queries == ["a"]
+    assert cache.stats()["hits"] == 3
+
+
+def test_lru_bound_on_memory_items():
+    cache = CachedEmbeddings(CountingEmbeddings(), "test", path="", max_items=2)
+    cache.embed_documents(["a", "b", "c"])
+    assert cache.stats()["memory_items"] == 2
+
+
+def test_disk_cache_is_shared_across_instances(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    CachedEmbeddings(CountingEmbeddings(), "test", path=path).embed_documents(["stored once"])
+
+    inner = CountingEmbeddings()
+    reopened = CachedEmbeddings(inner, "test", path=path)
+    vector = reopened.embed_documents(["stored once"])[0]
+    assert inner.documents == [] and reopened.hits == 1
+    assert vector == pytest.approx(HashingEmbeddings(dim=16).embed_query("stored once"), abs=1e-6)
+
+    # A different namespace (embedder) never reuses those vectors
+    other = CountingEmbeddings()
+    CachedEmbeddings(other, "other-model", path=path).embed_documents(["stored once"])
+    assert other.documents == [["stored once"]]
+
+
+class FakeStore:
+    def __init__(self):
+        self.batches = []
+
+    def add_texts(self, texts, ids):
+        self.batches.append(list(texts))
+
+
+def test_queue_text_batches_by_size_and_flush(monkeypatch):
+    store = FakeStore()
+    monkeypatch.setattr(memory_services, "get_vector_store", lambda user_id: store)
+    monkeypatch.setattr(memory_services, "_pending_texts", {})
+    monkeypatch.setattr(memory_services, "_indexed_ids", {})
+    monkeypatch.setattr(memory_services, "INGEST_BATCH_SIZE", 3)
+    monkeypatch.setattr(memory_services, "INGEST_FLUSH_SECONDS", 60)
+    monkeypatch.setattr(memory_services, "_flush_timer", None)
+
+    for text in ["one", "two", "two"]:
+        memory_services.queue_text("tony", text)
+    # Full batch written in one call, duplicates collapsed
+    assert store.batches == [["one", "two"]]
+
+    memory_services.queue_text("tony", "three")
+    assert memory_services.get_stats()["pending_texts"] == 1
+    memory_services._flush_timer.cancel()
+    memory_services.flush()
+    assert store.batches == [["one", "two"], ["three"]]
+    assert memory_services._indexed_ids["tony"] == {memory_services.memory_id(t) for t in ["one", "two", "three"]}
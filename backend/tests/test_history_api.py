@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend import auth
+from backend.brain import memory_manager as mem
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(mem, "USERS_DIR", str(tmp_path))
+    monkeypatch.setattr(mem, "session_cache", type(mem.session_cache)())
+
+    async def fake_user(token: str = None):
+        return {"username": "tony"}
+
+    app.dependency_overrides[auth.get_current_user] = fake_user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def chat_id(client):
+    chat_id = mem.create_new_chat(user_id="tony")["chat_id"]
+    for i in range(5):
+        mem.append_to_chat(chat_id, "human", f"m{i}", user_id="tony")
+    return chat_id
+
+
+def _contents(res):
+    return [m["content"] for m in res.json()]
+
+
+def test_cursor_paging(client, chat_id):
+    url = f"/chats/{chat_id}/history"
+    assert _contents(client.get(url)) == ["m0", "m1", "m2", "m3", "m4"]
+    assert _contents(client.get(url, params={"limit": 2})) == ["m3", "m4"]
+    assert _contents(client.get(url, params={"before": 3, "limit": 2})) == ["m1", "m2"]
+    assert _contents(client.get(url, params={"after": 2})) == ["m3", "m4"]
+    assert [m["index"] for m in client.get(url, params={"after": 0, "limit": 2}).json()] == [1, 2]
+
+
+def test_unchanged_view_answers_304(client, chat_id):
+    url = f"/chats/{chat_id}/history"
+    etag = client.get(url, params={"limit": 2}).headers["etag"]
+
+    res = client.get(url, params={"limit": 2}, headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+    mem.append_to_chat(chat_id, "ai", "new", user_id="tony")
+    res = client.get(url, params={"limit": 2}, headers={"If-None-Match": etag})
+    assert res.status_code == 200 and _contents(res) == ["m4", "new"]
+
+
+def test_etag_of_one_page_does_not_validate_another(client, chat_id):
+    url = f"/chats/{chat_id}/history"
+    page_etag = client.get(url, params={"limit": 1}).headers["etag"]
+
+    res = client.get(url, headers={"If-None-Match": page_etag})
+    assert res.status_code == 200
+    assert _contents(res) == ["m0", "m1", "m2", "m3", "m4"]
+    assert res.headers["etag"] != page_etag
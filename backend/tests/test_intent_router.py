@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from backend.brain import intent_router
+
+
+def test_app_commands_resolve_against_the_agent_table():
+    assert intent_router.match("open notepad") == {"action": "open_app", "app": "notepad"}
+    assert intent_router.match("Jarvis, please launch VS Code.") == {"action": "open_app", "app": "vscode"}
+    assert intent_router.match("open notpad") == {"action": "open_app", "app": "notepad"}
+    assert intent_router.match("open file explorer") == {"action": "open_app", "app": "file_explorer"}
+    assert intent_router.match("close chrome") == {"action": "close_website", "browser": "chrome"}
+    assert intent_router.match("close task manager") == {"action": "close_app", "app": "taskmgr"}
+    # Image names with spaces go through as-is; the agent passes them to taskkill as one argument
+    assert intent_router.match("close docker") == {"action": "close_app", "app": "Docker Desktop"}
+
+
+def test_volume_and_websites():
+    assert intent_router.match("set volume to 40") == {"action": "set_volume", "level": 40}
+    assert intent_router.match("volume 40%") == {"action": "set_volume", "level": 40}
+    assert intent_router.match("mute") == {"action": "set_volume", "level": 0}
+    assert intent_router.match("volume 400") is None
+    assert intent_router.match("go to github.com") == {"action": "open_website", "url": "https://github.com"}
+    assert intent_router.match("open github.com") == {"action": "open_website", "url": "https://github.com"}
+    assert intent_router.match("open www.example.org/docs") == {"action": "open_website", "url": "https://www.example.org/docs"}
+    assert intent_router.match("open http://intranet.local") == {"action": "open_website", "url": "http://intranet.local"}
+
+
+def test_bare_open_of_a_file_name_is_not_a_website():
+    assert intent_router.match("open notes.txt") is None
+    assert intent_router.match("open readme.md") is None
+    assert intent_router.match("open report.pdf") is None
+
+
+def test_anything_unclear_falls_back_to_the_llm():
+    assert intent_router.match("open youtube") is None
+    assert intent_router.match("open word and write a cover letter") is None
+    assert intent_router.match("what is notepad") is None
+    assert intent_router.match("close settings") is None
@@ -0,0 +1,56 @@
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.brain import llm_services
+from backend.brain.response_cache import ResponseCache
+from backend.brain.stub_llm import StubChatModel
+
+
+class SlowStub(StubChatModel):
+    def __init__(self, delay):
+        super().__init__("ok")
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, messages, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            return self.invoke(messages)
+        finally:
+            self.active -= 1
+
+
+def _brain_with(monkeypatch, llm):
+    monkeypatch.setattr(llm_services, "LLM_BACKEND", "stub")
+    inst = llm_services.Brain()
+    inst.llm = llm
+    monkeypatch.setattr(llm_services, "_brain_instance", inst)
+    monkeypatch.setattr(llm_services, "response_cache", ResponseCache())
+    return inst
+
+
+def test_concurrent_calls_respect_the_limit(monkeypatch):
+    stub = SlowStub(delay=0.02)
+    _brain_with(monkeypatch, stub)
+    monkeypatch.setattr(llm_services, "_llm_semaphore", None)
+    monkeypatch.setattr(llm_services, "LLM_CONCURRENCY", 2)
+
+    async def main():
+        return await asyncio.gather(*[llm_services.aget_brain_response("hi", [], []) for _ in range(6)])
+
+    assert asyncio.run(main()) == ["ok"] * 6
+    assert stub.peak == 2
+    assert llm_services._llm_stats["in_flight"] == 0
+
+
+def test_slow_model_times_out(monkeypatch):
+    inst = _brain_with(monkeypatch, SlowStub(delay=1))
+
+    reply = asyncio.run(inst.agenerate_response("hi", [], "", timeout=0.01))
+
+    assert reply == llm_services.TIMEOUT_RESPONSE
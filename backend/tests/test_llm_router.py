@@ -0,0 +1,79 @@
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from backend.brain import llm_router
+from backend.brain.llm_router import LLMRouter, Provider, NoHealthyProvider
+from backend.brain.stub_llm import StubChatModel
+
+
+class FailingStub(StubChatModel):
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        raise ConnectionError("upstream down")
+
+    async def ainvoke(self, messages, **kwargs):
+        return self.invoke(messages)
+
+    async def astream(self, messages, **kwargs):
+        self.invoke(messages)
+        yield  # pragma: no cover
+
+
+def _router(*llms, hedge=True):
+    return LLMRouter([Provider(f"p{i}", llm) for i, llm in enumerate(llms)], hedge=hedge)
+
+
+def test_hedges_to_the_next_provider_when_the_first_is_slow(monkeypatch):
+    monkeypatch.setattr(llm_router, "DEFAULT_HEDGE_SECONDS", 0.05)
+    slow, fast = StubChatModel("slow", latency=1.0), StubChatModel("fast")
+    router = _router(slow, fast)
+
+    reply = asyncio.run(router.ainvoke([]))
+
+    assert reply.content == "fast"
+    assert router.hedged_requests == 1 and router.hedge_wins == 1
+    assert router.providers[1].wins == 1
+
+
+def test_no_hedge_when_the_primary_answers_in_time(monkeypatch):
+    monkeypatch.setattr(llm_router, "DEFAULT_HEDGE_SECONDS", 0.5)
+    primary, backup = StubChatModel("primary"), StubChatModel("backup")
+    router = _router(primary, backup)
+
+    assert asyncio.run(router.ainvoke([])).content == "primary"
+    assert backup.calls == 0 and router.hedged_requests == 0
+
+
+def test_failover_and_circuit_breaker():
+    broken, healthy = FailingStub("x"), StubChatModel("ok")
+    router = _router(broken, healthy)
+    router.providers[0].breaker.failure_threshold = 2
+
+    for _ in range(3):
+        assert router.invoke([]).content == "ok"
+        assert asyncio.run(router.ainvoke([])).content == "ok"
+
+    # The breaker opened after two failures; later calls skip the broken provider
+    assert router.providers[0].breaker.state == "open"
+    assert broken.calls == 2
+    assert router.stats()["providers"]["p0"]["circuit"] == "open"
+
+
+def test_all_providers_failing_raises():
+    router = _router(FailingStub("x"))
+    with pytest.raises(NoHealthyProvider):
+        asyncio.run(router.ainvoke([]))
+
+
+def test_stream_hedges_on_first_token(monkeypatch):
+    monkeypatch.setattr(llm_router, "DEFAULT_HEDGE_SECONDS", 0.05)
+    router = _router(StubChatModel("slow reply", latency=1.0), StubChatModel("fast reply"))
+
+    async def collect():
+        return "".join([chunk.content async for chunk in router.astream([])])
+
+    assert asyncio.run(collect()) == "fast reply"
+    assert router.hedged_requests == 1
@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+import pytest
+from backend.brain import memory_dedup
+
+
+def test_rejects_near_duplicates():
+    index = memory_dedup.DedupIndex()
+    assert index.add("User Mentioned: my name is Tony")
+    assert not index.add("User Mentioned: My name is Tony!")
+    assert not index.add("user mentioned:   my name is tony")
+    assert index.add("User Mentioned: I live in Malibu")
+    assert len(index) == 2
+
+
+def test_greetings_and_filler_do_not_make_a_new_fact():
+    index = memory_dedup.DedupIndex()
+    assert index.add("User Mentioned: my name is Tony Stark")
+    assert not index.add("User Mentioned: Hi Jarvis, my name is Tony Stark")
+    assert not index.add("User Mentioned: my name is tony stark, remember that")
+    assert not index.add("User Mentioned: Hey, my name is Tony")
+    assert len(index) == 1
+
+
+def test_added_detail_is_a_new_fact():
+    index = memory_dedup.DedupIndex()
+    assert index.add("User Mentioned: my family and I live in Malibu")
+    assert index.add("User Mentioned: my family and I live in Malibu California")
+    assert len(index) == 2
+
+
+def test_bulk_dedupe_keeps_first_occurrence():
+    memories = [
+        "User Mentioned: my name is Tony",
+        "User Mentioned: I like coffee",
+        "User Mentioned: my name is Tony.",
+    ]
+    assert memory_dedup.dedupe(memories) == memories[:2]
+
+
+def test_updated_facts_are_not_duplicates():
+    index = memory_dedup.DedupIndex()
+    assert index.add("User Mentioned: my name is Tony and I am 40")
+    assert index.add("User Mentioned: my name is Tony and I am 41")
+    assert index.add("User Mentioned: my name is Tony and my wife is Pepper")
+    assert index.add("User Mentioned: my name is Tony and my wife is Sarah")
+    # The label alone never makes two facts alike
+    assert index.add("User Mentioned: I live in Malibu")
+    assert len(index) == 5
+
+
+def test_failed_write_does_not_block_the_fact(tmp_path, monkeypatch):
+    from backend.brain import memory_manager as mem
+
+    monkeypatch.setattr(mem, "USERS_DIR", str(tmp_path))
+    monkeypatch.setattr(mem, "STORAGE_BACKEND", "json")
+    monkeypatch.setattr(memory_dedup, "_indexes", {})
+    mem.init_db("tony")
+    real_open = open
+
+    def failing_open(path, *args, **kwargs):
+        if str(path).endswith("memory.json") and args and args[0] == "r+":
+            raise OSError("disk full")
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", failing_open)
+    with pytest.raises(OSError):
+        mem.add_long_term_memory("User Mentioned: I like coffee", user_id="tony")
+    monkeypatch.setattr("builtins.open", real_open)
+
+    assert mem.add_long_term_memory("User Mentioned: I like coffee", user_id="tony")
+    assert mem.get_long_term_memory(user_id="tony") == ["User Mentioned: I like coffee"]
@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import uuid
+import pytest
+from backend.brain import memory_services
+from backend.brain.memory_services import CachedEmbeddings, HashingEmbeddings
+
+MEMORIES = [
+    "User Mentioned: my favourite colour is red",
+    "User Mentioned: I live in Malibu",
+    "User Mentioned: my wife is called Pepper",
+    "User Mentioned: I drive an Audi R8",
+    "User Mentioned: I am allergic to strawberries",
+    "User Mentioned: my dog is named Dum-E",
+]
+
+
+@pytest.fixture
+def user():
+    # Chroma caches clients by path, so every test gets its own collection directory
+    return f"tony-{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def offline_store(tmp_path, monkeypatch):
+    """Chroma in a temp dir with the hashing embedder: no model, no network."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(memory_services, "EMBEDDINGS_BACKEND", "local")
+    monkeypatch.setattr(memory_services, "_embeddings", CachedEmbeddings(HashingEmbeddings(), "test", path=""))
+    monkeypatch.setattr(memory_services, "_vector_stores", type(memory_services._vector_stores)())
+    monkeypatch.setattr(memory_services, "_indexed_ids", {})
+    return memory_services
+
+
+def test_retrieval_ranks_the_relevant_memory_first(offline_store, user):
+    found = offline_store.retrieve_relevant_memories(user, "what is my wife called", MEMORIES, k=3)
+    assert len(found) == 3
+    assert found[0] == "User Mentioned: my wife is called Pepper"
+
+
+def test_retrieval_respects_k_and_short_lists_skip_the_index(offline_store, user):
+    assert len(offline_store.retrieve_relevant_memories(user, "where do I live", MEMORIES, k=2)) == 2
+    # Fewer memories than k: all of them, newest first, without opening a store
+    assert offline_store.retrieve_relevant_memories("pepper", "anything", MEMORIES[:2], k=5) == list(reversed(MEMORIES[:2]))
+    assert "pepper" not in offline_store._vector_stores
+
+
+def test_sync_only_embeds_new_memories(offline_store, user):
+    offline_store.retrieve_relevant_memories(user, "car", MEMORIES, k=2)
+    misses = offline_store._embeddings.misses
+
+    offline_store.retrieve_relevant_memories(user, "car", MEMORIES + ["User Mentioned: I own a suit"], k=2)
+    # One new document; the repeated query is served from the embedding cache
+    assert offline_store._embeddings.misses == misses + 1
+
+
+def test_memories_removed_from_the_list_are_not_returned(offline_store, user):
+    duplicate = "User Mentioned: my wife is called Pepper."
+    offline_store.retrieve_relevant_memories(user, "what is my wife called", MEMORIES + [duplicate], k=2)
+
+    # Bulk dedup (or a manual edit) removed the duplicate from memory.json
+    found = offline_store.retrieve_relevant_memories(user, "what is my wife called", MEMORIES, k=2)
+    assert len(found) == 2 and duplicate not in found
+    assert found[0] == "User Mentioned: my wife is called Pepper"
+    # The stale vector is gone from the collection too
+    store = offline_store.get_vector_store(user)
+    assert store.get(ids=[offline_store.memory_id(duplicate)])["ids"] == []
@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from backend.brain.response_cache import ResponseCache
+
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = ResponseCache()
+    history = [{"role": "human", "content": "hi"}, {"role": "ai", "content": "Hello, sir."}]
+    assert cache.get("Who are you?", history, ["likes tea"]) is None
+    assert cache.put("Who are you?", history, ["likes tea"], "I am JARVIS.")
+
+    assert cache.get("who are you", history, ["likes tea"]) == "I am JARVIS."
+    # A different context window is a different request
+    assert cache.get("who are you", history[:1], ["likes tea"]) is None
+    assert cache.get("who are you", history, []) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_time_sensitive_commands_and_tool_replies_bypass():
+    cache = ResponseCache()
+    assert not cache.put("what time is it in Tokyo", [], [], "It is 9 PM.")
+    assert not cache.put("open notepad", [], [], "Done.")
+    assert not cache.put("who won the 2010 world cup", [], [], '{"query": "2010 world cup winner"}')
+
+    assert cache.get("what time is it in Tokyo", [], []) is None
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    import backend.brain.response_cache as rc
+    clock = [1000.0]
+    monkeypatch.setattr(rc.time, "time", lambda: clock[0])
+
+    cache = ResponseCache(ttl=10, max_entries=2)
+    cache.put("a", [], [], "A")
+    cache.put("b", [], [], "B")
+    cache.get("a", [], [])
+    cache.put("c", [], [], "C")
+    assert cache.get("b", [], []) is None
+    assert cache.get("a", [], []) == "A"
+
+    clock[0] += 11
+    assert cache.get("a", [], []) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_semantic_mode_matches_similar_prompts():
+    vectors = {"tell me a joke": [1.0, 0.0], "tell me a joke please": [0.99, 0.1], "define entropy": [0.0, 1.0]}
+    cache = ResponseCache(semantic=True, threshold=0.95, embed=lambda text: vectors[text])
+    cache.put("Tell me a joke", [], [], "Why did the robot...")
+
+    assert cache.get("tell me a joke please", [], []) == "Why did the robot..."
+    assert cache.get("define entropy", [], []) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResponseCache(enabled=False)
+    assert not cache.put("who are you", [], [], "I am JARVIS.")
+    assert cache.get("who are you", [], []) is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["bypassed"] == 1
+
+
+
+def test_async_semantic_lookups_embed_off_the_event_loop():
+    import asyncio
+    import threading
+    threads = []
+
+    def embed(text):
+        threads.append(threading.current_thread())
+        return [1.0, 0.0]
+
+    cache = ResponseCache(semantic=True, threshold=0.95, embed=embed)
+
+    async def turn():
+        assert await cache.aget("tell me a joke", [], []) is None
+        assert await cache.aput("tell me a joke", [], [], "Why did the robot...")
+        return await cache.aget("tell me a joke please", [], [])
+
+    assert asyncio.run(turn()) == "Why did the robot..."
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,107 @@
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from backend.brain import web_search
+from backend.brain.web_search import SearchCache, query_class
+
+
+def test_queries_are_classified_by_staleness():
+    assert query_class("Latest news about SpaceX") == "news"
+    assert query_class("weather in Pune") == "news"
+    assert query_class("Who is the founder of Tesla?") == "facts"
+    assert query_class("capital of Australia") == "facts"
+    assert query_class("best budget laptops") == "default"
+
+
+def test_normalized_queries_share_an_entry():
+    cache = SearchCache(max_entries=4, path="")
+    cache.put("Capital of Australia?", "Canberra")
+    assert cache.get("capital   of australia") == "Canberra"
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire_per_class(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(web_search.time, "time", lambda: now[0])
+    cache = SearchCache(path="", ttls={"news": 60, "facts": 3600})
+    cache.put("latest news", "headlines")
+    cache.put("capital of France", "Paris")
+
+    now[0] += 120
+    assert cache.get("latest news") is None
+    assert cache.get("capital of France") == "Paris"
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SearchCache(max_entries=2, path="")
+    cache.put("a query", "1")
+    cache.put("b query", "2")
+    cache.get("a query")
+    cache.put("c query", "3")
+    assert cache.get("b query") is None
+    assert cache.get("a query") == "1" and cache.get("c query") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "search_cache.json")
+    cache = SearchCache(path=path, save_interval=60)
+    cache.put("population of India", "1.4 billion")
+    assert not os.path.exists(path)  # put() leaves the file to the saver
+    cache.flush()
+    assert SearchCache(path=path).get("Population of India") == "1.4 billion"
+
+
+def test_background_save_batches_puts(tmp_path, monkeypatch):
+    path = str(tmp_path / "search_cache.json")
+    writes = []
+    real_replace = os.replace
+    monkeypatch.setattr(web_search.os, "replace", lambda src, dst: writes.append(dst) or real_replace(src, dst))
+
+    cache = SearchCache(path=path, save_interval=0.2)
+    cache.put("query 0", "0")
+    timer = cache._save_timer
+    for i in range(1, 5):
+        cache.put(f"query {i}", str(i))
+    assert writes == []
+    timer.join(2)
+
+    assert writes == [path]
+    assert SearchCache(path=path).get("query 4") == "4"
+    assert not cache.stats()["unsaved"]
+
+
+def test_asearch_caches_results_by_normalized_query(monkeypatch):
+    calls = []
+
+    async def fake_fetch(query):
+        calls.append(query)
+        return {"organic": [{"title": "Japan", "snippet": "Tokyo is the capital."}]}
+
+    monkeypatch.setenv("SERPER_API_KEY", "test-key")
+    monkeypatch.setattr(web_search, "search_cache", SearchCache(path=""))
+    monkeypatch.setattr(web_search, "fetch_results", fake_fetch)
+
+    first = asyncio.run(web_search.asearch("Capital of Japan"))
+    assert asyncio.run(web_search.asearch("capital of japan?")) == first
+    assert calls == ["Capital of Japan"]
+
+
+def test_disabled_and_failed_searches_are_not_cached(monkeypatch):
+    async def failing_fetch(query):
+        raise web_search.SearchError("down")
+
+    monkeypatch.setattr(web_search, "search_cache", SearchCache(path=""))
+    monkeypatch.setattr(web_search, "fetch_results", failing_fetch)
+
+    monkeypatch.delenv("SERPER_API_KEY", raising=False)
+    assert asyncio.run(web_search.asearch("anything")) == web_search.DISABLED_MESSAGE
+
+    monkeypatch.setenv("SERPER_API_KEY", "test-key")
+    with pytest.raises(web_search.SearchError):
+        asyncio.run(web_search.asearch("anything"))
+    assert web_search.search_cache.stats()["entries"] == 0
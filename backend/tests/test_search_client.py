@@ -0,0 +1,125 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from backend.brain import web_search
+from backend.brain.web_search import SearchCache, SearchError
+
+
+class FakeSerper(BaseHTTPRequestHandler):
+    """Answers POST /search like Serper; `plan` lists status codes to return first."""
+    plan = []
+    requests = []
+    delay = 0.0
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = type(self)
+        with cls.lock:
+            cls.requests.append((body, self.headers.get("X-API-KEY")))
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+            status = cls.plan.pop(0) if cls.plan else 200
+        time.sleep(cls.delay)
+        with cls.lock:
+            cls.active -= 1
+        payload = {"organic": [{"title": "t", "snippet": f"About {body['q']}."}]} if status == 200 else {}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serper(monkeypatch):
+    FakeSerper.plan, FakeSerper.requests = [], []
+    FakeSerper.delay, FakeSerper.active, FakeSerper.max_active = 0.0, 0, 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSerper)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+
+    monkeypatch.setenv("SERPER_API_KEY", "test-key")
+    monkeypatch.setattr(web_search, "SERPER_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(web_search, "RETRY_BACKOFF", 0.0)
+    monkeypatch.setattr(web_search, "search_cache", SearchCache(path=""))
+    monkeypatch.setattr(web_search, "_client", None)
+    yield FakeSerper
+    server.shutdown()
+    server.server_close()
+
+
+def _run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await web_search.aclose()
+    return asyncio.run(main())
+
+
+def test_async_search_posts_to_serper_and_formats_snippets(serper):
+    assert _run(web_search.asearch("python asyncio")) == "- t: About python asyncio."
+    body, key = serper.requests[0]
+    assert body == {"q": "python asyncio", "num": 5} and key == "test-key"
+
+
+def test_retries_server_errors_then_succeeds(serper):
+    serper.plan = [503, 429]
+    assert _run(web_search.asearch("retry me")) == "- t: About retry me."
+    assert len(serper.requests) == 3
+
+
+def test_gives_up_after_the_retries(serper, monkeypatch):
+    monkeypatch.setattr(web_search, "SEARCH_RETRIES", 1)
+    serper.plan = [500, 500, 500]
+    with pytest.raises(SearchError):
+        _run(web_search.asearch("always down"))
+    assert len(serper.requests) == 2
+
+
+def test_client_errors_are_not_retried(serper):
+    serper.plan = [403]
+    with pytest.raises(SearchError):
+        _run(web_search.asearch("bad key"))
+    assert len(serper.requests) == 1
+
+
+def test_read_timeout_is_enforced(serper, monkeypatch):
+    monkeypatch.setattr(web_search, "READ_TIMEOUT", 0.05)
+    monkeypatch.setattr(web_search, "SEARCH_RETRIES", 0)
+    serper.delay = 0.3
+    with pytest.raises(SearchError):
+        _run(web_search.asearch("slow"))
+
+
+def test_concurrency_is_limited_and_results_cached(serper, monkeypatch):
+    monkeypatch.setattr(web_search, "SEARCH_CONCURRENCY", 2)
+    serper.delay = 0.05
+
+    async def many():
+        return await asyncio.gather(*[web_search.asearch(f"query {i}") for i in range(6)])
+
+    assert len(_run(many())) == 6
+    assert serper.max_active <= 2
+    assert _run(web_search.asearch("Query 0?")) == "- t: About query 0."
+    assert len(serper.requests) == 6
+
+
+def test_missing_key_disables_search(serper, monkeypatch):
+    monkeypatch.delenv("SERPER_API_KEY")
+    assert _run(web_search.asearch("anything")) == web_search.DISABLED_MESSAGE
+    assert serper.requests == []
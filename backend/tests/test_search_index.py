@@ -0,0 +1,101 @@
+import sys
+import os
+import sqlite3
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from backend.brain import memory_manager as mem
+from backend.brain import search_index
+from backend.brain.session_cache import SessionCache
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(mem, "USERS_DIR", str(tmp_path))
+    monkeypatch.setattr(mem, "STORAGE_BACKEND", "json")
+    monkeypatch.setattr(mem, "session_cache", SessionCache())
+    monkeypatch.setattr(search_index, "_open", type(search_index._open)())
+    return mem
+
+
+def _index_path(user_id):
+    return os.path.join(mem._get_user_dir(user_id), search_index.INDEX_FILE)
+
+def _doc_count(user_id):
+    with sqlite3.connect(_index_path(user_id)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+
+def test_search_follows_appends_and_deletes(store):
+    chat_id = store.create_new_chat("tony")["chat_id"]
+    store.append_to_chat(chat_id, "human", "The arc reactor needs palladium", user_id="tony")
+    store.append_to_chat(chat_id, "ai", "Palladium levels are rising, sir", user_id="tony")
+
+    hits = search_index.search("tony", "pallad")
+    assert len(hits) == 2 and {h["chat_id"] for h in hits} == {chat_id}
+    assert "[" in hits[0]["snippet"]
+
+    store.delete_chat(chat_id, user_id="tony")
+    assert search_index.search("tony", "palladium") == []
+
+
+def test_existing_chats_are_backfilled_once(store):
+    chat_id = store.create_new_chat("tony")["chat_id"]
+    search_index.search("tony", "warm up")  # builds the index
+    search_index._open.clear()
+    os.remove(_index_path("tony"))
+
+    # The listener opens (and backfills) the missing index for this append
+    store.append_to_chat(chat_id, "human", "Jarvis, run the suit diagnostics", user_id="tony")
+    assert [h["chat_id"] for h in search_index.search("tony", "diagnostics")] == [chat_id]
+    assert _doc_count("tony") == 1
+
+
+def test_partial_backfill_is_redone(store):
+    chat_id = store.create_new_chat("tony")["chat_id"]
+    for text in ["mark one", "mark two", "mark three"]:
+        store.append_to_chat(chat_id, "human", text, user_id="tony")
+    search_index.search("tony", "mark")
+    search_index._open.clear()
+
+    # Simulate a crash mid-backfill: rows partly written, completion never recorded
+    with sqlite3.connect(_index_path("tony")) as conn:
+        conn.execute("DELETE FROM docs WHERE content != 'mark one'")
+        conn.execute("DELETE FROM meta")
+
+    assert len(search_index.search("tony", "mark")) == 3
+    assert _doc_count("tony") == 3
+
+
+def test_concurrent_appends_are_indexed_once(store):
+    chat_id = store.create_new_chat("tony")["chat_id"]
+    for i in range(20):
+        store.append_to_chat(chat_id, "human", f"message {i}", user_id="tony")
+    search_index._open.clear()
+    os.remove(_index_path("tony"))
+
+    def append(i):
+        store.append_to_chat(chat_id, "ai", f"reply {i}", user_id="tony")
+
+    threads = [threading.Thread(target=append, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert _doc_count("tony") == 28
+    assert len(search_index.search("tony", "reply", limit=50)) == 8
+
+
+def test_evicted_index_stays_usable_until_released(store, monkeypatch):
+    monkeypatch.setattr(search_index, "MAX_OPEN_INDEXES", 1)
+    store.create_new_chat("tony")
+    store.create_new_chat("pepper")
+
+    with search_index._using("tony") as held:
+        search_index.search("pepper", "anything")  # evicts tony's index
+        assert held.retired
+        held.conn.execute("SELECT COUNT(*) FROM docs").fetchone()  # still open
+    with pytest.raises(sqlite3.ProgrammingError):
+        held.conn.execute("SELECT 1")
@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.brain import search_results
+from backend.brain.context_window import count_tokens
+
+SERPER_RESPONSE = {
+    "knowledgeGraph": {
+        "title": "Eiffel Tower",
+        "type": "Tower in Paris, France",
+        "description": "The Eiffel Tower is a wrought-iron lattice tower on the Champ de Mars in Paris.",
+        "attributes": {"Height": "330 m", "Opened": "31 March 1889"},
+    },
+    "organic": [
+        {"title": "Paris travel guide", "snippet": "Paris has many museums, cafes and famous landmarks to visit."},
+        {"title": "Eiffel Tower - Wikipedia", "snippet": "The Eiffel Tower is 330 metres tall, about the height of an 81-storey building."},
+        {"title": "Eiffel Tower mirror", "snippet": "The Eiffel Tower is 330 metres tall, about the height of an 81 storey building!"},
+        {"title": "Tickets", "snippet": "Book tickets online to skip the queue at the tower."},
+    ],
+}
+
+
+def test_extracts_graph_and_organic_passages():
+    passages = search_results.extract_passages(SERPER_RESPONSE)
+    sources = [p.source for p in passages]
+    assert sources.count("graph") == 4 and sources.count("organic") == 4
+    assert passages[0].text == "Eiffel Tower: Tower in Paris, France."
+
+
+def test_ranks_relevant_snippets_above_google_order():
+    ranked = search_results.rank("how tall is the eiffel tower", search_results.extract_passages(SERPER_RESPONSE))
+    assert "330 metres tall" in ranked[0].text or "330 m" in ranked[0].text
+    assert ranked[-1].title in ("Paris travel guide", "Tickets")
+
+
+def test_answer_box_stays_first():
+    data = dict(SERPER_RESPONSE, answerBox={"answer": "330 m"})
+    ranked = search_results.rank("eiffel tower tickets", search_results.extract_passages(data))
+    assert ranked[0].source == "answer"
+
+
+def test_near_duplicate_snippets_are_dropped():
+    packed = search_results.pack("eiffel tower height", SERPER_RESPONSE, budget=1000)
+    assert packed.count("81") == 1
+    assert packed.startswith("- ")
+
+
+def test_packs_within_the_token_budget():
+    packed = search_results.pack("eiffel tower height", SERPER_RESPONSE, budget=40)
+    assert count_tokens(packed) <= 40 + len(packed.splitlines())
+    assert "330" in packed
+
+
+def test_overlong_best_passage_is_shortened():
+    data = {"organic": [{"title": "Long", "snippet": "tower " * 500}]}
+    packed = search_results.pack("tower", data, budget=30)
+    assert packed.endswith("...") and count_tokens(packed) <= 30
+
+
+def test_empty_response():
+    assert search_results.pack("anything", {}) == search_results.NO_RESULTS_MESSAGE
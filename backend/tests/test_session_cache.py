@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from backend.brain.session_cache import SessionCache, MESSAGE_OVERHEAD
+
+
+def test_write_through_and_hit_counters():
+    cache = SessionCache()
+    assert cache.get("u", "c") is None
+    cache.put("u", "c", [{"role": "human", "content": "hi"}])
+    cache.append("u", "c", {"role": "ai", "content": "hello"})
+
+    session = cache.get("u", "c")
+    assert [m["content"] for m in session.history] == ["hi", "hello"]
+    assert [m.content for m in session.messages] == ["hi", "hello"]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used():
+    cache = SessionCache(max_bytes=2 * (MESSAGE_OVERHEAD + 1))
+    cache.put("u", "a", [{"role": "human", "content": "a"}])
+    cache.put("u", "b", [{"role": "human", "content": "b"}])
+    cache.get("u", "a")
+    cache.put("u", "c", [{"role": "human", "content": "c"}])
+
+    assert cache.get("u", "b") is None
+    assert cache.get("u", "a") is not None
+
+
+def test_stale_load_is_not_cached():
+    cache = SessionCache()
+    epoch = cache.epoch("u", "c")
+    cache.append("u", "c", {"role": "human", "content": "raced"})
+    cache.put("u", "c", [], epoch)
+    assert cache.get("u", "c") is None
+
+
+def test_load_during_append_does_not_duplicate_the_message(tmp_path, monkeypatch):
+    import threading
+    from backend.brain import memory_manager as mem
+    monkeypatch.setattr(mem, "USERS_DIR", str(tmp_path))
+    monkeypatch.setattr(mem, "STORAGE_BACKEND", "json")
+    monkeypatch.setattr(mem, "session_cache", SessionCache())
+
+    chat_id = mem.create_new_chat("tony")["chat_id"]
+    mem.append_to_chat(chat_id, "human", "m0", user_id="tony")
+    mem.session_cache.clear()
+
+    # A reader misses the cache right after the message hits disk
+    real_write = mem._write_message
+    readers, seen = [], []
+
+    def write_then_read(*args):
+        stored = real_write(*args)
+        reader = threading.Thread(target=lambda: seen.append(mem.get_chat_history(chat_id, "tony")))
+        reader.start()
+        reader.join(0.2)
+        readers.append(reader)
+        return stored
+
+    monkeypatch.setattr(mem, "_write_message", write_then_read)
+    mem.append_to_chat(chat_id, "human", "m1", user_id="tony")
+    readers[0].join()
+
+    assert [m["content"] for m in seen[0]] == ["m0", "m1"]
+    assert [m["content"] for m in mem.get_chat_history(chat_id, "tony")] == ["m0", "m1"]
@@ -0,0 +1,102 @@
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from backend.brain.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    flight = SingleFlight("test")
+    upstream = []
+
+    async def fetch():
+        upstream.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*[flight.run("k", fetch) for _ in range(5)], flight.run("other", fetch))
+
+    assert asyncio.run(main()) == ["result"] * 6
+    assert len(upstream) == 2
+    assert flight.stats()["coalesced"] == 4 and flight.stats()["in_flight"] == 0
+
+
+def test_cancelling_one_caller_keeps_the_shared_call_alive():
+    flight = SingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.run("k", fetch))
+        second = asyncio.ensure_future(flight.run("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+    assert flight.cancelled == 0
+
+
+def test_last_caller_leaving_cancels_upstream():
+    flight = SingleFlight("test")
+    cancelled = []
+
+    async def fetch():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        caller = asyncio.ensure_future(flight.run("k", fetch))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert cancelled == [True] and flight.cancelled == 1
+
+
+def test_shared_stream_replays_to_late_subscribers():
+    flight = SingleFlight("test")
+    produced = []
+
+    async def tokens():
+        for token in ["a", "b", "c"]:
+            produced.append(token)
+            await asyncio.sleep(0.005)
+            yield token
+
+    async def read(delay):
+        await asyncio.sleep(delay)
+        return [t async for t in flight.stream("k", tokens)]
+
+    async def main():
+        return await asyncio.gather(read(0), read(0.007))
+
+    assert asyncio.run(main()) == [["a", "b", "c"], ["a", "b", "c"]]
+    assert produced == ["a", "b", "c"]
+    assert flight.upstream == 1 and flight.coalesced == 1
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.001)
+        raise ValueError("search down")
+
+    async def main():
+        return await asyncio.gather(flight.run("k", fail), flight.run("k", fail), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.failed == 1
@@ -0,0 +1,96 @@
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.brain import speculative_search
+from backend.brain.speculative_search import Speculator, score, guess_query, query_similarity
+
+
+class FakeSearch:
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.queries = []
+
+    async def __call__(self, query):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        return f"results for {query}"
+
+
+def test_scores_recency_and_search_requests_high():
+    assert score("What's the latest news about SpaceX?") >= speculative_search.THRESHOLD
+    assert score("search for the weather in Pune today") >= speculative_search.THRESHOLD
+    assert score("Tell me a joke") == 0.0
+    assert score("open notepad") == 0.0
+    assert score("hi") == 0.0
+
+
+def test_guessed_query_matches_what_the_model_would_search():
+    assert guess_query("Jarvis, can you search for the latest iPhone price?") == "the latest iphone price"
+    assert query_similarity("latest news about SpaceX", "SpaceX latest news") == 1.0
+    assert query_similarity("weather in Pune today", "stock price of Tesla") == 0.0
+
+
+def test_matching_query_reuses_the_speculative_result():
+    search = FakeSearch()
+    speculator = Speculator(threshold=0.5, enabled=True)
+
+    async def turn():
+        speculation = speculator.start("What is the latest news about SpaceX?", search)
+        await asyncio.sleep(0.005)  # the first LLM call
+        try:
+            return await speculation.results_for("SpaceX latest news")
+        finally:
+            speculation.close()
+
+    assert asyncio.run(turn()) == "results for what is the latest news about spacex"
+    assert len(search.queries) == 1
+    assert speculator.stats()["used"] == 1 and speculator.stats()["precision"] == 1.0
+
+
+def test_different_query_searches_again_and_counts_the_miss():
+    search = FakeSearch()
+    speculator = Speculator(threshold=0.5, enabled=True)
+
+    async def turn():
+        speculation = speculator.start("latest news today", search)
+        result = await speculation.results_for("Mumbai weather forecast")
+        speculation.close()
+        return result
+
+    assert asyncio.run(turn()) == "results for Mumbai weather forecast"
+    assert speculator.stats()["mismatched"] == 1
+
+
+def test_unused_speculation_is_cancelled_and_counted_as_wasted():
+    search = FakeSearch(delay=1.0)
+    speculator = Speculator(threshold=0.5, enabled=True)
+
+    async def turn():
+        speculation = speculator.start("what's the weather today", search)
+        await asyncio.sleep(0)
+        speculation.close()  # the model answered without a search
+        await asyncio.sleep(0)
+        return speculation.task
+
+    task = asyncio.run(turn())
+    assert task.cancelled()
+    stats = speculator.stats()
+    assert stats["wasted"] == 1 and stats["precision"] == 0.0
+    assert sum(stats["by_score"][b].get("wasted", 0) for b in stats["by_score"]) == 1
+
+
+def test_low_scores_do_not_search_until_asked():
+    search = FakeSearch()
+    speculator = Speculator(threshold=0.5, enabled=True)
+
+    async def turn():
+        speculation = speculator.start("how do rainbows form", search)
+        assert search.queries == []
+        result = await speculation.results_for("rainbow formation")
+        speculation.close()
+        return result
+
+    assert asyncio.run(turn()) == "results for rainbow formation"
+    assert speculator.stats()["missed"] == 1 and speculator.stats()["recall"] == 0.0
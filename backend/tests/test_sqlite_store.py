@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from backend.brain import sqlite_store
+from backend.brain.sqlite_store import ConnectionPool, PoolTimeout
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    pool = ConnectionPool(str(tmp_path / "jarvis.db"), size=2, timeout=0.2)
+    monkeypatch.setattr(sqlite_store, "_pool", pool)
+    yield sqlite_store
+    pool.close()
+
+
+def test_chat_crud(store):
+    chat_id = store.create_new_chat("tony")["chat_id"]
+    assert store.append_to_chat(chat_id, "human", "hello", user_id="tony")
+    assert store.append_to_chat(chat_id, "ai", "hi sir", user_id="tony")
+    assert store.rename_chat(chat_id, "Greetings", "tony")
+
+    chats = store.get_all_chats("tony")
+    assert [(c["name"], c["message_count"]) for c in chats] == [("Greetings", 2)]
+    assert [m["content"] for m in store.get_chat_history(chat_id, "tony")] == ["hello", "hi sir"]
+    assert store.get_all_chats("pepper") == []
+
+    assert store.delete_chat(chat_id, "tony")
+    assert store.get_all_chats("tony") == []
+    assert store.get_chat_history(chat_id, "tony") == []
+    assert not store.delete_chat(chat_id, "tony")
+
+
+def test_append_to_missing_chat_writes_nothing(store):
+    assert not store.append_to_chat("missing", "human", "lost", user_id="tony")
+    assert store.get_chat_history("missing", "tony") == []
+    assert store.get_chat_version("missing", "tony") is None
+
+
+def test_chat_page_cursor_walks_every_chat_once(store):
+    ids = []
+    for i in range(5):
+        chat_id = store.create_new_chat("tony")["chat_id"]
+        store.append_to_chat(chat_id, "human", f"m{i}", user_id="tony", timestamp=f"2026-01-0{i + 1}T00:00:00")
+        ids.append(chat_id)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.get_chat_page("tony", limit=2, cursor=cursor)
+        seen += [c["chat_id"] for c in page]
+        if cursor is None:
+            break
+    assert seen == list(reversed(ids))
+
+
+def test_history_is_paged_without_holding_connections(store, monkeypatch):
+    monkeypatch.setattr(sqlite_store, "HISTORY_PAGE_SIZE", 2)
+    chat_id = store.create_new_chat("tony")["chat_id"]
+    for i in range(5):
+        store.append_to_chat(chat_id, "human", f"m{i}", user_id="tony", timestamp="2026-01-01T00:00:00")
+
+    # More open readers than pooled connections must not block writers
+    readers = [store.iter_chat_history(chat_id, "tony") for _ in range(3)]
+    assert [next(r)["content"] for r in readers] == ["m0", "m0", "m0"]
+    assert store.append_to_chat(chat_id, "ai", "still writable", user_id="tony")
+    assert [m["content"] for m in readers[0]] == ["m1", "m2", "m3", "m4", "still writable"]
+
+
+def test_exhausted_pool_times_out(store):
+    pool = sqlite_store.get_pool()
+    with pool.connection(), pool.connection():
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
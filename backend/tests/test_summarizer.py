@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from backend.brain import memory_manager as mem
+from backend.brain import summarizer
+
+
+def test_old_turns_fold_into_summary(tmp_path, monkeypatch):
+    monkeypatch.setattr(mem, "USERS_DIR", str(tmp_path))
+    monkeypatch.setattr(summarizer, "TRIGGER_MESSAGES", 6)
+    monkeypatch.setattr(summarizer, "KEEP_RECENT", 2)
+    summarizer.set_summarizer(lambda previous, messages: " ".join(m["content"] for m in messages))
+    try:
+        chat_id = mem.create_new_chat(user_id="tony")["chat_id"]
+        for i in range(8):
+            mem._write_message(chat_id, {"role": "human", "content": f"m{i}", "timestamp": str(i)}, "tony")
+        mem.session_cache.clear()
+
+        assert summarizer.compact_chat(chat_id, "tony")
+        assert mem.get_chat_summary(chat_id, user_id="tony") == {"summary": "m0 m1 m2 m3 m4 m5", "covered": 6}
+
+        summary, tail = summarizer.prompt_history(chat_id, "tony", mem.get_chat_history(chat_id, user_id="tony"))
+        assert summary == "m0 m1 m2 m3 m4 m5"
+        assert [m["content"] for m in tail] == ["m6", "m7"]
+    finally:
+        summarizer.set_summarizer(None)
@@ -0,0 +1,25 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from backend.brain.tool_stream import ToolCallDetector, first_json_object, find_tool_call
+
+
+def test_braces_inside_strings_are_ignored():
+    text = 'Sure: {"query": "what does } mean in {regex}", "note": "a \\"quoted\\" {"} trailing'
+    assert first_json_object(text) == '{"query": "what does } mean in {regex}", "note": "a \\"quoted\\" {"}'
+    assert find_tool_call(text)["query"] == "what does } mean in {regex}"
+
+
+def test_detector_fires_on_the_closing_brace():
+    detector = ToolCallDetector()
+    chunks = ['{"act', 'ion": "open_app", ', '"app": "not{pad}"', '}', " and more text"]
+
+    results = [detector.feed(chunk) for chunk in chunks[:3]]
+    assert results == [None, None, None] and detector.in_object
+    assert detector.feed(chunks[3]) == {"action": "open_app", "app": "not{pad}"}
+
+
+def test_non_tool_objects_are_skipped():
+    assert find_tool_call('Use {name} or {"x": 1} here') is None
+    assert find_tool_call('{"x": 1} then {"query": "news"}') == {"query": "news"}
+    assert first_json_object("no json here") is None
@@ -0,0 +1,59 @@
+import sys
+import os
+import asyncio
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from backend.worker_pool import BoundedPool, PoolBusy
+
+
+def test_run_returns_result_and_counts():
+    pool = BoundedPool("test", workers=2, queue_limit=2)
+    result = asyncio.run(pool.run(lambda a, b: a + b, 2, 3))
+
+    assert result == 5
+    stats = pool.stats()
+    assert stats["completed"] == 1 and stats["pending"] == 0
+
+
+def test_rejects_when_queue_is_full():
+    pool = BoundedPool("test", workers=1, queue_limit=1)
+    release = threading.Event()
+    running = pool.submit(release.wait)
+    queued = pool.submit(lambda: "queued")
+
+    with pytest.raises(PoolBusy):
+        pool.submit(lambda: "rejected")
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    assert running.result(timeout=5) is True
+    assert queued.result(timeout=5) == "queued"
+    assert pool.submit(lambda: "after").result(timeout=5) == "after"
+
+
+def test_event_loop_stays_responsive():
+    pool = BoundedPool("test", workers=1, queue_limit=4)
+    release = threading.Event()
+
+    async def main():
+        job = asyncio.ensure_future(pool.run(release.wait))
+        # The loop keeps serving other coroutines while the job blocks its thread
+        await asyncio.sleep(0.01)
+        assert not job.done()
+        release.set()
+        return await job
+
+    assert asyncio.run(main()) is True
+
+
+def test_failures_are_counted():
+    pool = BoundedPool("test", workers=1, queue_limit=1)
+
+    def boom():
+        raise ValueError("bad hash")
+
+    with pytest.raises(ValueError):
+        asyncio.run(pool.run(boom))
+    assert pool.stats()["failed"] == 1
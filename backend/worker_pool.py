@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# BOUNDED WORKER POOL
+# Runs blocking calls (bcrypt, model calls, ...) on a fixed set of threads for
+# async endpoints. At most `workers` jobs run and at most `queue_limit` wait;
+# anything beyond that is rejected with PoolBusy instead of piling up.
+
+
+class PoolBusy(Exception):
+    """Raised when a pool's queue is full."""
+
+
+class BoundedPool:
+    def __init__(self, name: str, workers: int, queue_limit: int):
+        self.name = name
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_pending = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs); returns a concurrent.futures.Future or raises PoolBusy."""
+        with self._lock:
+            if self._pending >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise PoolBusy(f"{self.name} pool is full ({self._pending} jobs pending)")
+            self._pending += 1
+            self.max_pending = max(self.max_pending, self._pending)
+        queued_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._wait_seconds += started - queued_at
+                    self._run_seconds += time.perf_counter() - started
+
+        future = self._executor.submit(job)
+        future.add_done_callback(self._done)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Awaitable submit(); the event loop stays free while fn runs."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self._wait_seconds / finished * 1000, 2) if finished else 0.0,
+                "avg_run_ms": round(self._run_seconds / finished * 1000, 2) if finished else 0.0,
+            }
@@ -86,6 +86,61 @@ export const sendMessage = async (text: string, chatId: string | null) => {
   return await res.json();
 };
 
+// Streaming variant of sendMessage: calls onToken as text arrives (Server-Sent Events)
+// and resolves with the final { response, chat_id } once the reply is complete.
+export interface StreamEvent {
+  type: "start" | "token" | "tool" | "done" | "error";
+  text?: string;
+  response?: string;
+  chat_id?: string;
+  detail?: string;
+}
+
+export const streamMessage = async (
+  text: string,
+  chatId: string | null,
+  onToken: (text: string) => void,
+  onStart?: (chatId: string) => void
+): Promise<{ response: string; chat_id: string }> => {
+  const res = await fetch(`${API_BASE}/chat/stream`, {
+    method: "POST",
+    headers: {
+        "Content-Type": "application/json",
+        ...getAuthHeaders()
+    },
+    body: JSON.stringify({ text, chatId: chatId }),
+  });
+
+  if (res.status === 401) {
+    window.location.href = "/login";
+  }
+  if (!res.ok || !res.body) throw new Error(`Stream failed: ${res.status}`);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const line = buffer.slice(0, boundary).trim();
+      buffer = buffer.slice(boundary + 2);
+      if (!line.startsWith("data: ")) continue;
+
+      const event: StreamEvent = JSON.parse(line.slice(6));
+      if (event.type === "start" && event.chat_id) onStart?.(event.chat_id);
+      else if (event.type === "token" && event.text) onToken(event.text);
+      else if (event.type === "done") return { response: event.response ?? "", chat_id: event.chat_id ?? "" };
+      else if (event.type === "error") throw new Error(event.detail);
+    }
+  }
+  throw new Error("Stream ended before the reply was complete");
+};
+
 // MULTIMEDIA (Vision/Voice)
 export const sendImageQuestion = async (file: File, question: string, chatId: string | null) => {
     const form = new FormData();
@@ -198,18 +198,20 @@ export default function ChatInterface() {
 
   const processResponse = async (text: string) => {
     try {
-      const data = await api.sendMessage(text, activeChatId);
-      
-      if (data.chat_id && data.chat_id !== activeChatId) {
-          setActiveChatId(data.chat_id);
-      }
-
-      addMessage("jarvis", data.response);
+      // Render the reply as it streams in, then settle on the final text
+      addMessage("jarvis", "");
+      const data = await api.streamMessage(
+        text,
+        activeChatId,
+        (token) => updateLastMessage((prev) => prev + token),
+        (chatId) => { if (chatId !== activeChatId) setActiveChatId(chatId); }
+      );
+      updateLastMessage(() => data.response);
       await playAudioResponse(data.response);
 
     } catch (error) {
       console.error("Error fetching chat response:", error);
-      addMessage("jarvis", "I'm having trouble connecting to my brain right now.");
+      updateLastMessage(() => "I'm having trouble connecting to my brain right now.");
     }
   };
 
@@ -259,6 +261,14 @@ export default function ChatInterface() {
     setMessages((prev) => [...prev, { sender, text: safeText }]);
   };
 
+  const updateLastMessage = (update: (text: string) => string) => {
+    setMessages((prev) => {
+      if (prev.length === 0) return prev;
+      const last = prev[prev.length - 1];
+      return [...prev.slice(0, -1), { ...last, text: update(last.text) }];
+    });
+  };
+
   return (
     <div className="jarvis-container">
       {/* LEFT PANEL: Logo + Orb */}
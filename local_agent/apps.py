@@ -0,0 +1,49 @@
+# Applications the agent may launch: name -> executable (or URI).
+# Plain data so the backend can read it too (intent_router) without pyautogui.
+
+APPS = {
+    "notepad": "notepad.exe",
+    "calculator": "calc.exe",
+    "paint": "mspaint.exe",
+    "cmd": "cmd.exe",
+    "powershell": "powershell.exe",
+    "task_manager": "taskmgr.exe",
+    "control_panel": "control.exe",
+    "settings": "ms-settings:",
+    "file_explorer": "explorer.exe",
+    "snipping_tool": "snippingtool.exe",
+    "character_map": "charmap.exe",
+    "on_screen_keyboard": "osk.exe",
+    "magnifier": "magnify.exe",
+
+    "chrome": "chrome.exe",
+    "edge": "msedge.exe",
+    "firefox": "firefox.exe",
+    "brave": "brave.exe",
+    "opera": "opera.exe",
+
+    "word": "winword.exe",
+    "excel": "excel.exe",
+    "powerpoint": "powerpnt.exe",
+    "outlook": "outlook.exe",
+    "onenote": "onenote.exe",
+
+    "vscode": "Code.exe",
+    "pycharm": "pycharm64.exe",
+    "intellij": "idea64.exe",
+    "git_bash": "git-bash.exe",
+
+    "spotify": "spotify.exe",
+    "vlc": "vlc.exe",
+    "windows_media_player": "wmplayer.exe",
+
+    "discord": "discord.exe",
+    "teams": "ms-teams.exe",
+    "zoom": "zoom.exe",
+    "skype": "skype.exe",
+
+    "steam": "steam.exe",
+    "obs": "obs64.exe",
+    "virtualbox": "VirtualBox.exe",
+    "docker_desktop": "Docker Desktop.exe",
+}
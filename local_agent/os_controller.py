@@ -3,6 +3,8 @@ import webbrowser
 import pyautogui
 import subprocess
 
+from apps import APPS
+
 
 def resolve_path(path):
     if "%DESKTOP%" in path:
@@ -12,55 +14,7 @@ def resolve_path(path):
 
 
 def open_application(app):
-    apps = {
-        "notepad": "notepad.exe",
-        "calculator": "calc.exe",
-        "paint": "mspaint.exe",
-        "cmd": "cmd.exe",
-        "powershell": "powershell.exe",
-        "task_manager": "taskmgr.exe",
-        "control_panel": "control.exe",
-        "settings": "ms-settings:",
-        "file_explorer": "explorer.exe",
-        "snipping_tool": "snippingtool.exe",
-        "character_map": "charmap.exe",
-        "on_screen_keyboard": "osk.exe",
-        "magnifier": "magnify.exe",
-
-        "chrome": "chrome.exe",
-        "edge": "msedge.exe",
-        "firefox": "firefox.exe",
-        "brave": "brave.exe",
-        "opera": "opera.exe",
-
-        "word": "winword.exe",
-        "excel": "excel.exe",
-        "powerpoint": "powerpnt.exe",
-        "outlook": "outlook.exe",
-        "onenote": "onenote.exe",
-
-        "vscode": "Code.exe",
-        "pycharm": "pycharm64.exe",
-        "intellij": "idea64.exe",
-        "git_bash": "git-bash.exe",
-
-        "spotify": "spotify.exe",
-        "vlc": "vlc.exe",
-        "windows_media_player": "wmplayer.exe",
-
-        "discord": "discord.exe",
-        "teams": "ms-teams.exe",
-        "zoom": "zoom.exe",
-        "skype": "skype.exe",
-
-        "steam": "steam.exe",
-        "obs": "obs64.exe",
-        "virtualbox": "VirtualBox.exe",
-        "docker_desktop": "Docker Desktop.exe",
-    }
-
-
-    exe = apps.get(app.lower())
+    exe = APPS.get(app.lower())
     if not exe:
         return "App not allowed ❌"
 
@@ -73,7 +27,8 @@ def open_application(app):
 
 def close_application(app):
     try:
-        subprocess.run(f"taskkill /IM {app}.exe /F", shell=True)
+        # Argument list, no shell: image names may contain spaces ("Docker Desktop.exe")
+        subprocess.run(["taskkill", "/IM", f"{app}.exe", "/F"])
         return f"{app} closed 🛑"
     except Exception as e:
         return f"Failed to close {app}: {e}"
@@ -97,7 +52,7 @@ def close_website(browser="chrome"):
     if not exe:
         return "Unsupported browser"
 
-    subprocess.run(f"taskkill /IM {exe} /F", shell=True)
+    subprocess.run(["taskkill", "/IM", exe, "/F"])
     return f"{browser} closed 🌐🛑"
 
 